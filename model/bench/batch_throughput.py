@@ -0,0 +1,56 @@
+"""
+batch_throughput.py
+Measures recommend_trips() throughput as a function of batch size.
+
+Requests are every (source, destination) pair drawn from the KG city list
+with a fixed date range, split into batches of each size.
+
+Usage:
+    python batch_throughput.py --requests 512 --batch_sizes 1 8 32 128 --threads 4
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import inference
+
+def make_requests(engine, n, seed=42):
+    cities = [c.split(":", 1)[1] for c in engine.kg_distances.city_rows]
+    rng = random.Random(seed)
+    return [{
+        "source": rng.choice(cities),
+        "destination": rng.choice(cities),
+        "start_date": "20 Oct 2025",
+        "end_date": "25 Oct 2025",
+        "veg/non-veg": rng.choice(["Veg", "Non-Veg", "Any"]),
+    } for _ in range(n)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched recommendation throughput")
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--threads", type=int, default=1, help="hnswlib num_threads")
+    parser.add_argument("--art_dir", type=str, default=inference.ART_DIR)
+    args = parser.parse_args()
+
+    engine = inference.Recommender(args.art_dir).warm()
+    requests = make_requests(engine, args.requests)
+    engine.recommend_trips(requests[:8], num_threads=args.threads)  # first-call overheads
+
+    print(f"\n{'batch':>6} {'req/s':>10} {'req/s/thread':>13} {'ms/batch':>10}")
+    for bs in args.batch_sizes:
+        t0 = time.perf_counter()
+        for i in range(0, len(requests), bs):
+            engine.recommend_trips(requests[i:i + bs], num_threads=args.threads)
+        secs = time.perf_counter() - t0
+        rps = len(requests) / secs
+        print(f"{bs:>6} {rps:10.1f} {rps / args.threads:13.1f} {secs / -(-len(requests) // bs) * 1e3:10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+cache_latency.py
+Per-request latency of recommend_trip with and without the inference caches
+on skewed traffic (a few popular routes get most requests).
+
+Usage:
+    python cache_latency.py --requests 2000 --routes 50 --zipf 1.2
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import inference
+from cache import LRUCache
+
+def make_traffic(engine, n_requests, n_routes, zipf, seed=42):
+    rng = np.random.default_rng(seed)
+    cities = [c.split(":", 1)[1] for c in engine.kg_distances.city_rows]
+    routes = [{
+        "source": cities[rng.integers(len(cities))],
+        "destination": cities[rng.integers(len(cities))],
+        "start_date": "20 Oct 2025",
+        "end_date": "25 Oct 2025",
+        "veg/non-veg": "Any",
+    } for _ in range(n_routes)]
+    # Zipf-like popularity: route r is requested with weight 1 / (r + 1)^zipf
+    p = 1.0 / np.arange(1, n_routes + 1) ** zipf
+    picks = rng.choice(n_routes, size=n_requests, p=p / p.sum())
+    return [routes[i] for i in picks]
+
+def run(engine, traffic):
+    latencies = []
+    for req in traffic:
+        t0 = time.perf_counter()
+        engine.recommend_trips([req])
+        latencies.append(time.perf_counter() - t0)
+    return np.array(latencies) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference caches")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--routes", type=int, default=50)
+    parser.add_argument("--zipf", type=float, default=1.2)
+    parser.add_argument("--art_dir", type=str, default=inference.ART_DIR)
+    args = parser.parse_args()
+
+    engine = inference.Recommender(args.art_dir).warm()
+    traffic = make_traffic(engine, args.requests, args.routes, args.zipf)
+
+    print(f"\n{'mode':<10} {'p50 us':>10} {'p99 us':>10} {'mean us':>10}")
+    for mode in ("uncached", "cached"):
+        size = 0 if mode == "uncached" else None
+        engine.embedding_cache = LRUCache(size if size is not None else inference.EMBED_CACHE_SIZE)
+        engine.result_cache = LRUCache(size if size is not None else inference.RESULT_CACHE_SIZE,
+                                       ttl=inference.RESULT_CACHE_TTL)
+        lat = run(engine, traffic)
+        print(f"{mode:<10} {np.percentile(lat, 50):10.1f} {np.percentile(lat, 99):10.1f} {lat.mean():10.1f}")
+
+    for name, stats in engine.cache_stats().items():
+        print(f"\n{name}: " + ", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                       for k, v in stats.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+city_resolution.py
+City-name lookup: the old substring scan over node ids vs city_index.py.
+
+Node ids are the real KG city nodes (--kg_dir, if present) plus synthetic
+towns and --nodes_per_city non-city nodes per city, like the catalog's
+places / events / food. Queries mix exact names, aliases, one- and
+two-letter typos and unknown names. The memo is cleared before each
+query, so every lookup is a cold one.
+
+Usage:
+    python city_resolution.py --cities 1000 10000 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from city_index import ALIASES, CityIndex
+from kg_build import CITY_SEQUENCES
+from kg_csr import KG_CSR_DIR, KGGraph
+
+def scan(node_ids, city_name):
+    """The previous get_node_id_for_city: exact id, else the first id containing the name."""
+    nid = f"city:{city_name}"
+    if nid in node_ids:
+        return nid
+    for n in node_ids:
+        if city_name.lower() in n.lower():
+            return n
+    return None
+
+def typo(name, rng, edits):
+    chars = list(name)
+    for _ in range(edits):
+        i = rng.randrange(1, len(chars))
+        op = rng.choice("dsi")
+        if op == "d" and len(chars) > 4:
+            del chars[i]
+        elif op == "s":
+            chars[i] = rng.choice("aeiou")
+        else:
+            chars.insert(i, rng.choice("aeiou"))
+    return "".join(chars)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark city-name resolution")
+    parser.add_argument("--cities", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--nodes_per_city", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--kg_dir", default=KG_CSR_DIR)
+    args = parser.parse_args()
+
+    real = [c for seq in CITY_SEQUENCES.values() for c in seq] + list(CITY_SEQUENCES)
+    if os.path.exists(os.path.join(args.kg_dir, "graph.json")):
+        kg = KGGraph.load(args.kg_dir)
+        real += [kg.node_id(i)[len("city:"):] for i in kg.nodes_of_type("city")]
+    real = list(dict.fromkeys(real))
+
+    rng = random.Random(0)
+    for n in args.cities:
+        syllables = ["ka", "ra", "pu", "zha", "lam", "kod", "ur", "tha", "nad", "mala", "kulam", "pet"]
+        towns = list(dict.fromkeys(real + ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title()
+                                           for _ in range(max(0, n - len(real)))]))[:max(n, len(real))]
+        node_ids = [f"city:{t}" for t in towns] + [f"place:{t} Stay {j}" for t in towns for j in range(args.nodes_per_city)]
+        t0 = time.perf_counter()
+        index = CityIndex.from_cities(towns)
+        build_secs = time.perf_counter() - t0
+
+        queries = []
+        for i in range(args.queries):
+            kind = i % 4
+            if kind == 0:
+                queries.append(rng.choice(real))
+            elif kind == 1:
+                queries.append(rng.choice(list(ALIASES)))
+            elif kind == 2:
+                queries.append(typo(rng.choice(real), rng, 1 + i % 2))
+            else:
+                queries.append(f"Nowhere {i}")
+
+        t0 = time.perf_counter()
+        for q in queries:
+            scan(node_ids, q)
+        scan_us = (time.perf_counter() - t0) / len(queries) * 1e6
+        t0 = time.perf_counter()
+        for q in queries:
+            index._memo.clear()
+            index.resolve(q)
+        index_us = (time.perf_counter() - t0) / len(queries) * 1e6
+        resolved = sum(index.resolve(q) is not None for q in queries[2::4])
+        print(f"cities={len(towns):>7} nodes={len(node_ids):>8}  build {build_secs:6.2f}s  "
+              f"scan {scan_us:9.1f} us/lookup  index {index_us:7.1f} us/lookup  "
+              f"typos resolved {resolved}/{len(queries[2::4])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+collaborative_factors.py
+Interaction generation and item-factor computation for 10^4..10^6 users.
+
+- generator: the old per-user loop (np.random.choice per user, Python
+  lists) vs interactions.synthetic_interactions(); the loop only runs up to
+  --legacy_max users
+- factorizer: TruncatedSVD (if scikit-learn is installed), scipy svds as a
+  single-threaded reference, and als.implicit_als; ALS is reported per
+  iteration (--als_iterations are run)
+
+Usage:
+    python collaborative_factors.py --users 10000 100000 1000000 --items 6071 --workers 4
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.linalg import svds
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from als import implicit_als
+from interactions import MIN_ITEMS_PER_USER, MAX_ITEMS_PER_USER, synthetic_interactions
+
+def legacy_interactions(popularity, num_users, seed):
+    """The generator train.py used before interactions.py."""
+    random.seed(seed)
+    np.random.seed(seed)
+    n_items = len(popularity)
+    rows, cols, data = [], [], []
+    for u in range(num_users):
+        k = random.randint(MIN_ITEMS_PER_USER, MAX_ITEMS_PER_USER)
+        chosen = np.random.choice(n_items, size=min(k, n_items), replace=False, p=popularity)
+        for item_idx in chosen:
+            rows.append(u)
+            cols.append(item_idx)
+            data.append(1 + int(random.random() * 4))
+    return csr_matrix((data, (rows, cols)), shape=(num_users, n_items), dtype=np.float32)
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interaction generation and item factorization")
+    parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--items", type=int, default=6071)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--legacy_max", type=int, default=100000, help="Largest size the old loop runs at")
+    parser.add_argument("--als_iterations", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None, help="ALS threads (default: all cores)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        from sklearn.decomposition import TruncatedSVD
+    except ImportError:
+        TruncatedSVD = None
+
+    rng = np.random.default_rng(args.seed)
+    popularity = 1 + rng.random(args.items) * 0.5
+    popularity /= popularity.sum()
+
+    print(f"{'users':>9} {'nnz':>10} {'loop gen':>9} {'vec gen':>8} {'TruncSVD':>9} {'svds':>8} {'ALS/iter':>9}")
+    for n in args.users:
+        mat, vec_secs = timed(lambda: synthetic_interactions(popularity, n, seed=args.seed))
+        loop = "-"
+        if n <= args.legacy_max:
+            _, secs = timed(lambda: legacy_interactions(popularity, n, args.seed))
+            loop = f"{secs:.2f}s"
+
+        trunc = "n/a"
+        if TruncatedSVD is not None:
+            _, secs = timed(lambda: TruncatedSVD(n_components=args.dim, random_state=args.seed).fit(mat))
+            trunc = f"{secs:.2f}s"
+        _, svds_secs = timed(lambda: svds(mat, k=args.dim))
+        _, als_secs = timed(lambda: implicit_als(mat, factors=args.dim, iterations=args.als_iterations,
+                                                 workers=args.workers, seed=args.seed, verbose=False))
+        print(f"{n:>9} {mat.nnz:>10} {loop:>9} {vec_secs:7.2f}s {trunc:>9} {svds_secs:7.2f}s "
+              f"{als_secs / args.als_iterations:8.2f}s")
+
+if __name__ == "__main__":
+    main()
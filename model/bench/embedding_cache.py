@@ -0,0 +1,77 @@
+"""
+embedding_cache.py
+Content-embedding time for a full re-encode vs the content-hash cache.
+
+Texts are the catalog's (label, description) pairs from the item store,
+optionally repeated with a suffix to reach --items. Three runs against a
+fresh cache directory:
+
+- cold:  empty cache, every text encoded
+- warm:  same catalog, nothing encoded
+- diff:  --changed fraction of descriptions edited, only those encoded
+
+Usage:
+    python embedding_cache.py --items 20000 --changed 0.01
+"""
+
+import os
+import sys
+import time
+import shutil
+import random
+import argparse
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import item_store
+from item_store import ItemStore
+from embedding_cache import EmbeddingCache, text_key
+
+SENTENCE_MODEL = "all-MiniLM-L6-v2"
+
+def catalog(n):
+    store = ItemStore(item_store.ITEM_STORE_DIR)
+    base = [(store.label(i), store.string("description", i)) for i in range(len(store))]
+    return [(lbl if i < len(base) else f"{lbl} #{i // len(base)}", desc)
+            for i, (lbl, desc) in ((i, base[i % len(base)]) for i in range(n))]
+
+def run(cache_dir, rows, encode):
+    t0 = time.perf_counter()
+    cache = EmbeddingCache(cache_dir)
+    keys = [text_key(SENTENCE_MODEL, lbl, desc) for lbl, desc in rows]
+    cache.encode(keys, [f"{lbl}. {desc}" for lbl, desc in rows], encode)
+    return time.perf_counter() - t0, cache.misses
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the content embedding cache")
+    parser.add_argument("--items", type=int, default=6071)
+    parser.add_argument("--changed", type=float, default=0.01)
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(SENTENCE_MODEL)
+    encode = lambda texts: model.encode(texts, batch_size=args.batch_size, show_progress_bar=False)
+
+    rows = catalog(args.items)
+    rng = random.Random(args.seed)
+    edited = list(rows)
+    for i in rng.sample(range(len(rows)), int(len(rows) * args.changed)):
+        edited[i] = (edited[i][0], edited[i][1] + " (updated)")
+
+    cache_dir = tempfile.mkdtemp(prefix="embedding_cache_")
+    try:
+        print(f"{'run':<6} {'encoded':>8} {'seconds':>9}")
+        for name, catalog_rows in (("cold", rows), ("warm", rows), ("diff", edited)):
+            secs, encoded = run(cache_dir, catalog_rows, encode)
+            print(f"{name:<6} {encoded:>8} {secs:9.2f}")
+        size = sum(os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir))
+        print(f"\nCache size: {size / 2**20:.1f} MB")
+    finally:
+        shutil.rmtree(cache_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+geo_proximity.py
+geo.py grid index vs a full scan, on synthetic clustered coordinates.
+
+- build: build_geo_index() over --items points
+- within: items within --radius km of a city centroid, grid lookup vs
+  haversine over every item (results are checked to be identical)
+- proximity: distance-decay scores for --candidates items in one call vs a
+  per-candidate Python loop
+
+Usage:
+    python geo_proximity.py --items 10000 100000 1000000 --radius 20
+"""
+
+import os
+import sys
+import math
+import time
+import argparse
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from geo import GEO_DECAY_KM, GeoIndex, build_geo_index, haversine_km
+
+# Kerala bounding box (as in synthetic_catalog.py)
+LAT_RANGE = (8.2, 12.8)
+LON_RANGE = (74.8, 77.4)
+
+def synthetic_points(n, seed=42):
+    """(lat, lon, city) clustered around n // 200 towns; ~15% of items have no coordinates."""
+    rng = np.random.default_rng(seed)
+    towns = max(60, n // 200)
+    town_lat, town_lon = rng.uniform(*LAT_RANGE, size=towns), rng.uniform(*LON_RANGE, size=towns)
+    city = rng.integers(0, towns, size=n)
+    lat = town_lat[city] + rng.normal(0, 0.03, size=n)
+    lon = town_lon[city] + rng.normal(0, 0.03, size=n)
+    missing = rng.random(n) < 0.15
+    lat[missing] = lon[missing] = np.nan
+    return lat, lon, np.array([f"town {c}" for c in city.tolist()], dtype=object)
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def _haversine_scalar(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(min(a, 1.0)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the geo.py grid index")
+    parser.add_argument("--items", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--radius", type=float, default=20.0)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n in args.items:
+        lat, lon, city = synthetic_points(n)
+        build_secs, arrays = timed(lambda: build_geo_index(lat, lon, city), 1)
+        geo = GeoIndex(arrays)
+        c_lat, c_lon = geo.centroid(geo.cities[0])
+
+        grid_secs, (idx, _) = timed(lambda: geo.within(c_lat, c_lon, args.radius), args.repeat)
+        scan_secs, ref = timed(lambda: np.flatnonzero(haversine_km(c_lat, c_lon, lat, lon) <= args.radius), args.repeat)
+        assert np.array_equal(np.sort(idx), ref), "grid and scan disagree"
+
+        cand = np.random.default_rng(0).integers(0, n, size=args.candidates)
+        vec_secs, _ = timed(lambda: geo.proximity(geo.cities[0], cand), args.repeat)
+        loop_secs, _ = timed(lambda: [math.exp(-_haversine_scalar(c_lat, c_lon, lat[i], lon[i]) / GEO_DECAY_KM)
+                                      if lat[i] == lat[i] else float("nan") for i in cand.tolist()], args.repeat)
+        print(f"items={n:>8}  build {build_secs:6.2f}s  cells {len(geo.cell_keys):>6}  "
+              f"within {args.radius:g}km: {idx.size:>6} hits, grid {grid_secs * 1e3:7.3f} ms vs scan {scan_secs * 1e3:8.3f} ms  "
+              f"proximity x{args.candidates}: {vec_secs * 1e6:6.1f} us vs loop {loop_secs * 1e6:7.1f} us")
+
+if __name__ == "__main__":
+    main()
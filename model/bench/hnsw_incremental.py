@@ -0,0 +1,87 @@
+"""
+hnsw_incremental.py
+Full HNSW rebuild vs in-place update (ann_index.update_hnsw_index) after a
+small catalog diff.
+
+For every size: build an index over random unit vectors, then apply a diff
+of --churn of the catalog (half new items, a quarter removed, a quarter
+with changed vectors) either by rebuilding from scratch or by loading the
+saved index and updating it. Recall@10 of both against exact search is
+reported on --queries random queries.
+
+Usage:
+    python hnsw_incremental.py --sizes 10000 100000 1000000 --dim 128 --churn 0.01
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from ann_index import build_hnsw_index, update_hnsw_index
+
+def unit(rng, n, dim):
+    x = rng.standard_normal((n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def recall_at_10(index, vectors, labels, queries):
+    found, _ = index.knn_query(queries, k=10)
+    sims = queries @ vectors.T
+    exact = labels[np.argpartition(-sims, 10, axis=1)[:, :10]]
+    return np.mean([len(set(f) & set(e)) / 10 for f, e in zip(found, exact)])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental HNSW updates")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--churn", type=float, default=0.01)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    tmp = tempfile.mkdtemp(prefix="hnsw_incremental_")
+    print(f"{'items':>9} {'full build':>11} {'update':>9} {'speedup':>8} {'recall full':>12} {'recall upd':>11}")
+    try:
+        for n in args.sizes:
+            path = os.path.join(tmp, f"index_{n}.bin")
+            labels = np.arange(n, dtype=np.int64)
+            vectors = unit(rng, n, args.dim)
+            build_hnsw_index(vectors, labels).save_index(path)
+
+            # Diff: drop a quarter of the churn, change a quarter, append half as new labels
+            n_diff = max(4, int(n * args.churn))
+            touched = rng.choice(n, size=n_diff // 2, replace=False)
+            removed, changed = touched[:n_diff // 4], touched[n_diff // 4:]
+            keep = np.setdiff1d(labels, removed)
+            new_vectors = vectors.copy()
+            new_vectors[changed] = unit(rng, changed.size, args.dim)
+            cur_labels = np.concatenate([keep, np.arange(n, n + n_diff // 2)])
+            cur_vectors = np.concatenate([new_vectors[keep], unit(rng, n_diff // 2, args.dim)])
+
+            t0 = time.perf_counter()
+            full = build_hnsw_index(cur_vectors, cur_labels)
+            full.save_index(os.path.join(tmp, "full.bin"))
+            full_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            updated, stats = update_hnsw_index(path, cur_vectors, cur_labels, labels)
+            updated.save_index(path)
+            update_s = time.perf_counter() - t0
+
+            queries = unit(rng, args.queries, args.dim)
+            print(f"{n:>9} {full_s:10.2f}s {update_s:8.2f}s {full_s / update_s:7.1f}x "
+                  f"{recall_at_10(full, cur_vectors, cur_labels, queries):12.3f} "
+                  f"{recall_at_10(updated, cur_vectors, cur_labels, queries):11.3f}   {stats}")
+    finally:
+        shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+ingest.py
+CSV parsing cost of the training pipeline: two independent DictReader passes
+(what kg_build.py and train.py used to do) vs one ingest.py pass plus two
+reads of the columnar catalog.
+
+The CSVs are replicated --scale times into a temp directory to simulate a
+larger catalog. Peak Python heap (tracemalloc) shows that ingestion and
+catalog reads stay bounded by the chunk size, not the catalog size.
+
+Usage:
+    python ingest.py --scale 1 10 100 --chunk_rows 50000
+"""
+
+import os
+import sys
+import csv
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import ingest
+
+def replicate(tmp, scale):
+    """Copies of the source CSVs with every row repeated `scale` times (names made unique)."""
+    sources = []
+    for kind, path, encoding in ingest.SOURCES:
+        out = os.path.join(tmp, os.path.basename(path))
+        with open(path, newline="", encoding=encoding) as f:
+            rows = list(csv.DictReader(f))
+        name_col = "Festival Name" if kind == "event" else "Name"
+        with open(out, "w", newline="", encoding=encoding) as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            for copy in range(scale):
+                for r in rows:
+                    writer.writerow(dict(r, **{name_col: f"{r[name_col]} {copy}" if copy else r[name_col]}))
+        sources.append((kind, out, encoding))
+    return tuple(sources)
+
+def measure(fn):
+    """(result, seconds, peak traced bytes); timed without tracemalloc, which slows Python down."""
+    t0 = time.perf_counter()
+    n = fn()
+    secs = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return n, secs, peak
+
+def csv_pass(sources):
+    return sum(1 for _ in ingest.iter_csv_records(sources))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared CSV ingestion")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--chunk_rows", type=int, default=ingest.CHUNK_ROWS)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'2x csv parse':>13} {'ingest':>9} {'2x read':>9} {'ingest peak':>12} {'read peak':>10}")
+    for scale in args.scale:
+        tmp = tempfile.mkdtemp(prefix="ingest_bench_")
+        try:
+            sources = replicate(tmp, scale)
+            catalog_dir = os.path.join(tmp, "catalog")
+            n, parse_s, _ = measure(lambda: csv_pass(sources) + csv_pass(sources))
+            _, ingest_s, ingest_peak = measure(lambda: ingest.ingest(catalog_dir, sources, args.chunk_rows))
+            catalog = ingest.Catalog(catalog_dir)
+            _, read_s, read_peak = measure(lambda: sum(1 for _ in catalog.records()) + sum(1 for _ in catalog.records()))
+            print(f"{n // 2:>9} {parse_s:12.2f}s {ingest_s:8.2f}s {read_s:8.2f}s "
+                  f"{ingest_peak / 2**20:10.1f}MB {read_peak / 2**20:8.1f}MB")
+        finally:
+            shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+instrumentation.py
+Cost of the metrics.py spans.
+
+- per span: an empty `with METRICS.span(...)` block, enabled vs disabled
+- per request: recommend_trips latency (median over --repeat rounds of
+  --requests distinct requests, result cache cleared) with the
+  instrumentation on and off; needs trained artifacts in --art_dir
+
+Usage:
+    python instrumentation.py --requests 64 --repeat 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from metrics import Metrics
+
+def span_cost(metrics, n=200000):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with metrics.span("stage"):
+            pass
+    return (time.perf_counter() - t0) / n
+
+def request_latency(engine, requests, repeat):
+    timings = []
+    for _ in range(repeat):
+        engine.result_cache.clear()
+        engine.embedding_cache.clear()
+        t0 = time.perf_counter()
+        engine.recommend_trips(requests)
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metrics.py overhead")
+    parser.add_argument("--art_dir", default=None)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    on, off = span_cost(Metrics(enabled=True)), span_cost(Metrics(enabled=False))
+    print(f"span: enabled {on * 1e9:.0f} ns, disabled {off * 1e9:.0f} ns")
+
+    import inference
+    from loadgen import make_payloads
+    from metrics import METRICS
+
+    engine = inference.Recommender(args.art_dir or inference.ART_DIR)
+    try:
+        engine.warm()
+    except (OSError, ImportError) as e:
+        print(f"(no engine: {e})")
+        return
+    requests = [json.loads(p) for p in make_payloads(args.requests)]
+    engine.recommend_trips(requests)  # warm-up
+    for enabled in (False, True, False, True):
+        METRICS.enabled = enabled
+        secs = request_latency(engine, requests, args.repeat)
+        print(f"recommend_trips x{args.requests}: metrics {'on ' if enabled else 'off'} {secs * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+item_store_scaling.py
+Load time and RSS of the columnar item store as the catalog grows,
+compared with the legacy item_map.json.
+
+For each size a synthetic catalog is written to a temp directory, then a
+fresh process opens it, reads --lookups random records and reports the
+open time, lookup time and RSS growth. "private" excludes file-backed pages, which
+the page cache shares between processes.
+
+Usage:
+    python item_store_scaling.py --sizes 5000 100000 1000000 --json_max 100000
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import tempfile
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from item_store import write_item_store
+
+# Runs in a fresh interpreter: argv = kind, path, n_items, lookups
+PROBE = r"""
+import sys, time, json, random
+sys.path.insert(0, sys.argv[5])
+
+def rss_kb():
+    # (resident, private = resident - file-backed/shared)
+    with open("/proc/self/statm") as f:
+        resident, shared = (int(v) * 4 for v in f.read().split()[1:3])
+    return resident, resident - shared
+
+kind, path, n, lookups = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+import numpy as np
+from item_store import ItemStore
+before = rss_kb()
+t0 = time.perf_counter()
+if kind == "store":
+    store = ItemStore(path)
+    get = store.record
+else:
+    with open(path, encoding="utf-8") as f:
+        item_map = json.load(f)
+    get = lambda i: item_map[str(i)]
+t1 = time.perf_counter()
+rng = random.Random(0)
+for _ in range(lookups):
+    get(rng.randrange(n))
+t2 = time.perf_counter()
+print(json.dumps({"open_ms": (t1 - t0) * 1e3, "lookup_us": (t2 - t1) / lookups * 1e6,
+                  "rss_mb": (rss_kb()[0] - before[0]) / 1024,
+                  "private_mb": (rss_kb()[1] - before[1]) / 1024}))
+"""
+
+def synthetic_items(n, seed=42):
+    rng = random.Random(seed)
+    kinds = ["place"] * 80 + ["event"] * 15 + ["food"] * 5
+    types = ["museum", "hotel", "beach", "temple", "park", "resort"]
+    items = []
+    for i in range(n):
+        kind = rng.choice(kinds)
+        meta = {"description": f"Synthetic {kind} number {i} with a short description."}
+        if kind == "place":
+            meta = {"type": rng.choice(types), "lat": f"{rng.uniform(8, 12):.6f}",
+                    "lon": f"{rng.uniform(75, 77):.6f}", **meta}
+        items.append({"qid": f"{kind}:Item {i}", "label": f"Item {i}", "type": kind,
+                      "city": f"City {rng.randrange(max(n // 20, 1))}", "meta": meta})
+    return items
+
+def probe(kind, path, n, lookups):
+    out = subprocess.run([sys.executable, "-c", PROBE, kind, path, str(n), str(lookups), SRC_DIR],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark item store scaling")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 100000, 1000000])
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--json_max", type=int, default=100000, help="Largest size also run with item_map.json")
+    args = parser.parse_args()
+
+    print(f"{'items':>9} {'format':<6} {'open ms':>10} {'lookup us':>10} {'RSS +MB':>9} {'private +MB':>12}")
+    for n in args.sizes:
+        items = synthetic_items(n)
+        with tempfile.TemporaryDirectory() as tmp:
+            store_dir = os.path.join(tmp, "item_store")
+            write_item_store(items, store_dir)
+            runs = [("store", store_dir)]
+            if n <= args.json_max:
+                json_path = os.path.join(tmp, "item_map.json")
+                with open(json_path, "w", encoding="utf-8") as f:
+                    json.dump({i: it for i, it in enumerate(items)}, f, ensure_ascii=False, indent=2)
+                runs.append(("json", json_path))
+            for kind, path in runs:
+                r = probe(kind, path, n, args.lookups)
+                print(f"{n:>9} {kind:<6} {r['open_ms']:10.1f} {r['lookup_us']:10.1f} {r['rss_mb']:9.1f} {r['private_mb']:12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+itinerary.py
+Itinerary planning time per trip length, and tour quality of 2-opt vs plain
+nearest neighbour.
+
+Items are synthetic: --cities cities of --items_per_city located items,
+scattered up to ~15 km around each city centre. A plan draws 40 spots,
+20 hotels and 40 food items (the ranked candidate pools of
+inference.OUTPUT_BUCKETS) from one city. "on the fly" is the same plan with
+every distance computed by haversine instead of read from the city matrix.
+
+Usage:
+    python itinerary.py --days 1 3 5 7 --plans 200
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from geo import haversine_km
+from planner import (CityDistances, build_city_distances, nearest_neighbour, plan_itinerary, tour_length,
+                     two_opt)
+
+class OnTheFly(CityDistances):
+    def matrix(self, item_idx):
+        item_idx = np.asarray(item_idx, dtype=np.int64)
+        lat, lon = self.lat[item_idx], self.lon[item_idx]
+        return haversine_km(lat[:, None], lon[:, None], lat, lon)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the itinerary planner")
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--items_per_city", type=int, default=500)
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 3, 5, 7])
+    parser.add_argument("--plans", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centres = np.column_stack([rng.uniform(8.5, 12.5, args.cities), rng.uniform(75.0, 77.0, args.cities)])
+    city = np.repeat(np.arange(args.cities), args.items_per_city)
+    lat = centres[city, 0] + rng.normal(0, 0.07, city.size)
+    lon = centres[city, 1] + rng.normal(0, 0.07, city.size)
+    t0 = time.perf_counter()
+    arrays = build_city_distances(lat, lon, [f"City {c}" for c in city])
+    print(f"{city.size} items: per-city matrices built in {time.perf_counter() - t0:.2f}s "
+          f"({arrays['dist'].nbytes / 1e6:.1f} MB)")
+    cached, fly = CityDistances(arrays), OnTheFly(arrays)
+
+    def pool(n, c):
+        return rng.choice(np.flatnonzero(city == c), n, replace=False)
+
+    for n_days in args.days:
+        days = list(range(20000, 20000 + n_days))
+        pools = [(pool(20, c), pool(40, c), pool(40, c)) for c in rng.integers(0, args.cities, args.plans)]
+        timings = {}
+        for name, distances in (("cached", cached), ("on the fly", fly)):
+            t0 = time.perf_counter()
+            for hotels, spots, food in pools:
+                plan_itinerary(distances, days, hotels, spots, food)
+            timings[name] = (time.perf_counter() - t0) / len(pools) * 1e3
+        print(f"{n_days} day(s): cached {timings['cached']:.2f} ms/plan, on the fly {timings['on the fly']:.2f} ms/plan")
+
+    # Tour quality on 40 stops
+    ratios = []
+    for c in rng.integers(0, args.cities, 50):
+        stops = pool(40, c)
+        dist = cached.matrix(stops)
+        nn = nearest_neighbour(dist)
+        ratios.append(tour_length(dist, two_opt(nn, dist)) / tour_length(dist, nn))
+    print(f"40-stop tours: 2-opt length is {np.mean(ratios):.1%} of nearest neighbour on average")
+
+if __name__ == "__main__":
+    main()
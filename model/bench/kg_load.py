@@ -0,0 +1,88 @@
+"""
+kg_load.py
+Compares the pickled nx.DiGraph with the CSR graph (kg_csr):
+
+- load time and Python heap allocated by the load (tracemalloc)
+- resident memory of a fresh process after loading (VmRSS delta)
+- reverse BFS from every city node (nx vs KGGraph.bfs)
+
+Usage:
+    python kg_load.py --repeats 5 --radius 6
+"""
+
+import os
+import sys
+import time
+import pickle
+import argparse
+import subprocess
+import tracemalloc
+
+import networkx as nx
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import kg_build
+from kg_csr import KG_CSR_DIR, KGGraph
+
+def load_pickle():
+    with open(kg_build.KG_OUT, "rb") as f:
+        return pickle.load(f)
+
+def load_csr():
+    kg = KGGraph.load(KG_CSR_DIR)
+    kg.index  # id -> position dict, needed by any lookup by name
+    return kg
+
+LOADERS = {"pickle": load_pickle, "csr": load_csr}
+
+def timed_load(loader, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        loader()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    obj = loader()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, best, peak
+
+def rss_delta_mb(name):
+    """VmRSS growth of a fresh interpreter caused by one load."""
+    code = (f"import sys; sys.path.insert(0, {SRC_DIR!r}); sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+            "import kg_load\n"
+            "rss = lambda: int([l for l in open('/proc/self/status') if l.startswith('VmRSS')][0].split()[1])\n"
+            f"before = rss(); g = kg_load.LOADERS[{name!r}](); print((rss() - before) / 1024)")
+    return float(subprocess.check_output([sys.executable, "-c", code]).decode().split()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KG load formats")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--radius", type=int, default=6)
+    args = parser.parse_args()
+
+    G, pickle_s, pickle_heap = timed_load(load_pickle, args.repeats)
+    kg, csr_s, csr_heap = timed_load(load_csr, args.repeats)
+    print(f"Nodes: {kg.n_nodes} | Edges: {kg.n_edges}")
+
+    print(f"\n{'format':<8} {'load':>10} {'heap':>10} {'RSS delta':>10}")
+    for name, secs, heap in (("pickle", pickle_s, pickle_heap), ("csr", csr_s, csr_heap)):
+        print(f"{name:<8} {secs * 1e3:8.2f}ms {heap / 2**20:8.2f}MB {rss_delta_mb(name):8.2f}MB")
+
+    cities = [kg.node_id(c) for c in kg.nodes_of_type("city")]
+    R = G.reverse(copy=False)
+    t0 = time.perf_counter()
+    for city in cities:
+        nx.single_source_shortest_path_length(R, city, cutoff=args.radius)
+    nx_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for city in cities:
+        kg.bfs(city, max_hops=args.radius, reverse=True)
+    csr_bfs_s = time.perf_counter() - t0
+    print(f"\nReverse BFS from {len(cities)} cities (radius {args.radius}): "
+          f"nx {nx_s * 1e3:.1f}ms | csr {csr_bfs_s * 1e3:.1f}ms")
+
+if __name__ == "__main__":
+    main()
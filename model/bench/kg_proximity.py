@@ -0,0 +1,91 @@
+"""
+kg_proximity.py
+Compares KG proximity scoring strategies:
+
+- bfs:   one nx.shortest_path_length per (candidate, destination) pair
+- table: one vectorized lookup in the precomputed kg_distances table
+
+Both are run on the same random (destination city, 50 candidates) requests
+and their scores are checked for agreement within the table radius.
+
+Usage:
+    python kg_proximity.py --requests 200 --candidates 50
+"""
+
+import os
+import sys
+import time
+import pickle
+import random
+import argparse
+
+import numpy as np
+import networkx as nx
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+import item_store
+import kg_build
+import kg_distances
+from item_store import ItemStore
+from geo import hop_proximity
+from kg_csr import KG_CSR_DIR, KGGraph
+from kg_distances import KGDistanceTable, build_distance_table
+
+def bfs_scores(G, dest_node, qids):
+    scores = np.zeros(len(qids))
+    for i, qid in enumerate(qids):
+        if not G.has_node(qid):
+            continue
+        try:
+            d = nx.shortest_path_length(G, source=qid, target=dest_node)
+            scores[i] = hop_proximity(d)
+        except (nx.NetworkXNoPath, nx.NodeNotFound):
+            scores[i] = 0.0
+    return scores
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KG proximity scoring")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--radius", type=int, default=kg_distances.RADIUS)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with open(kg_build.KG_OUT, "rb") as f:
+        G = pickle.load(f)
+    kg = KGGraph.load(KG_CSR_DIR)
+    items = ItemStore(item_store.ITEM_STORE_DIR)
+    qids = [items.qid(i) for i in range(len(items))]
+
+    t0 = time.perf_counter()
+    arrays = build_distance_table(kg, qids, radius=args.radius)
+    build_s = time.perf_counter() - t0
+    table = KGDistanceTable(*arrays, radius=args.radius, n_items=len(qids))
+    print(f"Build: {build_s:.2f} s | cities={len(table.cities)} entries={len(table.indices)} "
+          f"bytes={table.indptr.nbytes + table.indices.nbytes + table.hops.nbytes}")
+
+    rng = random.Random(args.seed)
+    requests = [(rng.choice(list(table.city_rows)), np.array(rng.sample(range(len(qids)), args.candidates)))
+                for _ in range(args.requests)]
+
+    t0 = time.perf_counter()
+    bfs = [bfs_scores(G, city, [qids[i] for i in cand]) for city, cand in requests]
+    bfs_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tab = [table.proximity(city, cand) for city, cand in requests]
+    table_s = time.perf_counter() - t0
+
+    # Paths beyond the radius score 0 in the table
+    floor = hop_proximity(args.radius)
+    mismatches = sum(int(np.sum(np.abs(np.where(b >= floor, b, 0.0) - t) > 1e-9)) for b, t in zip(bfs, tab))
+
+    print(f"\n{'method':<8} {'total':>10} {'per request':>14}")
+    print(f"{'bfs':<8} {bfs_s:9.3f}s {bfs_s / args.requests * 1e3:11.3f} ms")
+    print(f"{'table':<8} {table_s:9.3f}s {table_s / args.requests * 1e3:11.3f} ms")
+    print(f"\nSpeedup: {bfs_s / max(table_s, 1e-12):.0f}x | score mismatches: {mismatches}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+loadgen.py
+Closed-loop HTTP load generator for server.py.
+
+Opens --concurrency keep-alive connections. Each one sends POST /recommend
+requests back to back until --requests have completed, then the run
+reports p50/p99 latency and requests per second. --distinct controls how many
+different payloads are cycled through (fewer = more result-cache hits).
+
+Usage:
+    python loadgen.py --url http://127.0.0.1:8000 --concurrency 32 --requests 2000 --distinct 500
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+from urllib.parse import urlparse
+
+import numpy as np
+
+CITIES = ["Kozhikode", "Kochi", "Thrissur", "Ernakulam", "Kollam", "Alappuzha",
+          "Thiruvananthapuram", "Guruvayur", "Varkala", "Fort Kochi", "Aluva", "Vatakara"]
+DATES = [("20 Oct 2025", "25 Oct 2025"), ("2025-01-10", "2025-01-14"), ("01 Mar 2025", "05 Mar 2025"),
+         ("15 Aug 2025", "20 Aug 2025"), ("2025-12-20", "2025-12-31")]
+DIETS = ["Veg", "Non-Veg", "Any"]
+
+def make_payloads(n, seed=42):
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(n):
+        start, end = DATES[i % len(DATES)]
+        payloads.append(json.dumps({
+            "source": rng.choice(CITIES), "destination": rng.choice(CITIES),
+            "start_date": start, "end_date": end, "veg/non-veg": rng.choice(DIETS),
+        }).encode("utf-8"))
+    return payloads
+
+async def worker(host, port, path, payloads, counter, total, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            i = counter[0]
+            if i >= total:
+                break
+            counter[0] += 1
+            body = payloads[i % len(payloads)]
+            head = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1")
+            t0 = time.perf_counter()
+            writer.write(head + body)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            if status != 200:
+                errors[0] += 1
+    finally:
+        writer.close()
+
+async def run(url, concurrency, total, distinct):
+    u = urlparse(url)
+    payloads = make_payloads(distinct)
+    counter, errors, latencies = [0], [0], []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(u.hostname, u.port or 80, "/recommend", payloads,
+                                  counter, total, latencies, errors) for _ in range(concurrency)))
+    return time.perf_counter() - t0, np.array(latencies) * 1e3, errors[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the recommendation service")
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=500, help="Number of distinct payloads")
+    args = parser.parse_args()
+
+    secs, lat, errors = asyncio.run(run(args.url, args.concurrency, args.requests, args.distinct))
+    print(f"requests={len(lat)} errors={errors} concurrency={args.concurrency} time={secs:.2f}s")
+    print(f"throughput: {len(lat) / secs:.1f} req/s")
+    print(f"latency ms: p50={np.percentile(lat, 50):.2f} p90={np.percentile(lat, 90):.2f} "
+          f"p99={np.percentile(lat, 99):.2f} max={lat.max():.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+pipeline.py
+End-to-end benchmark of the train and inference pipelines on synthetic
+catalogs (synthetic_catalog.py) of --rows rows each.
+
+Stages, in order (each one reads what the previous ones wrote):
+
+    generate      write the synthetic CSVs
+    ingest        ingest.ingest() -> catalog/
+    kg_build      kg_build.build_graph() -> kg_graph.pkl + kg_csr/
+    content       train.compute_content_embeddings (--stub_encoder: hashed
+                  random vectors instead of the sentence-transformer)
+    walks         walks.generate_walks only (no Word2Vec)
+    node2vec      train.compute_node2vec_embeddings (walks + Word2Vec)
+    cf            interactions + train.compute_item_factors (--factorizer)
+    hnsw          combined vectors, main + per-bucket HNSW indexes, item store
+    kg_distances  kg_distances.build_distance_table
+    query         inference.Recommender: single-request latency percentiles
+                  and batched throughput over distinct requests
+
+Every stage runs in its own interpreter, so its peak RSS (ru_maxrss from
+wait4) is not inflated by earlier stages; "seconds" is the stage body,
+"wall_seconds" includes interpreter start and imports. A failing stage is
+recorded with its error and later stages still run.
+
+The JSON report holds the git commit, the parameters and host info next to
+the per-stage numbers; the catalog only depends on (rows, seed), so reports
+from different commits with the same parameters are comparable. --baseline
+prints the time / RSS ratio of each stage against an earlier report.
+
+Usage:
+    python pipeline.py --rows 10000 100000 1000000 --stub_encoder --report pipeline.json
+    python pipeline.py --rows 10000 --stub_encoder --baseline pipeline.json
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+STAGES = ("generate", "ingest", "kg_build", "content", "walks", "node2vec", "cf", "hnsw", "kg_distances", "query")
+
+class StubEncoder:
+    """Deterministic stand-in for the sentence-transformer: a unit vector seeded by the text's hash."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def encode(self, texts, batch_size=64, normalize_embeddings=True, **kwargs):
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            out[i] = np.random.default_rng(seed).standard_normal(self.dim)
+        return out / np.linalg.norm(out, axis=1, keepdims=True)
+
+# === Stages (run in the child process) ===
+def _paths(work):
+    return {"data": os.path.join(work, "data"), "catalog": os.path.join(work, "catalog"),
+            "art": os.path.join(work, "artifacts"), "kg_csr": os.path.join(work, "artifacts", "kg_csr")}
+
+def _items(work):
+    from ingest import Catalog
+    from train import catalog_item
+
+    return [catalog_item(r) for r in Catalog(_paths(work)["catalog"]).records()]
+
+def stage_generate(work, params):
+    from synthetic_catalog import write_synthetic_catalog
+
+    return write_synthetic_catalog(_paths(work)["data"], params["rows"], seed=params["seed"])
+
+def stage_ingest(work, params):
+    from ingest import SOURCES, ingest
+
+    p = _paths(work)
+    sources = [(kind, os.path.join(p["data"], os.path.basename(path)), enc) for kind, path, enc in SOURCES]
+    return {"rows": ingest(p["catalog"], sources)}
+
+def stage_kg_build(work, params):
+    from ingest import Catalog
+    from kg_build import build_graph
+    from kg_csr import write_kg_csr
+
+    p = _paths(work)
+    G = build_graph(Catalog(p["catalog"]).records())
+    with open(os.path.join(p["art"], "kg_graph.pkl"), "wb") as f:
+        pickle.dump(G, f)
+    write_kg_csr(G, p["kg_csr"])
+    return {"nodes": G.number_of_nodes(), "edges": G.number_of_edges()}
+
+def stage_content(work, params):
+    from inference import CONTENT_EMB
+    from train import compute_content_embeddings
+
+    items = _items(work)
+    encoder = StubEncoder() if params["stub_encoder"] else None
+    emb = compute_content_embeddings(items, cache_dir=None, encoder=encoder)
+    np.save(os.path.join(_paths(work)["art"], CONTENT_EMB), emb)
+    return {"items": len(items), "dim": int(emb.shape[1])}
+
+def stage_walks(work, params):
+    from walks import generate_walks
+
+    n = 0
+    for batch in generate_walks(_paths(work)["kg_csr"], num_walks=params["num_walks"], walk_length=params["walk_length"],
+                                workers=params["workers"]):
+        n += len(batch)
+    return {"walks": n}
+
+def stage_node2vec(work, params):
+    from inference import NODE2VEC_EMB
+    from train import compute_node2vec_embeddings
+
+    emb = compute_node2vec_embeddings(_paths(work)["kg_csr"], _items(work), workers=params["workers"],
+                                      walk_length=params["walk_length"], num_walks=params["num_walks"])
+    np.save(os.path.join(_paths(work)["art"], NODE2VEC_EMB), emb)
+    return {"dim": int(emb.shape[1])}
+
+def stage_cf(work, params):
+    from inference import ITEM_FACTORS
+    from train import build_interactions, compute_item_factors
+
+    items = _items(work)
+    qid_to_idx = {it["qid"]: i for i, it in enumerate(items)}
+    mat = build_interactions(items, qid_to_idx, num_users=params["users"], log_path=None)
+    factors = compute_item_factors(mat, factorizer=params["factorizer"])
+    np.save(os.path.join(_paths(work)["art"], ITEM_FACTORS), factors)
+    return {"users": mat.shape[0], "nnz": int(mat.nnz), "factorizer": params["factorizer"]}
+
+def stage_hnsw(work, params):
+    from ann_index import assign_labels, build_hnsw_index, item_keys, save_labels
+    from inference import CONTENT_EMB, NODE2VEC_EMB, ITEM_FACTORS, COMBINED_EMB, ITEM_STORE, ITEM_LABELS, \
+        HNSW_INDEX, BUCKET_INDEX
+    from item_store import BUCKET_NAMES, ItemStore, bucket_codes, write_item_store
+    from train import l2_normalize_rows
+
+    art = _paths(work)["art"]
+    items = _items(work)
+    parts = [l2_normalize_rows(np.load(os.path.join(art, name))) for name in (CONTENT_EMB, NODE2VEC_EMB, ITEM_FACTORS)]
+    combined = l2_normalize_rows(np.concatenate(parts, axis=1)).astype(np.float32)
+    np.save(os.path.join(art, COMBINED_EMB), combined)
+    keys = item_keys([it["qid"] for it in items])
+    labels, next_label = assign_labels(keys)
+
+    t0 = time.perf_counter()
+    build_hnsw_index(combined, labels).save_index(os.path.join(art, HNSW_INDEX))
+    main_secs = time.perf_counter() - t0
+
+    write_item_store(items, os.path.join(art, ITEM_STORE))
+    buckets = bucket_codes(ItemStore(os.path.join(art, ITEM_STORE)))
+    for bucket, name in enumerate(BUCKET_NAMES):
+        idx = np.flatnonzero(buckets == bucket)
+        if idx.size:
+            build_hnsw_index(combined[idx], labels[idx]).save_index(os.path.join(art, BUCKET_INDEX.format(name)))
+    save_labels(os.path.join(art, ITEM_LABELS), keys, labels, buckets, next_label, combined.shape[1])
+    return {"items": len(items), "dim": int(combined.shape[1]), "main_index_seconds": main_secs}
+
+def stage_kg_distances(work, params):
+    from inference import KG_DIST
+    from kg_csr import KGGraph
+    from kg_distances import RADIUS, build_distance_table, save_distance_table
+
+    p = _paths(work)
+    qids = [it["qid"] for it in _items(work)]
+    cities, indptr, indices, hops = build_distance_table(KGGraph(p["kg_csr"]), qids, radius=RADIUS)
+    save_distance_table(os.path.join(p["art"], KG_DIST), cities, indptr, indices, hops, RADIUS, len(qids))
+    return {"cities": len(cities), "entries": int(len(indices))}
+
+def _payloads(cities, n, offset, seed):
+    """n distinct requests (distinct dates), so neither cache in the engine is ever hit."""
+    rng = np.random.default_rng(seed)
+    day0 = np.datetime64("2025-01-01")
+    diets = ["Veg", "Non-Veg", "Any"]
+    return [{"source": cities[rng.integers(len(cities))], "destination": cities[rng.integers(len(cities))],
+             "start_date": str(day0 + offset + i), "end_date": str(day0 + offset + i + 4),
+             "veg/non-veg": diets[i % 3]} for i in range(n)]
+
+def stage_query(work, params):
+    from inference import Recommender
+
+    engine = Recommender(_paths(work)["art"], text_model=StubEncoder() if params["stub_encoder"] else None)
+    t0 = time.perf_counter()
+    engine.warm()
+    warm_secs = time.perf_counter() - t0
+    cities = sorted({it["city"] for it in _items(work) if it["city"]})
+    n = params["queries"]
+    single = _payloads(cities, n, 0, params["seed"])
+    batch = _payloads(cities, n, n, params["seed"] + 1)
+
+    latencies = []
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for payload in single:
+            t0 = time.perf_counter()
+            engine.recommend_trip(payload)
+            latencies.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        engine.recommend_trips(batch)
+        batch_secs = time.perf_counter() - t0
+    ms = np.array(latencies) * 1000
+    return {"warm_seconds": warm_secs, "queries": n, "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)), "p99_ms": float(np.percentile(ms, 99)),
+            "batch_qps": n / batch_secs}
+
+def run_stage(name, work):
+    with open(os.path.join(work, "params.json"), "r", encoding="utf-8") as f:
+        params = json.load(f)
+    os.makedirs(_paths(work)["art"], exist_ok=True)
+    t0 = time.perf_counter()
+    metrics = globals()[f"stage_{name}"](work, params)
+    result = {"seconds": time.perf_counter() - t0, **metrics}
+    with open(os.path.join(work, f"result_{name}.json"), "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+# === Driver ===
+def _spawn(name, work):
+    """Run one stage in a fresh interpreter; returns its result dict with wall time and peak RSS."""
+    log_path = os.path.join(work, f"{name}.log")
+    t0 = time.perf_counter()
+    with open(log_path, "w") as log:
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--run_stage", name, "--work", work],
+                                stdout=log, stderr=subprocess.STDOUT, cwd=BENCH_DIR)
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - t0
+    result_path = os.path.join(work, f"result_{name}.json")
+    if proc.returncode == 0 and os.path.exists(result_path):
+        with open(result_path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+    else:
+        with open(log_path, "r", errors="replace") as f:
+            tail = f.read().strip().splitlines()[-1:]
+        result = {"error": tail[0] if tail else f"exit code {proc.returncode}"}
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    peak = usage.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {**result, "wall_seconds": wall, "peak_rss_mb": peak / 2**20}
+
+def _git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--", ".."], cwd=BENCH_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def _compare(report, baseline):
+    base = {run["rows"]: run["stages"] for run in baseline["runs"]}
+    print(f"\nvs baseline {str(baseline.get('commit'))[:10]}:")
+    print(f"{'rows':>9} {'stage':<13} {'time':>8} {'rss':>8}")
+    for run in report["runs"]:
+        for stage, res in run["stages"].items():
+            old = base.get(run["rows"], {}).get(stage)
+            if not old or "error" in old or "error" in res:
+                continue
+            print(f"{run['rows']:>9} {stage:<13} {res['seconds'] / max(old['seconds'], 1e-9):7.2f}x "
+                  f"{res['peak_rss_mb'] / max(old['peak_rss_mb'], 1e-9):7.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the train + inference pipeline on synthetic catalogs")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--stub_encoder", action="store_true", help="Hashed random vectors instead of the sentence model")
+    parser.add_argument("--factorizer", choices=["svd", "als"], default="svd")
+    parser.add_argument("--users", type=int, default=1200, help="Synthetic users for the cf stage")
+    parser.add_argument("--num_walks", type=int, default=10)
+    parser.add_argument("--walk_length", type=int, default=80)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work", default=None, help="Working directory (default: a temp dir, removed afterwards)")
+    parser.add_argument("--report", default="pipeline_report.json")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare against")
+    parser.add_argument("--run_stage", choices=STAGES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        run_stage(args.run_stage, args.work)
+        return
+
+    commit, dirty = _git_commit()
+    params = {k: v for k, v in vars(args).items() if k not in ("rows", "work", "report", "baseline", "run_stage")}
+    report = {"commit": commit, "dirty": dirty, "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+              "host": {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+                       "cpus": os.cpu_count()},
+              "params": params, "runs": []}
+
+    root = args.work or tempfile.mkdtemp(prefix="pipeline_bench_")
+    try:
+        for rows in args.rows:
+            work = os.path.join(root, f"rows_{rows}")
+            os.makedirs(work, exist_ok=True)
+            with open(os.path.join(work, "params.json"), "w", encoding="utf-8") as f:
+                json.dump({**params, "rows": rows}, f)
+            run = {"rows": rows, "stages": {}}
+            report["runs"].append(run)
+            print(f"\n=== {rows} rows ===")
+            print(f"{'stage':<13} {'seconds':>9} {'wall':>8} {'peak RSS':>10}")
+            for stage in args.stages:
+                res = _spawn(stage, work)
+                run["stages"][stage] = res
+                status = f"  ERROR {res['error']}" if "error" in res else ""
+                print(f"{stage:<13} {res.get('seconds', float('nan')):9.2f} {res['wall_seconds']:8.2f} "
+                      f"{res['peak_rss_mb']:8.1f}MB{status}")
+            # Written after every size so a long run leaves a partial report
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    finally:
+        if not args.work:
+            shutil.rmtree(root)
+
+    print(f"\nReport: {args.report}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            _compare(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
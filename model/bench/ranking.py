@@ -0,0 +1,74 @@
+"""
+ranking.py
+Ranking stage: per-request Python dedup + sort vs inference.rank_rows().
+
+Scores, keep masks and label ids are synthetic: --requests rows of
+--candidates candidates each, with duplicate labels (about one in
+--dup_every candidates repeats an earlier label) and ~20% of candidates
+filtered out. The Python variant builds a dict per candidate and dedups by
+normalized label like the previous inference._topk(); both produce the
+top --k candidate columns per row.
+
+Usage:
+    python ranking.py --requests 64 --candidates 50 --k 10
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from inference import rank_rows
+
+def python_rank(scores, keep, labels, k):
+    out = []
+    for row_scores, row_keep, row_labels in zip(scores.tolist(), keep.tolist(), labels):
+        results = [{"col": c, "label": label, "priority_score": s}
+                   for c, (s, kept, label) in enumerate(zip(row_scores, row_keep, row_labels)) if kept]
+        seen, deduped = set(), []
+        for item in results:
+            key = item["label"].strip().lower()
+            if key not in seen:
+                seen.add(key)
+                deduped.append(item)
+        out.append([it["col"] for it in sorted(deduped, key=lambda x: x["priority_score"], reverse=True)[:k]])
+    return out
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized ranking stage")
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dup_every", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    shape = (args.requests, args.candidates)
+    scores = rng.random(shape)
+    keep = rng.random(shape) < 0.8
+    label_ids = rng.integers(0, args.candidates * args.requests, size=shape)
+    dup = rng.random(shape) < 1 / args.dup_every
+    label_ids[:, 1:][dup[:, 1:]] = label_ids[:, :1].repeat(args.candidates - 1, axis=1)[dup[:, 1:]]
+    labels = [[f"Item {i} " for i in row] for row in label_ids.tolist()]
+
+    py = timed(lambda: python_rank(scores, keep, labels, args.k), args.repeat)
+    vec = timed(lambda: rank_rows(scores, keep, label_ids, args.k), args.repeat)
+    print(f"{args.requests} requests x {args.candidates} candidates, top {args.k}: "
+          f"python {py * 1e3:.3f} ms, rank_rows {vec * 1e3:.3f} ms ({py / vec:.1f}x)")
+
+if __name__ == "__main__":
+    main()
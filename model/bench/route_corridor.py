@@ -0,0 +1,70 @@
+"""
+route_corridor.py
+Source -> destination backbone path: networkx shortest path per request vs
+the precomputed next-hop table (city_routes.py).
+
+The backbone is kg_build.CITY_SEQUENCES plus city_routes.ROUTE_LINKS, which
+is what kg_build.py builds the table from. --scale copies it that many
+times and joins each copy to the next one, to show the cost as the
+backbone grows. Queries are random city pairs.
+
+Usage:
+    python route_corridor.py --scale 1 4 8 --queries 2000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import networkx as nx
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from city_routes import ROUTE_LINKS, CityRoutes, build_city_routes
+from kg_build import CITY_SEQUENCES
+
+def backbone_edges(scale):
+    def name(city, copy):
+        return f"{city} {copy}" if copy else city
+
+    edges = []
+    for copy in range(scale):
+        for cities in CITY_SEQUENCES.values():
+            edges += [(name(a, copy), name(b, copy)) for a, b in zip(cities, cities[1:])]
+        edges += [(name(a, copy), name(b, copy)) for a, b in ROUTE_LINKS]
+        if copy:
+            edges.append((name("Parassala", copy - 1), name("Panniyannur", copy)))
+    return edges
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark backbone path lookup")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    for scale in args.scale:
+        edges = backbone_edges(scale)
+        G = nx.Graph(edges)
+        t0 = time.perf_counter()
+        routes = CityRoutes(build_city_routes(edges, links=()))
+        build_secs = time.perf_counter() - t0
+        pairs = [tuple(rng.sample(routes.cities, 2)) for _ in range(args.queries)]
+
+        t0 = time.perf_counter()
+        bfs = [len(nx.shortest_path(G, s, d)) for s, d in pairs]
+        bfs_us = (time.perf_counter() - t0) / len(pairs) * 1e6
+        t0 = time.perf_counter()
+        table = [len(routes.path(s, d)) for s, d in pairs]
+        table_us = (time.perf_counter() - t0) / len(pairs) * 1e6
+        assert bfs == table, "path lengths differ"
+        mb = (routes.hops.nbytes + routes.next_hop.nbytes) / 1e6
+        print(f"cities={len(routes):>5}  build {build_secs:6.2f}s ({mb:.1f} MB)  "
+              f"networkx {bfs_us:8.1f} us/path  table {table_us:6.1f} us/path "
+              f"(mean {sum(table) / len(table):.1f} cities)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+search_backends.py
+Recall@k and latency of the search_backends.py backends.
+
+Vectors are synthetic (clustered, row-normalized, --dim wide) or a saved
+combined_item_embeddings.npy (--vectors). Queries only fill the first
+--content_dim dimensions, like inference.encode_queries() (node2vec + CF
+parts are zero). Ground truth is the exact backend; for each catalog size
+the benchmark reports build time, resident bytes, recall@k and latency
+per batch of --batch queries and per single query.
+
+Usage:
+    python search_backends.py --items 10000 50000 200000 --k 50
+    python search_backends.py --vectors ../artifacts/combined_item_embeddings.npy
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from ann_index import build_hnsw_index
+from search_backends import ExactBackend, HNSWBackend, QuantizedBackend, select_backend
+
+def synthetic_vectors(n, dim, seed=42):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(16, n // 500), dim)).astype(np.float32)
+    x = centers[rng.integers(0, len(centers), size=n)] + 0.8 * rng.normal(size=(n, dim)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def queries_like(vectors, n, content_dim, seed=0):
+    rng = np.random.default_rng(seed)
+    q = vectors[rng.integers(0, len(vectors), size=n)].copy()
+    q += 0.5 * rng.normal(size=q.shape).astype(np.float32) / np.sqrt(q.shape[1])
+    q[:, content_dim:] = 0
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+def latency(backend, queries, k, batch, repeat):
+    """(seconds per batch, seconds per single query), best of `repeat`."""
+    best_batch = best_single = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        backend.search(queries[:batch], k)
+        best_batch = min(best_batch, time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        for q in queries[:8]:
+            backend.search(q[None], k)
+        best_single = min(best_single, (time.perf_counter() - t0) / 8)
+    return best_batch, best_single
+
+def recall(found, truth):
+    return np.mean([len(np.intersect1d(f, t)) / len(t) for f, t in zip(found, truth)])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact / quantized / HNSW search")
+    parser.add_argument("--items", type=int, nargs="+", default=[10000, 50000, 200000])
+    parser.add_argument("--vectors", default=None, help="Saved (n, dim) float32 .npy instead of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=576)
+    parser.add_argument("--content_dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--hnsw_max", type=int, default=200000, help="Skip HNSW builds above this many items")
+    args = parser.parse_args()
+
+    sizes = [None] if args.vectors else args.items
+    for n in sizes:
+        vectors = np.load(args.vectors, mmap_mode="r") if args.vectors else synthetic_vectors(n, args.dim)
+        n = len(vectors)
+        queries = queries_like(np.asarray(vectors[:min(n, 100000)]), args.queries, args.content_dim)
+        exact = ExactBackend(vectors)
+        truth, _ = exact.search(queries, args.k)
+        print(f"--- items={n} dim={vectors.shape[1]} k={args.k} (auto: {select_backend(n)}) ---")
+
+        builders = {"exact": lambda: exact,
+                    "int8": lambda: QuantizedBackend(vectors, dtype="int8"),
+                    "float16": lambda: QuantizedBackend(vectors, dtype="float16")}
+        if n <= args.hnsw_max:
+            builders["hnsw"] = lambda: HNSWBackend(build_hnsw_index(np.asarray(vectors), np.arange(n)))
+        for name, build in builders.items():
+            t0 = time.perf_counter()
+            backend = build()
+            build_secs = time.perf_counter() - t0
+            if name == "exact":
+                size = vectors.nbytes
+            elif name == "hnsw":
+                size = n * (vectors.shape[1] * 4 + 2 * 32 * 4)  # vectors + level-0 links (M=32)
+            else:
+                size = backend.codes.nbytes + (0 if backend.scales is None else backend.scales.nbytes)
+            found, _ = backend.search(queries, args.k)
+            batch_secs, single_secs = latency(backend, queries, args.k, args.batch, args.repeat)
+            print(f"{name:>8}: build {build_secs:7.2f}s  resident {size / 2**20:8.1f} MiB  "
+                  f"recall@{args.k} {recall(found, truth):.4f}  "
+                  f"batch x{args.batch} {batch_secs * 1e3:8.2f} ms  single {single_secs * 1e3:7.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+startup.py
+Measures inference start-up cost.
+
+- Process start: wall time of `python -c "import inference"` in a fresh
+  interpreter (median over --repeat runs).
+- Artifact load: time spent loading each artifact when the engine is warmed.
+
+Usage:
+    python startup.py --repeat 5
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+def time_import(repeat):
+    """Median wall time (seconds) of importing inference in a new process."""
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import inference"], cwd=SRC_DIR, check=True)
+        timings.append(time.perf_counter() - t0)
+    return statistics.median(timings)
+
+def time_artifacts(art_dir=None):
+    """Per-artifact load times (seconds) for a fresh engine."""
+    import inference
+
+    engine = inference.Recommender(art_dir or inference.ART_DIR)
+    engine.warm()
+    return engine.load_times
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference start-up")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--art_dir", type=str, default=None)
+    parser.add_argument("--skip_artifacts", action="store_true", help="Only time the import")
+    args = parser.parse_args()
+
+    import_s = time_import(args.repeat)
+    print(f"\nProcess start (import inference): {import_s * 1000:.1f} ms (median of {args.repeat})")
+
+    if args.skip_artifacts:
+        return
+    load_times = time_artifacts(args.art_dir)
+    print("\nArtifact load times:")
+    for name, secs in load_times.items():
+        print(f" - {name:<14} {secs * 1000:9.1f} ms")
+    print(f" = {'total':<14} {sum(load_times.values()) * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    main()
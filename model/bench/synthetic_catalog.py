@@ -0,0 +1,123 @@
+"""
+synthetic_catalog.py
+Synthetic items.csv / events.csv / food.csv at production scale.
+
+Same columns and value styles as data/*.csv: places in real backbone cities
+(kg_build.CITY_SEQUENCES) plus generated towns, with lat/lon inside Kerala,
+a type mix taken from items.csv, events with date ranges and food with
+cuisine / course / diet. Row counts are split by --event_frac and
+--food_frac; the number of cities grows with the catalog. The output only
+depends on (rows, seed), so a catalog can be regenerated identically on any
+commit.
+
+Usage:
+    python synthetic_catalog.py --rows 100000 --out /tmp/catalog_100k
+"""
+
+import os
+import sys
+import csv
+import argparse
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from kg_build import CITY_SEQUENCES
+
+# Type mix of data/items.csv (most common types)
+PLACE_TYPES = {"hotel": 0.52, "guest_house": 0.16, "attraction": 0.07, "apartment": 0.04, "information": 0.04,
+               "motel": 0.04, "artwork": 0.03, "aquarium": 0.02, "museum": 0.02, "camp_site": 0.02,
+               "viewpoint": 0.02, "chalet": 0.01, "gallery": 0.01}
+COURSES = ["Lunch/Dinner", "Dinner", "Lunch", "Snack/Evening", "Dessert", "Breakfast"]
+DIETS = ["Non-veg", "Vegetarian", "Both", "Veg"]
+DIET_P = [0.69, 0.21, 0.05, 0.05]
+EVENT_KINDS = ["Utsavam", "Festival", "Aarattu Mahotsavam", "Vela", "Pooram", "Theyyam", "Perunnal", "Fest"]
+NAME_PARTS = ["Sea", "Palm", "Green", "Lake", "Hill", "Spice", "River", "Coconut", "Sunset", "Royal",
+              "Heritage", "Backwater", "Lotus", "Temple", "Harbour", "Garden"]
+DISHES = ["Biryani", "Appam", "Puttu", "Fish Curry", "Sadya", "Payasam", "Pathiri", "Halwa", "Idiyappam", "Avial"]
+DESC_WORDS = ["quiet", "family", "rooms", "view", "near", "beach", "traditional", "local", "famous", "spicy",
+              "river", "old", "market", "sunset", "walk", "cuisine", "stay", "garden", "culture", "boat"]
+
+# Kerala bounding box
+LAT_RANGE = (8.2, 12.8)
+LON_RANGE = (74.8, 77.4)
+
+def _cities(n, rng):
+    """(names, lat, lon): the backbone cities first, then generated towns."""
+    names = [c for seq in CITY_SEQUENCES.values() for c in seq]
+    names = list(dict.fromkeys(names))
+    names += [f"{rng.choice(NAME_PARTS)}town {i}" for i in range(max(0, n - len(names)))]
+    lat = rng.uniform(*LAT_RANGE, size=len(names))
+    lon = rng.uniform(*LON_RANGE, size=len(names))
+    return names, lat, lon
+
+def _descriptions(n, rng, frac):
+    has = rng.random(n) < frac
+    lengths = rng.integers(4, 16, size=n)
+    words = np.array(DESC_WORDS)
+    return [" ".join(words[rng.integers(0, len(words), size=k)]).capitalize() if h else ""
+            for h, k in zip(has.tolist(), lengths.tolist())]
+
+def write_synthetic_catalog(out_dir, rows, seed=42, event_frac=0.165, food_frac=0.01, description_frac=0.3):
+    """Write items.csv, events.csv and food.csv (rows in total) to out_dir; returns the row counts."""
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    n_events = int(rows * event_frac)
+    n_food = int(rows * food_frac)
+    n_places = rows - n_events - n_food
+    names, city_lat, city_lon = _cities(max(60, rows // 200), rng)
+
+    # Places cluster around their city (a few km of jitter)
+    city = rng.integers(0, len(names), size=n_places)
+    lat = city_lat[city] + rng.normal(0, 0.03, size=n_places)
+    lon = city_lon[city] + rng.normal(0, 0.03, size=n_places)
+    types = rng.choice(list(PLACE_TYPES), size=n_places, p=np.array(list(PLACE_TYPES.values())) / sum(PLACE_TYPES.values()))
+    parts = rng.integers(0, len(NAME_PARTS), size=n_places)
+    descs = _descriptions(n_places, rng, description_frac)
+    with open(os.path.join(out_dir, "items.csv"), "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f)
+        w.writerow(["City", "Name", "Type", "Latitude", "Longitude", "Description"])
+        w.writerows((names[c], f"{NAME_PARTS[p]} {t.replace('_', ' ').title()} {i}", t, f"{la:.6f}", f"{lo:.6f}", d)
+                    for i, (c, p, t, la, lo, d) in enumerate(zip(city.tolist(), parts.tolist(), types.tolist(),
+                                                                 lat.tolist(), lon.tolist(), descs)))
+
+    city = rng.integers(0, len(names), size=n_events)
+    kinds = rng.integers(0, len(EVENT_KINDS), size=n_events)
+    start = np.datetime64("2025-01-01") + rng.integers(0, 365, size=n_events)
+    end = start + rng.integers(0, 15, size=n_events)
+    with open(os.path.join(out_dir, "events.csv"), "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["Festival Name", "City", "Location", "Start Date", "End Date"])
+        w.writerows((f"{names[c]} {EVENT_KINDS[k]} {i}", names[c], "N/A" if i % 3 else f"{names[c]} Temple",
+                     str(s), str(e))
+                    for i, (c, k, s, e) in enumerate(zip(city.tolist(), kinds.tolist(), start, end)))
+
+    city = rng.integers(0, len(names), size=n_food)
+    dishes = rng.integers(0, len(DISHES), size=n_food)
+    courses = rng.integers(0, len(COURSES), size=n_food)
+    diets = rng.choice(len(DIETS), size=n_food, p=DIET_P)
+    lat = city_lat[city] + rng.normal(0, 0.01, size=n_food)
+    lon = city_lon[city] + rng.normal(0, 0.01, size=n_food)
+    descs = _descriptions(n_food, rng, 1.0)
+    with open(os.path.join(out_dir, "food.csv"), "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["No", "Name", "Description", "Cuisine", "Course", "Diet", "Image_link", "Latitude", "Longitude"])
+        w.writerows((i + 1, f"{names[c]} {DISHES[d]}", desc, names[c], COURSES[co], DIETS[di],
+                     f"https://example.com/food/{i + 1}", f"{la:.4f}", f"{lo:.4f}")
+                    for i, (c, d, co, di, la, lo, desc) in enumerate(zip(city.tolist(), dishes.tolist(), courses.tolist(),
+                                                                         diets.tolist(), lat.tolist(), lon.tolist(), descs)))
+    return {"places": n_places, "events": n_events, "food": n_food, "cities": len(names)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic items/events/food catalog")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    counts = write_synthetic_catalog(args.out, args.rows, seed=args.seed)
+    print(f"Wrote {args.out}: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+
+if __name__ == "__main__":
+    main()
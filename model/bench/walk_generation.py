@@ -0,0 +1,110 @@
+"""
+walk_generation.py
+node2vec walk generation: the `node2vec` package (if installed) vs the
+native CSR walker (src/walks.py).
+
+Runs on the trained KG (artifacts/kg_csr) or on a synthetic random graph
+(--nodes/--degree) to look at graphs with millions of edges. Reports wall
+time, walks/s and peak Python heap (tracemalloc, which also tracks NumPy
+buffers; measured in a second, untimed run). Only walk generation is
+timed, not Word2Vec.
+
+Usage:
+    python walk_generation.py --p 0.5 --q 2 --workers 1 4
+    python walk_generation.py --nodes 1000000 --degree 4 --num_walks 2 --workers 1 4 --skip_package
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from kg_csr import KG_CSR_DIR, KGGraph, write_csr
+from walks import generate_walks
+
+def synthetic_graph(path, n_nodes, degree, seed):
+    rng = np.random.default_rng(seed)
+    src = np.repeat(np.arange(n_nodes), degree)
+    dst = rng.integers(0, n_nodes, size=src.size)
+    keep = src != dst
+    write_csr(path, [f"n:{i}" for i in range(n_nodes)], [str(i) for i in range(n_nodes)],
+              np.zeros(n_nodes), ["node"], src[keep], dst[keep], np.zeros(int(keep.sum())), ["edge"])
+
+def to_networkx(kg):
+    import networkx as nx
+    G = nx.DiGraph()
+    ids = kg.node_ids()
+    G.add_nodes_from(ids)
+    src = np.repeat(np.arange(kg.n_nodes), np.diff(kg.indptr))
+    G.add_edges_from((ids[u], ids[v]) for u, v in zip(src.tolist(), np.asarray(kg.indices).tolist()))
+    return G
+
+def measure(fn):
+    """(result, seconds, peak traced bytes); timed without tracemalloc, which slows Python down."""
+    t0 = time.perf_counter()
+    n = fn()
+    secs = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return n, secs, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark node2vec walk generation")
+    parser.add_argument("--nodes", type=int, default=0, help="Synthetic graph size (0 = use the KG)")
+    parser.add_argument("--degree", type=int, default=4)
+    parser.add_argument("--num_walks", type=int, default=10)
+    parser.add_argument("--walk_length", type=int, default=80)
+    parser.add_argument("--p", type=float, default=1.0)
+    parser.add_argument("--q", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--skip_package", action="store_true", help="Don't run the node2vec package")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmp = None
+    graph_dir = KG_CSR_DIR
+    if args.nodes:
+        tmp = tempfile.mkdtemp(prefix="walks_bench_")
+        graph_dir = os.path.join(tmp, "graph")
+        synthetic_graph(graph_dir, args.nodes, args.degree, args.seed)
+    try:
+        kg = KGGraph(graph_dir)
+        print(f"Graph: {kg.n_nodes} nodes, {kg.n_edges} edges | p={args.p} q={args.q} "
+              f"walks/node={args.num_walks} length={args.walk_length}")
+        print(f"\n{'engine':<16} {'seconds':>9} {'walks/s':>10} {'peak heap':>10}")
+
+        if not args.skip_package:
+            try:
+                from node2vec import Node2Vec
+            except ImportError:
+                print(f"{'node2vec pkg':<16} (not installed)")
+            else:
+                G = to_networkx(kg)
+                for workers in args.workers:
+                    run = lambda: len(Node2Vec(G, walk_length=args.walk_length, num_walks=args.num_walks,
+                                               p=args.p, q=args.q, workers=workers, quiet=True).walks)
+                    n, secs, peak = measure(run)
+                    print(f"{'node2vec pkg x' + str(workers):<16} {secs:9.2f} {n / secs:10.0f} {peak / 2**20:8.1f}MB")
+
+        for workers in args.workers:
+            run = lambda: sum(len(b) for b in generate_walks(graph_dir, num_walks=args.num_walks,
+                                                             walk_length=args.walk_length, p=args.p, q=args.q,
+                                                             workers=workers, seed=args.seed))
+            n, secs, peak = measure(run)
+            print(f"{'native x' + str(workers):<16} {secs:9.2f} {n / secs:10.0f} {peak / 2**20:8.1f}MB")
+    finally:
+        if tmp:
+            shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    main()
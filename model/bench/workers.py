@@ -0,0 +1,86 @@
+"""
+workers.py
+Per-worker memory and aggregate throughput of the pre-fork server.
+
+For each worker count the script starts `server.py --workers N`, waits for
+/health, drives it with loadgen, then reads /proc/<pid>/smaps_rollup of
+every worker. RSS counts shared pages in full; PSS splits them between the
+processes sharing them, so sum(PSS) is the real footprint.
+
+Usage:
+    python workers.py --workers 1 2 4 8 --requests 4000 --concurrency 64
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, BENCH_DIR)
+
+import loadgen
+
+def smaps_mb(pid):
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                out[parts[0][:-1]] = int(parts[1]) / 1024
+    out["Private"] = out.pop("Private_Clean", 0) + out.pop("Private_Dirty", 0)
+    return out
+
+def worker_pids(parent):
+    with open(f"/proc/{parent}/task/{parent}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+def wait_healthy(url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f"server at {url} did not become healthy in {timeout}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pre-fork workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--threads", type=int, default=1, help="Threads per worker")
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--distinct", type=int, default=4000)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'RSS/worker':>11} {'PSS/worker':>11} {'private/worker':>15} {'sum PSS':>9}")
+    for n in args.workers:
+        url = f"http://127.0.0.1:{args.port}"
+        cmd = [sys.executable, "server.py", "--port", str(args.port), "--threads", str(args.threads),
+               "--workers", str(n)]
+        proc = subprocess.Popen(cmd, cwd=SRC_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_healthy(url, args.timeout)
+            secs, lat, errors = asyncio.run(loadgen.run(url, args.concurrency, args.requests, args.distinct))
+            pids = worker_pids(proc.pid) if n > 1 else [proc.pid]
+            mem = [smaps_mb(pid) for pid in pids]
+            avg = lambda key: sum(m[key] for m in mem) / len(mem)
+            total_pss = sum(m["Pss"] for m in mem) + (smaps_mb(proc.pid)["Pss"] if n > 1 else 0)
+            print(f"{n:>7} {len(lat) / secs:9.1f} {loadgen.np.percentile(lat, 50):8.2f} "
+                  f"{loadgen.np.percentile(lat, 99):8.2f} {avg('Rss'):9.1f}MB {avg('Pss'):9.1f}MB "
+                  f"{avg('Private'):13.1f}MB {total_pss:7.1f}MB" + (f"  errors={errors}" if errors else ""))
+        finally:
+            proc.terminate()
+            proc.wait()
+            time.sleep(0.5)
+
+if __name__ == "__main__":
+    main()
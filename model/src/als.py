@@ -0,0 +1,116 @@
+"""
+als.py
+Implicit-feedback ALS (Hu, Koren & Volinsky 2008) for the collaborative item
+factors; an alternative to TruncatedSVD in train.py (--factorizer als).
+
+Interactions r_ui become confidences c_ui = 1 + alpha * r_ui on the binary
+preference p_ui = 1. Each half-step solves, for every row u with the other
+side's factors Y fixed,
+
+    (Y^T Y + Y_u^T (C_u - I) Y_u + reg * I) x_u = Y_u^T C_u p_u
+
+Rows are sorted by their interaction count and solved in blocks: the block's
+Y_u are gathered into one zero-padded (rows, max_count, k) array and the
+system is solved with a few conjugate-gradient steps, warm-started from the
+previous iteration (Takacs et al. 2011). CG only needs products with
+Y_u and Y_u^T, which are batched matmuls, so no k x k matrix is formed per
+row; an exact batched np.linalg.solve is kept as an option (cg_steps=0).
+Blocks run in a thread pool; NumPy releases the GIL inside BLAS.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ALS_ITERATIONS = 15
+ALS_REGULARIZATION = 0.01
+ALS_ALPHA = 40.0
+CG_STEPS = 3              # conjugate-gradient steps per solve (0 = exact solve)
+BLOCK_ROWS = 1024         # rows solved together
+BLOCK_ENTRIES = 1 << 18   # cap on rows * max_count per block (bounds the padded gather)
+
+def _blocks(lengths):
+    """Row blocks (arrays of row ids) in order of increasing interaction count."""
+    order = np.argsort(lengths, kind="stable")
+    n = order.size
+    blocks = []
+    lo = 0
+    while lo < n:
+        widest = max(int(lengths[order[min(lo + BLOCK_ROWS, n) - 1]]), 1)
+        hi = min(n, lo + max(1, min(BLOCK_ROWS, BLOCK_ENTRIES // widest)))
+        blocks.append(order[lo:hi])
+        lo = hi
+    return blocks
+
+def _solve_block(rows, indptr, indices, data, Y, X, gram, alpha, cg_steps):
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    width = max(int(lengths.max()), 1)
+    slots = np.arange(width)
+    valid = slots < lengths[:, None]
+    pos = np.where(valid, starts[:, None] + slots, 0)
+    Yu = Y[indices[pos]]                                       # (B, L, k)
+    conf = np.where(valid, alpha * data[pos], 0.0).astype(Y.dtype)
+    b = np.matmul(((1 + conf) * valid)[:, None, :], Yu)[:, 0]  # (B, k)
+
+    if not cg_steps:
+        A = gram + np.matmul((Yu * conf[:, :, None]).transpose(0, 2, 1), Yu)
+        return rows, np.linalg.solve(A, b[:, :, None])[:, :, 0]
+
+    def apply_A(v):
+        # (Y^T Y + reg I) v + Y_u^T (C_u - I) Y_u v, without forming the k x k matrices
+        Yv = np.matmul(Yu, v[:, :, None])[:, :, 0] * conf
+        return v @ gram + np.matmul(Yv[:, None, :], Yu)[:, 0]
+
+    # Conjugate gradient, warm-started from the previous iteration's factors
+    x = X[rows]
+    r = b - apply_A(x)
+    p = r.copy()
+    rs = np.einsum("bk,bk->b", r, r)
+    for _ in range(cg_steps):
+        Ap = apply_A(p)
+        pAp = np.einsum("bk,bk->b", p, Ap)
+        step = np.divide(rs, pAp, out=np.zeros_like(rs), where=pAp > 0)
+        x += step[:, None] * p
+        r -= step[:, None] * Ap
+        rs_new = np.einsum("bk,bk->b", r, r)
+        beta = np.divide(rs_new, rs, out=np.zeros_like(rs), where=rs > 0)
+        p = r + beta[:, None] * p
+        rs = rs_new
+    return rows, x
+
+def _half_step(mat, Y, X, reg, alpha, cg_steps, pool):
+    """Factors of every row of `mat` (CSR) with the column factors Y fixed; X is the previous estimate."""
+    k = Y.shape[1]
+    gram = Y.T @ Y + reg * np.eye(k, dtype=Y.dtype)
+    indptr, indices, data = mat.indptr, mat.indices, mat.data
+    out = np.zeros_like(X)
+    jobs = [pool.submit(_solve_block, rows, indptr, indices, data, Y, X, gram, alpha, cg_steps)
+            for rows in _blocks(np.diff(indptr))]
+    for job in jobs:
+        rows, x = job.result()
+        out[rows] = x
+    return out
+
+def implicit_als(interactions, factors=64, iterations=ALS_ITERATIONS, regularization=ALS_REGULARIZATION,
+                 alpha=ALS_ALPHA, cg_steps=CG_STEPS, workers=None, seed=42, verbose=True):
+    """Factorize a (users x items) CSR of implicit feedback.
+
+    cg_steps=0 solves the normal equations exactly (np.linalg.solve per
+    block) instead of with conjugate gradient. Returns (user_factors,
+    item_factors) as float32 arrays.
+    """
+    user_items = interactions.tocsr().astype(np.float32)
+    item_users = user_items.T.tocsr()
+    rng = np.random.default_rng(seed)
+    items = (rng.standard_normal((user_items.shape[1], factors)) * 0.01).astype(np.float32)
+    users = np.zeros((user_items.shape[0], factors), dtype=np.float32)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        for it in range(iterations):
+            users = _half_step(user_items, items, users, regularization, alpha, cg_steps, pool)
+            items = _half_step(item_users, users, items, regularization, alpha, cg_steps, pool)
+            if verbose:
+                print(f"  ALS iteration {it + 1}/{iterations}")
+    return users, items
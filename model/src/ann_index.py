@@ -0,0 +1,140 @@
+"""
+ann_index.py
+HNSW index build / in-place update with labels that are stable across training runs.
+
+Index labels used to be item positions, so any catalog change shifted every
+label and forced a full rebuild. Each item now gets a label id that is kept
+for as long as the item exists (keyed by qid, see item_keys), and
+artifacts/item_labels.npz maps item positions <-> labels. With that, a run
+can load the previous index and apply only the diff:
+
+- removed items    -> mark_deleted (their slots are reused by new items)
+- new items        -> add_items(replace_deleted=True)
+- changed vectors  -> add_items on the existing label (updated in place)
+
+item_labels.npz:
+---------
+keys        item key per position (qid, with "#n" for its n-th repeat)
+labels      int64 label per position
+buckets     int8 output bucket per position (for the per-bucket sub-indexes)
+next_label  first never-used label
+dim         vector dimension the indexes were built with
+"""
+
+import os
+
+import numpy as np
+import hnswlib
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+ITEM_LABELS = os.path.join(ART_DIR, "item_labels.npz")
+
+# HNSW params
+HNSW_SPACE = "cosine"  # nearest neighbors by cosine similarity
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 50
+
+# Stored vectors that differ by more than this (max abs) are re-added
+CHANGE_TOL = 1e-5
+COMPARE_CHUNK = 65536
+
+# === Stable labels ===
+def item_keys(qids):
+    """Unique key per item: its qid, suffixed "#n" for the n-th repeat of a qid."""
+    seen = {}
+    keys = []
+    for qid in qids:
+        n = seen.get(qid, 0)
+        seen[qid] = n + 1
+        keys.append(qid if n == 0 else f"{qid}#{n}")
+    return keys
+
+def assign_labels(keys, prev=None):
+    """Labels for `keys`, reusing the previous run's label of every known key.
+
+    Returns (labels, next_label); new keys get fresh labels from next_label.
+    """
+    known = {} if prev is None else dict(zip(prev["keys"].tolist(), prev["labels"].tolist()))
+    next_label = 0 if prev is None else int(prev["next_label"])
+    labels = np.empty(len(keys), dtype=np.int64)
+    for i, key in enumerate(keys):
+        label = known.get(key)
+        if label is None:
+            label, next_label = next_label, next_label + 1
+        labels[i] = label
+    return labels, next_label
+
+def save_labels(path, keys, labels, buckets, next_label, dim):
+    np.savez(path, keys=np.array(keys), labels=labels, buckets=np.asarray(buckets, dtype=np.int8),
+             next_label=np.int64(next_label), dim=np.int64(dim))
+
+def load_labels(path=ITEM_LABELS):
+    """Previous run's label map as a dict of arrays, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as z:
+        return {name: z[name] for name in z.files}
+
+def label_positions(labels):
+    """Inverse of a label array: positions[label] = item position (-1 = no item)."""
+    labels = np.asarray(labels, dtype=np.int64)
+    positions = np.full(int(labels.max()) + 1 if labels.size else 0, -1, dtype=np.int64)
+    positions[labels] = np.arange(labels.size)
+    return positions
+
+# === Build / update ===
+def build_hnsw_index(vectors, labels):
+    p = hnswlib.Index(space=HNSW_SPACE, dim=vectors.shape[1])
+    p.init_index(max_elements=len(labels), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M,
+                 allow_replace_deleted=True)
+    p.set_ef(HNSW_EF_SEARCH)
+    # If using "cosine" space we should ensure vectors are normalized (they are)
+    p.add_items(vectors, labels)
+    return p
+
+def _changed(index, labels, vectors):
+    """Mask of `labels` whose vector in `index` differs from `vectors` (rows aligned)."""
+    out = np.zeros(len(labels), dtype=bool)
+    for lo in range(0, len(labels), COMPARE_CHUNK):
+        hi = lo + COMPARE_CHUNK
+        stored = np.asarray(index.get_items(labels[lo:hi], return_type="numpy"), dtype=np.float32)
+        # cosine space stores normalized vectors
+        current = vectors[lo:hi] / np.maximum(np.linalg.norm(vectors[lo:hi], axis=1, keepdims=True), 1e-12)
+        out[lo:hi] = np.abs(stored - current).max(axis=1) > CHANGE_TOL
+    return out
+
+def update_hnsw_index(path, vectors, labels, prev_labels, num_threads=-1):
+    """Load the index at `path` (holding `prev_labels`) and bring it in line with (labels, vectors).
+
+    Returns (index, stats) where stats counts added / updated / deleted / unchanged items.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    prev_labels = np.asarray(prev_labels, dtype=np.int64)
+    index = hnswlib.Index(space=HNSW_SPACE, dim=vectors.shape[1])
+    index.load_index(path, allow_replace_deleted=True)
+    index.set_ef(HNSW_EF_SEARCH)
+
+    is_new = ~np.isin(labels, prev_labels)
+    removed = np.setdiff1d(prev_labels, labels)
+    kept = np.flatnonzero(~is_new)
+    changed = kept[_changed(index, labels[kept], vectors[kept])]
+    new = np.flatnonzero(is_new)
+
+    for label in removed:
+        index.mark_deleted(int(label))
+    # New items fill deleted slots first; grow only by what is left over
+    needed = index.get_current_count() + max(0, new.size - removed.size)
+    if needed > index.get_max_elements():
+        index.resize_index(needed)
+    if changed.size:
+        index.add_items(vectors[changed], labels[changed], num_threads=num_threads)
+    if new.size:
+        index.add_items(vectors[new], labels[new], num_threads=num_threads, replace_deleted=True)
+
+    stats = {"added": int(new.size), "updated": int(changed.size), "deleted": int(removed.size),
+             "unchanged": int(kept.size - changed.size)}
+    return index, stats
@@ -0,0 +1,214 @@
+"""
+artifact_versions.py
+Versioned artifact sets with an atomic "current" pointer.
+
+train.py writes every serving artifact into a fresh directory, then
+publishes it. A run never touches the files a server has loaded:
+
+    artifacts/versions/<version>/   one complete artifact set + manifest.json
+    artifacts/CURRENT               name of the published version (one line)
+
+publish() writes the manifest and then replaces CURRENT with os.replace().
+A reader sees either the old name or the new one, never a mix of files from
+two runs. Versions are named by creation time (UTC, down to the nanosecond,
+zero-padded), so their names sort oldest first.
+The newest KEEP_VERSIONS published versions are kept. Unpublished
+directories (a run in progress, or a crashed one) are never pruned.
+
+manifest.json:
+---------
+version         the directory name
+created         unix time of publish()
+n_items         item count of the set
+dims            {name: vector dim} of the embedding matrices
+hnsw_elements   {index file: element count}, deleted slots included
+files           {relative path: {"size", "sha256"}} of every file in the set
+
+Without CURRENT (artifact sets from before versioning) the flat files in
+artifacts/ are the one and only version.
+
+Tools that rebuild a single artifact (kg_distances.py, planner.py,
+city_index.py, city_routes.py) call derive_version(). They write into a new
+version hard-linked to the current one, then publish it. Hard-linked files
+are shared with the live version, so an output is first unlinked
+(fresh_path()) and then written as a new file.
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+MANIFEST_FILE = "manifest.json"
+
+KEEP_VERSIONS = 3
+HASH_CHUNK = 1 << 20
+
+def version_dir(root, name):
+    return os.path.join(root, VERSIONS_DIR, name)
+
+def create_version(root=ART_DIR):
+    """New empty version directory (unpublished); returns its path."""
+    ns = time.time_ns()
+    name = time.strftime("%Y%m%d-%H%M%S", time.gmtime(ns // 10**9)) + f".{ns % 10**9:09d}-{os.getpid()}"
+    path = version_dir(root, name)
+    os.makedirs(path)
+    return path
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _write_atomic(path, text):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def write_manifest(path, info):
+    """Hash every file under the version directory `path` and write its manifest.json."""
+    files = {}
+    for dirpath, _, filenames in os.walk(path):
+        for filename in sorted(filenames):
+            full = os.path.join(dirpath, filename)
+            rel = os.path.relpath(full, path)
+            if rel != MANIFEST_FILE:
+                files[rel] = {"size": os.path.getsize(full), "sha256": file_sha256(full)}
+    manifest = {"version": os.path.basename(os.path.normpath(path)), "created": time.time(),
+                **info, "files": dict(sorted(files.items()))}
+    _write_atomic(os.path.join(path, MANIFEST_FILE), json.dumps(manifest, indent=1))
+    return manifest
+
+def read_manifest(path):
+    """manifest.json of a version directory, or None if it has none."""
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def current_version(root=ART_DIR):
+    """Name of the published version, or None for a flat (unversioned) artifacts directory."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def current_dir(root=ART_DIR):
+    """Directory of the published artifact set: the current version, else `root` itself."""
+    name = current_version(root)
+    return version_dir(root, name) if name else root
+
+def relocate(path, directory, root=ART_DIR):
+    """`path` under artifacts/ moved to the same place under `directory` (e.g. a version)."""
+    return os.path.join(directory, os.path.relpath(path, root))
+
+def fresh_path(path):
+    """Unlink `path` (it may be hard-linked to a published version) so it can be written anew."""
+    if os.path.exists(path):
+        os.remove(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def derive_version(root=ART_DIR):
+    """New unpublished version with hard links to every file of the current one.
+
+    Returns (path, info), where info holds the current manifest fields to publish() again.
+    Returns (None, None) for a flat layout.
+    """
+    name = current_version(root)
+    if name is None:
+        return None, None
+    src = version_dir(root, name)
+    path = create_version(root)
+    for dirpath, _, filenames in os.walk(src):
+        out_dir = os.path.join(path, os.path.relpath(dirpath, src))
+        os.makedirs(out_dir, exist_ok=True)
+        for filename in filenames:
+            if filename == MANIFEST_FILE and dirpath == src:
+                continue
+            try:
+                os.link(os.path.join(dirpath, filename), os.path.join(out_dir, filename))
+            except OSError:
+                shutil.copy2(os.path.join(dirpath, filename), os.path.join(out_dir, filename))
+    manifest = read_manifest(src) or {}
+    info = {k: v for k, v in manifest.items() if k not in ("version", "created", "files")}
+    return path, info
+
+def publish_files(files, root=ART_DIR):
+    """Publish the current version with `files` ({path under artifacts/: source file}) replaced.
+
+    Returns the new manifest, or None for a flat layout (nothing to publish).
+    """
+    path, info = derive_version(root)
+    if path is None:
+        return None
+    for target, source in files.items():
+        shutil.copy2(source, fresh_path(relocate(target, path, root)))
+    return publish(path, info, root=root)
+
+def publish(path, info, root=ART_DIR, keep=KEEP_VERSIONS):
+    """Write the manifest of version directory `path`, point CURRENT at it and prune old versions."""
+    manifest = write_manifest(path, info)
+    _write_atomic(os.path.join(root, CURRENT_FILE), manifest["version"] + "\n")
+    prune(root, keep)
+    return manifest
+
+def prune(root=ART_DIR, keep=KEEP_VERSIONS):
+    """Delete all but the newest `keep` published versions (by name; never the current one)."""
+    base = os.path.join(root, VERSIONS_DIR)
+    current = current_version(root)
+    published = sorted(name for name in os.listdir(base)
+                       if os.path.exists(os.path.join(base, name, MANIFEST_FILE)))
+    for name in published[:-keep] if keep > 0 else published:
+        if name != current:
+            shutil.rmtree(os.path.join(base, name), ignore_errors=True)
+
+def verify(path, manifest, hashes=False):
+    """Problems (list of strings) with the files of a version against its manifest; [] if none."""
+    problems = []
+    for rel, expected in manifest.get("files", {}).items():
+        full = os.path.join(path, rel)
+        try:
+            size = os.path.getsize(full)
+        except OSError:
+            problems.append(f"{rel} is missing")
+            continue
+        if size != expected["size"]:
+            problems.append(f"{rel} has {size} bytes, manifest says {expected['size']}")
+        elif hashes and file_sha256(full) != expected["sha256"]:
+            problems.append(f"{rel} does not match its sha256")
+    return problems
+
+# === Run ===
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show or check the published artifact version")
+    parser.add_argument("--hashes", action="store_true", help="Also check the sha256 of every file")
+    args = parser.parse_args()
+
+    name = current_version(ART_DIR)
+    if name is None:
+        print(f"No published version in {ART_DIR} (flat layout)")
+    else:
+        path = version_dir(ART_DIR, name)
+        manifest = read_manifest(path)
+        problems = verify(path, manifest, hashes=args.hashes) if manifest else ["manifest.json is missing"]
+        print(f"Current version: {name} ({len((manifest or {}).get('files', {}))} files)")
+        for problem in problems:
+            print(" -", problem)
+        print("✅ OK" if not problems else f"❌ {len(problems)} problem(s)")
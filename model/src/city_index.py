@@ -0,0 +1,189 @@
+"""
+city_index.py
+Typo-tolerant resolution of request city names to KG city nodes.
+
+Built by kg_build.py over the KG city nodes only (artifacts/city_index.json):
+- exact    normalized name -> city (case, accents, punctuation and spacing ignored)
+- aliases  colonial / English names (Cochin -> Kochi, Calicut -> Kozhikode, ...)
+- grams    character trigram -> ids of the cities containing it
+
+resolve(name) tries, in order: the exact map (names and aliases); the
+cities sharing the most trigrams with the name, the closest one within
+MAX_EDITS (bounded Levenshtein) winning; and the shortest city whose name
+contains the query as whole words ("Kochi" -> "Fort Kochi"). Only the
+postings of the query's trigrams are read, so the cost depends on the
+number of cities, never on the catalog size.
+
+Usage (rebuild from the KG without rebuilding the KG):
+    python city_index.py
+"""
+
+import os
+import re
+import json
+import unicodedata
+
+import numpy as np
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+CITY_INDEX_OUT = os.path.join(ART_DIR, "city_index.json")
+
+# Alternative name -> city; kept only when the city is in the KG
+ALIASES = {
+    "Cochin": "Kochi", "Calicut": "Kozhikode", "Trivandrum": "Thiruvananthapuram",
+    "Alleppey": "Alappuzha", "Quilon": "Kollam", "Trichur": "Thrissur", "Cannanore": "Kannur",
+    "Palghat": "Palakkad", "Tellicherry": "Thalassery", "Badagara": "Vatakara",
+    "Kasargod": "Kasaragode", "Kasaragod": "Kasaragode", "Munnar Hills": "Munnar",
+}
+
+MAX_EDITS = 2            # edits allowed: one per 4 characters of the name, at most MAX_EDITS
+GRAM_CANDIDATES = 16     # cities ranked by shared trigrams that get an edit-distance check
+# Trailing words dropped from queries ("Thrissur, Kerala" -> "thrissur")
+NOISE_WORDS = ("kerala", "india", "district", "city", "town")
+
+def normalize(name):
+    """Lower-case ASCII words: "  Thiruvananthapuram,  " -> "thiruvananthapuram"."""
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode("ascii")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())
+
+def _strip_noise(norm):
+    words = norm.split()
+    while len(words) > 1 and words[-1] in NOISE_WORDS:
+        words.pop()
+    return " ".join(words)
+
+def trigrams(norm):
+    padded = f"  {norm} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b, bound):
+    """Levenshtein distance of a and b, or bound + 1 once it is known to exceed bound.
+
+    Only the diagonal band |i - j| <= bound of the DP table is filled.
+    """
+    big = bound + 1
+    if abs(len(a) - len(b)) > bound:
+        return big
+    prev = [j if j <= bound else big for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        lo, hi = max(1, i - bound), min(len(b), i + bound)
+        cur = [big] * (len(b) + 1)
+        if i <= bound:
+            cur[0] = i
+        ca = a[i - 1]
+        for j in range(lo, hi + 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != b[j - 1]))
+        if min(cur[lo - 1:hi + 1]) > bound:
+            return big
+        prev = cur
+    return min(prev[-1], big)
+
+def build_city_index(cities, aliases=ALIASES):
+    """JSON-able index over city names (KG node ids without the "city:" prefix)."""
+    cities = sorted(set(cities))
+    exact, grams = {}, {}
+    for i, city in enumerate(cities):
+        norm = normalize(city)
+        if not norm:
+            continue
+        exact.setdefault(norm, i)
+        for gram in trigrams(norm):
+            grams.setdefault(gram, []).append(i)
+    known = {city: i for i, city in enumerate(cities)}
+    # Aliases win over a city node of the same name (a stray "Calicut" node holding a few events)
+    for alias, city in aliases.items():
+        if city in known:
+            exact[normalize(alias)] = known[city]
+    return {"cities": cities, "exact": exact, "grams": grams}
+
+def save_city_index(path, index):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+
+class CityIndex:
+    """Read-only resolver over build_city_index() output."""
+
+    def __init__(self, index):
+        self.cities = index["cities"]
+        self.exact = index["exact"]
+        self.grams = {gram: np.asarray(rows, dtype=np.int32) for gram, rows in index["grams"].items()}
+        self._norms = [normalize(c) for c in self.cities]
+        self._lengths = np.array([len(n) for n in self._norms], dtype=np.int32)
+        self._memo = {}
+
+    @classmethod
+    def load(cls, path=CITY_INDEX_OUT):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_cities(cls, cities):
+        return cls(build_city_index(cities))
+
+    def __len__(self):
+        return len(self.cities)
+
+    def resolve(self, name):
+        """Canonical city name for `name`, or None if nothing is close enough."""
+        try:
+            return self._memo[name]
+        except KeyError:
+            pass
+        norm = normalize(name)
+        city = self._resolve(norm)
+        if city is None and _strip_noise(norm) != norm:
+            city = self._resolve(_strip_noise(norm))
+        if len(self._memo) < 65536:
+            self._memo[name] = city
+        return city
+
+    def _resolve(self, norm):
+        if not norm:
+            return None
+        row = self.exact.get(norm)
+        if row is not None:
+            return self.cities[row]
+
+        # Misspellings: best edit distance among the cities sharing most trigrams.
+        # One edit changes at most 3 trigrams (count filter) and the length by 1.
+        query_grams = trigrams(norm)
+        postings = [self.grams[g] for g in query_grams if g in self.grams]
+        if not postings:
+            return None
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.cities))
+        bound = min(MAX_EDITS, len(norm) // 4)
+        min_shared = max(1, len(query_grams) - 3 * bound)
+        close = np.flatnonzero((shared >= min_shared) & (np.abs(self._lengths - len(norm)) <= bound))
+        close = close[np.argsort(-shared[close], kind="stable")[:GRAM_CANDIDATES]]
+        best = None
+        for row in close.tolist():
+            dist = edit_distance(norm, self._norms[row], bound)
+            if dist <= bound and (best is None or dist < best[0]):
+                best = (dist, row)
+        if best is not None:
+            return self.cities[best[1]]
+
+        # Partial names: the shortest city containing the query as whole words
+        # (such a city has every query trigram but the leading "  x")
+        pattern = f" {norm} "
+        contains = [row for row in np.flatnonzero(shared >= len(query_grams) - 1).tolist()
+                    if pattern in f" {self._norms[row]} "]
+        if contains:
+            return self.cities[min(contains, key=lambda row: (len(self._norms[row]), row))]
+        return None
+
+# === Run ===
+if __name__ == "__main__":
+    from kg_csr import KG_CSR_DIR, KGGraph
+
+    kg = KGGraph.load(KG_CSR_DIR)
+    names = [kg.node_id(i)[len("city:"):] for i in kg.nodes_of_type("city")]
+    save_city_index(CITY_INDEX_OUT, build_city_index(names))
+    print(f"✅ City index saved: {CITY_INDEX_OUT} ({len(names)} cities)")
+    # train.py copies it into each version; publish it to the served one now
+    from artifact_versions import publish_files
+    if (manifest := publish_files({CITY_INDEX_OUT: CITY_INDEX_OUT}, root=ART_DIR)) is not None:
+        print(f"Published artifact version {manifest['version']}")
@@ -0,0 +1,123 @@
+"""
+city_routes.py
+All-pairs shortest paths between the backbone cities, for en-route stops.
+
+The backbone is the 'nearby' edges between consecutive cities of each
+district (kg_build.CITY_SEQUENCES), plus ROUTE_LINKS between neighbouring
+districts along the coastal highway. Without those links the districts
+are separate chains, and Kozhikode -> Kochi has no path. The links are used
+for routing only. They are not KG edges, so hop proximity and the graph
+embeddings are unchanged.
+
+The backbone has a few hundred cities at most, so the tables are dense
+int16 matrices. One BFS per city gives:
+
+    hops[s, d]      hop count s -> d (-1 = no path)
+    next_hop[s, d]  the city after s on a shortest s -> d path (-1 = none)
+
+A path is the column next_hop[:, d] walked from s, with no graph search
+per request.
+
+Output (artifacts/city_routes.npz):
+---------
+cities     backbone city names, one row/column each
+hops       int16 (n, n)
+next_hop   int16 (n, n)
+"""
+
+import os
+from collections import deque
+
+import numpy as np
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+CITY_ROUTES_OUT = os.path.join(ART_DIR, "city_routes.npz")
+
+# District-to-district road links (NH66, north to south). "Paravur" is two
+# towns, one in Ernakulam and one in Kollam, that share a single city node.
+# That shared node already joins those two districts.
+ROUTE_LINKS = (
+    ("Feroke", "Chavakkad"),       # Kozhikode -> Thrissur (via Malappuram)
+    ("Kodungallur", "Paravur"),    # Thrissur -> Ernakulam
+    ("Kundannoor", "Cherthala"),   # Ernakulam -> Alappuzha
+    ("Kayamkulam", "Oachira"),     # Alappuzha -> Kollam
+    ("Mayyanad", "Varkala"),       # Kollam -> Thiruvananthapuram
+)
+
+def build_city_routes(edges, links=ROUTE_LINKS):
+    """hops / next_hop matrices (see module docstring) of undirected city-name edges plus links."""
+    adjacency = {}
+    for a, b in list(edges) + list(links):
+        if a == b:
+            continue
+        adjacency.setdefault(a, set()).add(b)
+        adjacency.setdefault(b, set()).add(a)
+    cities = sorted(adjacency)
+    row = {c: i for i, c in enumerate(cities)}
+    neighbors = [sorted(row[b] for b in adjacency[c]) for c in cities]
+
+    n = len(cities)
+    hops = np.full((n, n), -1, dtype=np.int16)
+    next_hop = np.full((n, n), -1, dtype=np.int16)
+    # BFS out of each destination d: the city a node is reached from is its next hop towards d
+    for d in range(n):
+        hops[d, d] = 0
+        next_hop[d, d] = d
+        queue = deque([d])
+        while queue:
+            u = queue.popleft()
+            for v in neighbors[u]:
+                if hops[v, d] < 0:
+                    hops[v, d] = hops[u, d] + 1
+                    next_hop[v, d] = u
+                    queue.append(v)
+    return {"cities": np.array(cities), "hops": hops, "next_hop": next_hop}
+
+def save_city_routes(path, routes):
+    np.savez(path, **routes)
+
+class CityRoutes:
+    """Read-only route tables written by save_city_routes()."""
+
+    def __init__(self, routes):
+        self.cities = [str(c) for c in routes["cities"]]
+        self.hops = routes["hops"]
+        self.next_hop = routes["next_hop"]
+        self.city_rows = {c: i for i, c in enumerate(self.cities)}
+
+    @classmethod
+    def load(cls, path=CITY_ROUTES_OUT):
+        with np.load(path) as z:
+            return cls({name: z[name] for name in z.files})
+
+    def __len__(self):
+        return len(self.cities)
+
+    def path(self, source, destination):
+        """City names on a shortest source -> destination path (both ends included), [] if none."""
+        s, d = self.city_rows.get(source), self.city_rows.get(destination)
+        if s is None or d is None or self.hops[s, d] < 0:
+            return []
+        towards = self.next_hop[:, d].tolist()
+        rows = [s]
+        while rows[-1] != d:
+            rows.append(towards[rows[-1]])
+        return [self.cities[r] for r in rows]
+
+# === Run ===
+if __name__ == "__main__":
+    from kg_csr import KG_CSR_DIR, KGGraph
+
+    kg = KGGraph.load(KG_CSR_DIR)
+    edges = [(kg.node_id(c)[len("city:"):], kg.node_id(n)[len("city:"):])
+             for c in kg.nodes_of_type("city") for n in kg.neighbors(c, rel="nearby")]
+    routes = build_city_routes(edges)
+    save_city_routes(CITY_ROUTES_OUT, routes)
+    print(f"✅ City routes saved: {CITY_ROUTES_OUT} ({len(routes['cities'])} cities)")
+    # train.py copies it into each version; publish it to the served one now
+    from artifact_versions import publish_files
+    if (manifest := publish_files({CITY_ROUTES_OUT: CITY_ROUTES_OUT}, root=ART_DIR)) is not None:
+        print(f"Published artifact version {manifest['version']}")
@@ -0,0 +1,127 @@
+"""
+embedding_cache.py
+Persistent content-hash cache for sentence-transformer embeddings.
+
+Every text is keyed by hash(model name, label, description); train.py only
+encodes texts whose key is not in the cache yet, so a retrain after a small
+catalog diff re-encodes just the new or edited rows.
+
+Layout (artifacts/embedding_cache/):
+---------
+meta.json      {"dim": ..., "dtype": "float32"}
+keys.bin       16-byte blake2b digests, one per row, append-only
+vectors.f32    float32 rows (dim values each), append-only, read via mmap
+
+Rows are appended to vectors.f32 before their keys, so a crash between the
+two leaves unreferenced tail bytes, which are trimmed on the next open.
+One writer at a time (the training run); readers may share the files.
+"""
+
+import os
+import json
+import hashlib
+
+import numpy as np
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+EMBED_CACHE_DIR = os.path.join(ART_DIR, "embedding_cache")
+
+KEY_BYTES = 16
+
+def text_key(model_name, label, description):
+    """Cache key of one (label, description) pair encoded with `model_name`."""
+    h = hashlib.blake2b(digest_size=KEY_BYTES)
+    for part in (model_name, label or "", description or ""):
+        data = part.encode("utf-8")
+        h.update(len(data).to_bytes(8, "little"))  # length prefix: ("ab", "c") != ("a", "bc")
+        h.update(data)
+    return h.digest()
+
+class EmbeddingCache:
+    """Append-only key -> vector store (see module docstring for the layout)."""
+
+    def __init__(self, path=EMBED_CACHE_DIR, dim=None):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+            if dim is not None and dim != self.dim:
+                raise ValueError(f"embedding cache at {path} holds {self.dim}-d vectors, not {dim}-d")
+        else:
+            self.dim = dim
+        self._keys_path = os.path.join(path, "keys.bin")
+        self._vectors_path = os.path.join(path, "vectors.f32")
+        self._rows = {}
+        self._vectors = None
+        if self.dim is not None:
+            self._open()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _open(self):
+        row_bytes = self.dim * 4
+        keys = open(self._keys_path, "rb").read() if os.path.exists(self._keys_path) else b""
+        n_vectors = os.path.getsize(self._vectors_path) // row_bytes if os.path.exists(self._vectors_path) else 0
+        n = min(len(keys) // KEY_BYTES, n_vectors)
+        # Drop a partially written tail from an interrupted append
+        for file_path, size in ((self._keys_path, n * KEY_BYTES), (self._vectors_path, n * row_bytes)):
+            if os.path.exists(file_path) and os.path.getsize(file_path) != size:
+                os.truncate(file_path, size)
+        self._rows = {keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i for i in range(n)}
+        self._vectors = (np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+                         if n else np.empty((0, self.dim), dtype=np.float32))
+
+    def _append(self, keys, vectors):
+        os.makedirs(self.path, exist_ok=True)
+        meta_path = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta_path):
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim, "dtype": "float32"}, f)
+        with open(self._vectors_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._keys_path, "ab") as f:
+            f.write(b"".join(keys))
+        self._open()
+
+    def rows(self, keys):
+        """Row of each key in the cache (-1 = missing)."""
+        return np.array([self._rows.get(k, -1) for k in keys], dtype=np.int64)
+
+    def encode(self, keys, texts, encode_fn):
+        """Vectors for `texts`, encoding only those whose key is not cached yet.
+
+        `encode_fn(list_of_texts)` must return an (n, dim) array; new vectors
+        are appended to the cache before returning.
+        """
+        rows = self.rows(keys)
+        missing = {}  # key -> first position, so duplicate texts are encoded once
+        for pos in np.flatnonzero(rows < 0):
+            missing.setdefault(keys[pos], pos)
+        self.hits += int(np.sum(rows >= 0))
+        self.misses += len(missing)
+
+        if missing:
+            new = np.asarray(encode_fn([texts[pos] for pos in missing.values()]), dtype=np.float32)
+            if self.dim is None:
+                self.dim = new.shape[1]
+            elif new.shape[1] != self.dim:
+                raise ValueError(f"encoder returned {new.shape[1]}-d vectors, cache holds {self.dim}-d")
+            self._append(list(missing), new)
+            rows = self.rows(keys)
+
+        out = np.empty((len(keys), self.dim or 0), dtype=np.float32)
+        if len(keys):
+            out[:] = self._vectors[rows]
+        return out
+
+    def stats(self):
+        return {"rows": len(self), "dim": self.dim, "hits": self.hits, "misses": self.misses}
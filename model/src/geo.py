@@ -0,0 +1,149 @@
+"""
+geo.py
+Spatial grid index over item coordinates, for distance-based proximity.
+
+Items with a latitude/longitude (places, food) are bucketed into square
+cells of GEO_CELL_DEG degrees. Cells are stored sorted by their key with a
+CSR-style pointer into the item order, so "items within R km of a point" is
+one searchsorted over the handful of cells covering the R-km box, followed
+by an exact haversine check on the items in those cells. Each city also
+gets a centroid (mean coordinate of its items) to search from.
+
+Scores decay with distance as exp(-d / GEO_DECAY_KM); items without
+coordinates get NaN distances and no score, so callers can fall back to
+the KG hop proximity for them. hop_proximity() puts hop counts on the same
+scale by counting each hop as KG_HOP_KM, so an item linked to the city
+without coordinates scores about what a located item of that city does.
+
+Output (artifacts/geo_index.npz):
+---------
+lat, lon           float64 per item position (NaN = no coordinates)
+order              item positions sorted by cell
+cell_keys          sorted distinct cell keys
+cell_ptr           cell i holds order[cell_ptr[i]:cell_ptr[i + 1]]
+cities             city names with a centroid
+city_lat, city_lon centroids
+cell_deg           grid cell size in degrees
+"""
+
+import os
+
+import numpy as np
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+GEO_INDEX_OUT = os.path.join(ART_DIR, "geo_index.npz")
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.195
+GEO_CELL_DEG = 0.05     # ~5.5 km cells
+GEO_DECAY_KM = 10.0     # proximity = exp(-distance / GEO_DECAY_KM)
+KG_HOP_KM = 10.0        # one KG hop as a distance (median km of a city's 1-hop items from its centroid)
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km, broadcast over NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+def hop_proximity(hops, decay_km=GEO_DECAY_KM):
+    """exp(-hops * KG_HOP_KM / decay_km) per KG hop count; 0 where hops < 0 (unreachable)."""
+    hops = np.asarray(hops, dtype=np.float64)
+    return np.where(hops >= 0, np.exp(-np.maximum(hops, 0.0) * KG_HOP_KM / decay_km), 0.0)
+
+def _cells(lat, lon, cell_deg):
+    return (np.floor((np.asarray(lat) + 90.0) / cell_deg).astype(np.int64),
+            np.floor((np.asarray(lon) + 180.0) / cell_deg).astype(np.int64))
+
+def _cell_key(row, col, cell_deg):
+    return row * int(np.ceil(360.0 / cell_deg) + 1) + col
+
+def build_geo_index(lat, lon, cities, cell_deg=GEO_CELL_DEG):
+    """Grid arrays (see module docstring) for per-item lat/lon (NaN = none) and city names."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    located = np.flatnonzero(~np.isnan(lat) & ~np.isnan(lon))
+    keys = _cell_key(*_cells(lat[located], lon[located], cell_deg), cell_deg)
+    sort = np.argsort(keys, kind="stable")
+    cell_keys, starts = np.unique(keys[sort], return_index=True)
+    cell_ptr = np.append(starts, located.size).astype(np.int64)
+
+    # City centroids from the located items of each city
+    names, codes = np.unique(np.asarray(cities, dtype=object)[located].astype(str), return_inverse=True)
+    counts = np.bincount(codes, minlength=names.size)
+    city_lat = np.bincount(codes, weights=lat[located], minlength=names.size) / np.maximum(counts, 1)
+    city_lon = np.bincount(codes, weights=lon[located], minlength=names.size) / np.maximum(counts, 1)
+    keep = (counts > 0) & (names != "")
+    return {"lat": lat, "lon": lon, "order": located[sort], "cell_keys": cell_keys, "cell_ptr": cell_ptr,
+            "cities": names[keep], "city_lat": city_lat[keep], "city_lon": city_lon[keep],
+            "cell_deg": np.float64(cell_deg)}
+
+def save_geo_index(path, arrays):
+    np.savez(path, **arrays)
+
+class GeoIndex:
+    """Read-only grid index written by save_geo_index()."""
+
+    def __init__(self, arrays):
+        self.lat = arrays["lat"]
+        self.lon = arrays["lon"]
+        self.order = arrays["order"]
+        self.cell_keys = arrays["cell_keys"]
+        self.cell_ptr = arrays["cell_ptr"]
+        self.cell_deg = float(arrays["cell_deg"])
+        self.cities = [str(c) for c in arrays["cities"]]
+        self.city_lat = arrays["city_lat"]
+        self.city_lon = arrays["city_lon"]
+        self.city_rows = {c: i for i, c in enumerate(self.cities)}
+        self._city_rows_lower = {c.lower(): i for i, c in enumerate(self.cities)}
+
+    @classmethod
+    def load(cls, path=GEO_INDEX_OUT):
+        with np.load(path) as z:
+            return cls({name: z[name] for name in z.files})
+
+    def __len__(self):
+        return len(self.lat)
+
+    def centroid(self, city):
+        """(lat, lon) of a city's items, or None if the city has no located items."""
+        row = self.city_rows.get(city)
+        if row is None:
+            row = self._city_rows_lower.get(city.strip().lower())
+        if row is None:
+            return None
+        return float(self.city_lat[row]), float(self.city_lon[row])
+
+    def within(self, lat, lon, radius_km):
+        """(item positions, distances km) of located items within radius_km, nearest first."""
+        d_lat = radius_km / KM_PER_DEG_LAT
+        d_lon = radius_km / (KM_PER_DEG_LAT * max(np.cos(np.radians(lat)), 1e-6))
+        (r0, r1), (c0, c1) = _cells([lat - d_lat, lat + d_lat], [lon - d_lon, lon + d_lon], self.cell_deg)
+        rows, cols = np.meshgrid(np.arange(r0, r1 + 1), np.arange(c0, c1 + 1), indexing="ij")
+        keys = _cell_key(rows.ravel(), cols.ravel(), self.cell_deg)
+        pos = np.searchsorted(self.cell_keys, keys)
+        pos = pos[(pos < self.cell_keys.size) & (self.cell_keys[np.minimum(pos, self.cell_keys.size - 1)] == keys)]
+        if pos.size == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        lo, hi = self.cell_ptr[pos], self.cell_ptr[pos + 1]
+        slots = np.repeat(lo - np.cumsum(np.append(0, hi - lo)[:-1]), hi - lo) + np.arange(int((hi - lo).sum()))
+        idx = self.order[slots]
+        dist = haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+        inside = dist <= radius_km
+        idx, dist = idx[inside], dist[inside]
+        nearest = np.argsort(dist, kind="stable")
+        return idx[nearest], dist[nearest]
+
+    def distances(self, lat, lon, item_idx):
+        """Distance (km) from (lat, lon) to each item in `item_idx` (NaN = no coordinates)."""
+        item_idx = np.asarray(item_idx, dtype=np.int64)
+        return haversine_km(lat, lon, self.lat[item_idx], self.lon[item_idx])
+
+    def proximity(self, city, item_idx, decay_km=GEO_DECAY_KM):
+        """exp(-distance / decay_km) from the city centroid; NaN where an item (or the city) has no coordinates."""
+        center = self.centroid(city)
+        if center is None:
+            return np.full(np.shape(item_idx), np.nan)
+        return np.exp(-self.distances(*center, item_idx) / decay_km)
@@ -1,11 +1,36 @@
 # inference.py
 """
 Inference pipeline:
-- Loads precomputed artifacts (embeddings, index, KG, item map)
+- Loads precomputed artifacts (embeddings, index, KG distances, item store)
 - Exposes recommend_trip(input_json) -> dict
+  and recommend_trips([input_json, ...]) -> [dict, ...] for batches
 - Uses weighted combination of:
-    content similarity, KG proximity, CF/popularity fallback
-- Returns: recommended_spots, hotels, food, cultural_events
+    content similarity, proximity (geo distance decay from the destination
+    centroid, KG hops for items without coordinates), CF/popularity fallback
+- Returns: recommended_spots, hotels, food, cultural_events, en_route
+  (spots and food in the cities on the backbone path from source to
+  destination, scored by distance to that corridor; see city_routes.py),
+  itinerary (the ranked spots, hotels and food packed into per-day routes
+  between start_date and end_date; see planner.py)
+
+Query embeddings come from the precomputed query table (query_table.py);
+the sentence model is only loaded for destinations the table lacks.
+Candidates come from a search backend per output bucket (search_backends.py):
+exact matmul, int8/float16 scan with exact re-rank, or HNSW, picked by
+catalog size unless SEARCH_BACKEND names one.
+
+Artifacts are loaded lazily by a shared `Recommender` engine, so importing
+this module is cheap; call `get_engine().warm()` to load everything up front.
+They are read from the version that artifacts/CURRENT points at
+(artifact_versions.py), or from artifacts/ itself for a flat layout. A newly
+published version is loaded and validated in the background, then swapped
+in; requests already running finish on the version they started with.
+
+Every stage of a batch (recommend_trips > encode, knn_query, score >
+kg_proximity > city_lookup and score > geo_proximity, date_filter, dedup_sort,
+en_route, plan, copy_output) is timed into metrics.METRICS, exported as
+recommend_stage_seconds{stage=...}. Set METRICS.enabled = False to switch
+the spans off.
 
 Usage:
     python inference.py --source "Kozhikode" --destination "Kochi" \
@@ -13,27 +38,45 @@ Usage:
 """
 
 import os
-import json
-import pickle
+import time
 import argparse
+import threading
+from contextlib import contextmanager
 import numpy as np
-import hnswlib
-import networkx as nx
-from sentence_transformers import SentenceTransformer
-from datetime import datetime
+
+from artifact_versions import current_version, read_manifest, verify, version_dir
+from cache import LRUCache
+from city_index import CityIndex
+from city_routes import CityRoutes
+from metrics import METRICS
+from ann_index import label_positions
+from geo import GeoIndex, GEO_DECAY_KM, haversine_km
+from kg_distances import KGDistanceTable
+from planner import CityDistances, plan_itinerary, trip_days
+from query_table import QueryTable, normalize_diet, query_text
+from search_backends import BACKENDS, ExactBackend, QuantizedBackend, HNSWBackend, select_backend, topk_rows
+from item_store import ItemStore, parse_day, date_overlap_mask, bucket_codes, BUCKET_SPOT, BUCKET_HOTEL, BUCKET_FOOD, BUCKET_EVENT, BUCKET_NAMES
 
 # === Paths ===
 ROOT = os.path.join(os.path.dirname(__file__), "..")
 ART_DIR = os.path.join(ROOT, "artifacts")
 DATA_DIR = os.path.join(ROOT, "data")
 
-# Artifacts
-CONTENT_EMB = os.path.join(ART_DIR, "content_embeddings.npy")
-NODE2VEC_EMB = os.path.join(ART_DIR, "node2vec_embeddings.npy")
-ITEM_FACTORS = os.path.join(ART_DIR, "item_factors.npy")
-ITEM_MAP = os.path.join(ART_DIR, "item_map.json")
-HNSW_INDEX = os.path.join(ART_DIR, "item_index_hnsw.bin")
-KG_FILE = os.path.join(ART_DIR, "kg_graph.pkl")
+# Artifacts (file names inside the artifacts directory)
+CONTENT_EMB = "content_embeddings.npy"
+NODE2VEC_EMB = "node2vec_embeddings.npy"
+ITEM_FACTORS = "item_factors.npy"
+COMBINED_EMB = "combined_item_embeddings.npy"
+ITEM_STORE = "item_store"
+ITEM_LABELS = "item_labels.npz"  # stable HNSW label of every item position
+HNSW_INDEX = "item_index_hnsw.bin"
+BUCKET_INDEX = "item_index_hnsw_{}.bin"  # one sub-index per output bucket name
+KG_DIST = "kg_distances.npz"
+GEO_INDEX = "geo_index.npz"  # optional: without it proximity is KG hops only
+QUERY_TABLE = "query_table"  # optional: without it every query is encoded
+CITY_INDEX = "city_index.json"  # optional: rebuilt from the KG distance table's cities
+CITY_ROUTES = "city_routes.npz"  # optional: without it en_route is empty
+CITY_DISTANCES = "city_distances.npz"  # optional: without it the itinerary is empty
 
 # === Weights ===
 W_CONTENT = 0.5
@@ -42,174 +85,823 @@ W_CF = 0.2
 
 SENTENCE_MODEL = "all-MiniLM-L6-v2"
 
-# === Load Artifacts ===
-print("Loading artifacts...")
+# Retrieval
+CANDIDATE_K = 50
+SEARCH_BACKEND = "auto"          # "auto" (by catalog size), "exact", "quantized" or "hnsw"
+QUANTIZED_DTYPE = "int8"         # or "float16"
+RANK_OVERFETCH = 2               # candidates ranked per result before falling back to a full sort
+ENCODE_BATCH_SIZE = 64
+
+# Caches
+EMBED_CACHE_SIZE = 4096          # query text -> embedding
+RESULT_CACHE_SIZE = 1024         # normalized request -> output
+RESULT_CACHE_TTL = 600           # seconds
+VERSION_CHECK_INTERVAL = 5.0     # seconds between checks for a new artifact version
+VERIFY_HASHES = False            # also sha256 every file of a new version before serving it
+
+# Flat layout only (no artifacts/CURRENT): files whose (mtime, size) identify the artifacts on disk
+VERSION_FILES = (CONTENT_EMB, NODE2VEC_EMB, ITEM_FACTORS, COMBINED_EMB, os.path.join(ITEM_STORE, "tables.json"),
+                 ITEM_LABELS, HNSW_INDEX, KG_DIST, GEO_INDEX, os.path.join(QUERY_TABLE, "tables.json"),
+                 CITY_INDEX, CITY_ROUTES, CITY_DISTANCES) + tuple(BUCKET_INDEX.format(n) for n in BUCKET_NAMES)
+
+# Output sections: (key, bucket, top-k, candidates fetched from the bucket's own index).
+# More candidates than top-k are fetched so label dedup and date filtering can't starve a section.
+OUTPUT_BUCKETS = (
+    ("recommended_spots", BUCKET_SPOT, 10, 40),
+    ("hotels", BUCKET_HOTEL, 5, 20),
+    ("food", BUCKET_FOOD, 10, 40),
+    ("cultural_events", BUCKET_EVENT, 5, 50),
+)
+
+# En-route section: items of these buckets linked to the cities strictly between source and destination
+EN_ROUTE_KEY = "en_route"
+EN_ROUTE_BUCKETS = (BUCKET_SPOT, BUCKET_FOOD)
+EN_ROUTE_K = 10
+
+# Itinerary: planned from every ranked candidate of these buckets (not only the top-k shown) plus the events
+ITINERARY_KEY = "itinerary"
+PLAN_BUCKETS = (BUCKET_SPOT, BUCKET_HOTEL, BUCKET_FOOD)
+
+# Order used by Recommender.warm()
+ARTIFACTS = ("items", "content_emb", "node2vec_emb", "item_factors", "combined_emb",
+             "label_positions", "bucket_sizes", "backend", "bucket_backends", "kg_distances", "city_index", "city_routes", "geo_index", "city_distances", "query_table")
+
+# --- Utility ---
+def version_label(version):
+    """Printable artifact version: the version name, or "(flat files)" for a fingerprint."""
+    return version if isinstance(version, str) else "(flat files)"
 
-with open(ITEM_MAP, "r", encoding="utf-8") as f:
-    item_map = json.load(f)
-n_items = len(item_map)
+class ArtifactSet:
+    """One artifact version: its directory, manifest, loaded artifacts and output cache."""
 
-content_emb = np.load(CONTENT_EMB)
-node2vec_emb = np.load(NODE2VEC_EMB)
-item_factors = np.load(ITEM_FACTORS)
+    def __init__(self, art_dir, version, manifest=None):
+        self.art_dir = art_dir
+        self.version = version  # CURRENT name, or the file fingerprint for a flat layout
+        self.manifest = manifest
+        self.artifacts = {}
+        self.lock = threading.RLock()  # held while loading an artifact of this set
+        self.result_cache = LRUCache(RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
 
-# Normalize embeddings
 def l2_normalize(x):
     return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
 
-content_emb = l2_normalize(content_emb)
-node2vec_emb = l2_normalize(node2vec_emb)
-item_factors = l2_normalize(item_factors)
+def build_query_text(input_json):
+    """Query template (query_table.py); dates are filtered on, not embedded."""
+    return query_text(input_json["destination"], normalize_diet(input_json.get("veg/non-veg")), input_json["source"])
+
+def request_key(input_json):
+    """Cache key for a request: the query fields, trimmed and lower-cased."""
+    return tuple(str(input_json.get(f, "Any" if f == "veg/non-veg" else "")).strip().lower()
+                 for f in ("source", "destination", "start_date", "end_date", "veg/non-veg"))
+
+def _first_per_label(cols, top, label_ids, k):
+    """(picks, short) for score-ordered columns: the first k columns per row whose label id was not
+    seen earlier in the row (-1 pads), and the rows that got fewer than k."""
+    ids = np.take_along_axis(label_ids, cols, axis=1).astype(np.int64)
+    keys = np.arange(len(cols))[:, None] * (int(ids.max(initial=0)) + 1) + ids
+    first = np.zeros(cols.size, dtype=bool)
+    first[np.unique(keys.ravel(), return_index=True)[1]] = True
+    chosen = first.reshape(cols.shape) & np.isfinite(top)
+    chosen &= np.cumsum(chosen, axis=1) <= k
+    order = np.argsort(~chosen, axis=1, kind="stable")[:, :k]
+    picks = np.where(np.take_along_axis(chosen, order, axis=1), np.take_along_axis(cols, order, axis=1), -1)
+    if picks.shape[1] < k:
+        picks = np.pad(picks, ((0, 0), (0, k - picks.shape[1])), constant_values=-1)
+    return picks, chosen.sum(axis=1) < k
+
+def rank_rows(scores, keep, label_ids, k):
+    """Columns of each row's k best kept candidates, best first, one per label id (-1 pads short rows).
+
+    Only the top RANK_OVERFETCH * k scores of a row are sorted (argpartition);
+    rows that lose too many of them to duplicates are ranked again in full.
+    """
+    scores = np.where(keep, scores, -np.inf)
+    n = scores.shape[1]
+    m = min(n, RANK_OVERFETCH * k)
+    picks, short = _first_per_label(*topk_rows(scores, m), label_ids, k)
+    if m < n and short.any():
+        picks[short] = _first_per_label(*topk_rows(scores[short], n), label_ids[short], k)[0]
+    return picks
+
+def _copy_result(item):
+    return dict(item, meta=dict(item["meta"]))
+
+def copy_output(output):
+    """Copy of a recommend_trip output (result dicts and their meta)."""
+    out = {bucket: [_copy_result(item) for item in items]
+           for bucket, items in output.items() if bucket != ITINERARY_KEY}
+    if ITINERARY_KEY in output:
+        out[ITINERARY_KEY] = [dict(day, hotel=day["hotel"] and _copy_result(day["hotel"]),
+                                   stops=[_copy_result(item) for item in day["stops"]],
+                                   events=[_copy_result(item) for item in day["events"]])
+                              for day in output[ITINERARY_KEY]]
+    return out
+
+# === Engine ===
+class Recommender:
+    """Hybrid recommendation engine over the trained artifacts.
+
+    Each artifact is loaded on first access and then kept with its
+    ArtifactSet, so a single instance can be shared across requests.
+    `load_times` records how long every artifact took to load.
+
+    Artifacts are double-buffered. At most every VERSION_CHECK_INTERVAL
+    seconds a request checks artifacts/CURRENT (the file fingerprint for a
+    flat layout). On a change a background thread loads every artifact of the
+    new version and validates it (see validate()). Only a valid version
+    replaces the live set, in one assignment. A rejected one is logged and
+    not retried. Each request pins the set that was live when it started,
+    so in-flight requests never mix two versions.
+
+    Query embeddings and final outputs are cached (LRU). The output cache
+    belongs to the artifact set; query embeddings depend only on the
+    sentence model and are kept across versions.
+    """
+
+    def __init__(self, art_dir=ART_DIR, sentence_model=SENTENCE_MODEL, text_model=None, search_backend=None):
+        self.root = art_dir
+        self.sentence_model = sentence_model
+        self.search_backend = search_backend or SEARCH_BACKEND
+        if self.search_backend != "auto" and self.search_backend not in BACKENDS:
+            raise ValueError(f"Unknown search backend {self.search_backend!r}; expected auto or one of {BACKENDS}")
+        self._text_model = text_model  # encoder object to use instead of loading sentence_model
+        self.load_times = {}
+        self._shared = {}  # artifacts that do not depend on the version (the sentence model)
+        self._lock = threading.RLock()
+        self._reload_lock = threading.Lock()
+        self._pin = threading.local()
+        self.embedding_cache = LRUCache(EMBED_CACHE_SIZE)
+        self._live = self._open_set(self.disk_version())
+        self._rejected = None
+        self._reloading = None
+        self._version_checked = time.monotonic()
+        self.auto_reload = True  # False: only an explicit check_version() picks up new versions
+
+    # --- Artifact versions ---
+    @property
+    def artifact_set(self):
+        """The ArtifactSet pinned by the calling thread, else the live one."""
+        return getattr(self._pin, "set", None) or self._live
+
+    @contextmanager
+    def pinned(self, artifact_set=None):
+        """Serve everything in the block from one ArtifactSet (default: the live one)."""
+        prev = getattr(self._pin, "set", None)
+        self._pin.set = artifact_set or self._live
+        try:
+            yield self._pin.set
+        finally:
+            self._pin.set = prev
 
-combined_emb = np.concatenate([content_emb, node2vec_emb, item_factors], axis=1)
-combined_emb = l2_normalize(combined_emb)
+    @property
+    def art_dir(self):
+        return self.artifact_set.art_dir
 
-# Load HNSW index
-dim = combined_emb.shape[1]
-index = hnswlib.Index(space='cosine', dim=dim)
-index.load_index(HNSW_INDEX)
-print(f"Loaded HNSW index with {n_items} items.")
+    @property
+    def version(self):
+        return self.artifact_set.version
 
-# Load KG
-with open(KG_FILE, "rb") as f:
-    KG = pickle.load(f)
-print(f"Loaded KG: {KG.number_of_nodes()} nodes, {KG.number_of_edges()} edges")
+    @property
+    def result_cache(self):
+        return self.artifact_set.result_cache
 
-# Load text encoder
-text_model = SentenceTransformer(SENTENCE_MODEL)
+    @result_cache.setter
+    def result_cache(self, cache):
+        self.artifact_set.result_cache = cache
 
-# --- Utility ---
-def get_node_id_for_city(city_name):
-    nid = f"city:{city_name}"
-    if nid in KG.nodes:
-        return nid
-    # fallback fuzzy match
-    for n in KG.nodes:
-        if city_name.lower() in str(n).lower():
-            return n
-    return None
-
-def compute_kg_proximity_scores(destination_city, qids):
-    """Compute proximity (1 / (shortest path length + 1)) for items from destination."""
-    dest_node = get_node_id_for_city(destination_city)
-    if dest_node is None:
-        return np.zeros(len(qids))
-    scores = np.zeros(len(qids))
-    for i, qid in enumerate(qids):
-        if not KG.has_node(qid):
-            continue
+    def _path(self, name):
+        return os.path.join(self.art_dir, name)
+
+    def _artifact(self, name, loader, shared=False):
+        artifact_set = self.artifact_set
+        artifacts = self._shared if shared else artifact_set.artifacts
         try:
-            d = nx.shortest_path_length(KG, source=qid, target=dest_node)
-            scores[i] = 1.0 / (d + 1.0)
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
-            scores[i] = 0.0
-    return scores
-
-def compute_content_similarity(input_json):
-    """Encode text description of travel plan and get content similarity."""
-    text = f"Trip from {input_json['source']} to {input_json['destination']} " \
-           f"between {input_json['start_date']} and {input_json['end_date']}. " \
-           f"Diet preference: {input_json.get('veg/non-veg','Any')}."
-    q_emb = text_model.encode([text], normalize_embeddings=True)
-    q_emb = np.array(q_emb, dtype=np.float32)
-
-    # Pad with zeros for node2vec + CF dimensions
-    total_dim = combined_emb.shape[1]
-    content_dim = content_emb.shape[1]
-    if q_emb.shape[1] < total_dim:
-        pad = np.zeros((1, total_dim - content_dim), dtype=np.float32)
-        q_emb = np.concatenate([q_emb, pad], axis=1)
-
-    # Safety check
-    assert q_emb.shape[1] == total_dim, f"Query dim {q_emb.shape[1]} != index dim {total_dim}"
-
-    labels, distances = index.knn_query(q_emb, k=50)
-    labels = labels[0]
-    distances = 1 - distances[0]  # cosine similarity
-    return labels, distances
-
-def filter_events_by_date(events, start_date, end_date):
-    def parse_date(d):
+            return artifacts[name]
+        except KeyError:
+            pass
+        # Loads of different sets don't wait for each other (a background reload vs live requests)
+        with self._lock if shared else artifact_set.lock:
+            if name not in artifacts:
+                t0 = time.perf_counter()
+                value = loader()
+                self.load_times[name] = time.perf_counter() - t0
+                artifacts[name] = value
+        return artifacts[name]
+
+    def artifact_version(self):
+        """Fingerprint of the flat artifact files: (mtime, size) of each VERSION_FILES entry."""
+        version = []
+        for name in VERSION_FILES:
+            try:
+                st = os.stat(os.path.join(self.root, name))
+                version.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+    def disk_version(self):
+        """The published version name, or the flat file fingerprint when there is no artifacts/CURRENT."""
+        name = current_version(self.root)
+        return name if name is not None else self.artifact_version()
+
+    def _open_set(self, version):
+        if isinstance(version, str):
+            path = version_dir(self.root, version)
+            return ArtifactSet(path, version, read_manifest(path))
+        return ArtifactSet(self.root, version)
+
+    def check_version(self, force=False, wait=False):
+        """Start loading a new artifact version if one was published. Returns True if a reload started.
+
+        The reload runs in a background thread; wait=True runs it in the caller's thread instead.
+        """
+        now = time.monotonic()
+        if not force and now - self._version_checked < VERSION_CHECK_INTERVAL:
+            return False
+        self._version_checked = now
+        version = self.disk_version()
+        with self._reload_lock:
+            if version in (self._live.version, self._rejected) or self._reloading is not None:
+                return False
+            self._reloading = version
+        if wait:
+            self._reload(version)
+        else:
+            threading.Thread(target=self._reload, args=(version,), name="artifact-reload", daemon=True).start()
+        return True
+
+    def _reload(self, version):
+        label = version_label(version)
         try:
-            return datetime.strptime(d, "%d %b %Y")
-        except:
-            return None
-
-    start = parse_date(start_date)
-    end = parse_date(end_date)
-    if not start or not end:
-        return events
-
-    filtered = []
-    for e in events:
-        meta = e.get("meta", {})
-        estart = parse_date(meta.get("start"))
-        eend = parse_date(meta.get("end"))
-        if estart and eend and (estart <= end and eend >= start):
-            filtered.append(e)
-    return filtered
-    
+            new = self._open_set(version)
+            with self.pinned(new):
+                t0 = time.perf_counter()
+                self.warm()
+                problems = self.validate()
+            if problems:
+                self._rejected = version
+                METRICS.inc("artifact_reloads_rejected")
+                print(f"Artifact version {label} rejected, still serving {version_label(self._live.version)}:")
+                for problem in problems:
+                    print(" -", problem)
+                return
+            self._live = new
+            METRICS.inc("artifact_reloads")
+            print(f"Serving artifact version {label} (loaded in {time.perf_counter() - t0:.1f}s)")
+        except Exception as e:
+            self._rejected = version
+            METRICS.inc("artifact_reloads_rejected")
+            print(f"Artifact version {label} failed to load ({type(e).__name__}: {e}); keeping the live version.")
+        finally:
+            self._reloading = None
+
+    def validate(self):
+        """Problems (list of strings) with the artifact set in use; [] if it can be served.
+
+        Checks the files against the manifest, and that every per-item artifact
+        and index covers exactly the item store's items.
+        """
+        artifact_set = self.artifact_set
+        manifest = artifact_set.manifest
+        problems = []
+        if isinstance(artifact_set.version, str):
+            if manifest is None:
+                return ["manifest.json is missing"]
+            problems += verify(artifact_set.art_dir, manifest, hashes=VERIFY_HASHES)
+            if problems:
+                return problems
+        n = self.n_items
+        if manifest is not None and manifest.get("n_items") != n:
+            problems.append(f"item store has {n} items, manifest says {manifest.get('n_items')}")
+        for name in ("content_emb", "node2vec_emb", "item_factors", "combined_emb"):
+            rows = getattr(self, name).shape[0]
+            if rows != n:
+                problems.append(f"{name} has {rows} rows for {n} items")
+        positions = self.label_positions
+        if positions is not None and int((positions >= 0).sum()) != n:
+            problems.append(f"item labels cover {int((positions >= 0).sum())} items, not {n}")
+
+        # HNSW indexes hold every live item plus deleted slots
+        expected = manifest.get("hnsw_elements", {}) if manifest is not None else {}
+        indexes = [(HNSW_INDEX, artifact_set.artifacts.get("index"), n)]
+        indexes += [(BUCKET_INDEX.format(BUCKET_NAMES[b]), index, int(self.bucket_sizes[b]))
+                    for b, index in (artifact_set.artifacts.get("bucket_indexes") or {}).items()]
+        for name, index, live in indexes:
+            if index is None:
+                continue
+            count = index.get_current_count()
+            if count < live:
+                problems.append(f"{name} has {count} elements for {live} items")
+            if name in expected and expected[name] != count:
+                problems.append(f"{name} has {count} elements, manifest says {expected[name]}")
+
+        if self.kg_distances.n_items != n:
+            problems.append(f"kg_distances covers {self.kg_distances.n_items} items, not {n}")
+        for name in ("geo_index", "city_distances"):
+            table = getattr(self, name)
+            if table is not None and len(table.lat) != n:
+                problems.append(f"{name} covers {len(table.lat)} items, not {n}")
+        return problems
+
+    def cache_stats(self):
+        return {"embeddings": self.embedding_cache.stats(), "results": self.result_cache.stats()}
+
+    def warm(self, names=ARTIFACTS):
+        """Load the given artifacts now instead of on the first request.
+
+        The sentence model is loaded too when there is no query table.
+        """
+        if any(name not in self.artifact_set.artifacts for name in names):
+            print("Loading artifacts...")
+        for name in names:
+            getattr(self, name)
+        if "query_table" in names and self.query_table is None:
+            self.text_model
+        return self
+
+    # --- Artifacts ---
+    @property
+    def items(self):
+        """Memory-mapped item store (metadata for every index label)."""
+        return self._artifact("items", lambda: ItemStore(self._path(ITEM_STORE)))
+
+    @property
+    def n_items(self):
+        return len(self.items)
+
+    # Embedding matrices are memory-mapped read-only, so pre-forked workers
+    # share one page-cache copy. Modality arrays are as saved by train.py
+    # (not normalized); combined_emb is row-normalized.
+    @property
+    def content_emb(self):
+        return self._artifact("content_emb", lambda: np.load(self._path(CONTENT_EMB), mmap_mode="r"))
+
+    @property
+    def node2vec_emb(self):
+        return self._artifact("node2vec_emb", lambda: np.load(self._path(NODE2VEC_EMB), mmap_mode="r"))
+
+    @property
+    def item_factors(self):
+        return self._artifact("item_factors", lambda: np.load(self._path(ITEM_FACTORS), mmap_mode="r"))
+
+    @property
+    def combined_emb(self):
+        def load():
+            path = self._path(COMBINED_EMB)
+            if os.path.exists(path):
+                return np.load(path, mmap_mode="r")
+            # Older artifact sets: rebuild in memory
+            parts = [l2_normalize(np.asarray(x)) for x in (self.content_emb, self.node2vec_emb, self.item_factors)]
+            return l2_normalize(np.concatenate(parts, axis=1))
+        return self._artifact("combined_emb", load)
+
+    @property
+    def label_positions(self):
+        """Item position of every index label; None when labels are positions (older artifact sets)."""
+        def load():
+            path = self._path(ITEM_LABELS)
+            if not os.path.exists(path):
+                return None
+            with np.load(path) as z:
+                return label_positions(z["labels"])
+        return self._artifact("label_positions", load)
+
+    @property
+    def index(self):
+        def load():
+            import hnswlib
+            index = hnswlib.Index(space='cosine', dim=self.combined_emb.shape[1])
+            index.load_index(self._path(HNSW_INDEX))
+            print(f"Loaded HNSW index with {self.n_items} items.")
+            return index
+        return self._artifact("index", load)
+
+    @property
+    def bucket_indexes(self):
+        """Per-bucket HNSW sub-indexes (same labels as the main index); empty buckets are absent."""
+        def load():
+            import hnswlib
+            indexes = {}
+            for bucket, name in enumerate(BUCKET_NAMES):
+                path = self._path(BUCKET_INDEX.format(name))
+                if not os.path.exists(path):
+                    continue
+                index = hnswlib.Index(space='cosine', dim=self.combined_emb.shape[1])
+                index.load_index(path)
+                indexes[bucket] = index
+            print("Loaded bucket indexes: " + ", ".join(
+                f"{BUCKET_NAMES[b]}={ix.get_current_count()}" for b, ix in indexes.items()))
+            return indexes
+        return self._artifact("bucket_indexes", load)
+
+    @property
+    def bucket_sizes(self):
+        """Live items per bucket (the sub-indexes also count deleted slots)."""
+        def load():
+            codes = bucket_codes(self.items)
+            return np.bincount(codes[codes >= 0], minlength=len(BUCKET_NAMES))
+        return self._artifact("bucket_sizes", load)
+
+    def _backend(self, n_items, positions, hnsw_index):
+        """Search backend over the items at `positions` (None = all); hnsw_index() loads the HNSW fallback."""
+        name = select_backend(n_items) if self.search_backend == "auto" else self.search_backend
+        if name == "exact":
+            return ExactBackend(self.combined_emb, positions)
+        if name == "quantized":
+            return QuantizedBackend(self.combined_emb, positions, dtype=QUANTIZED_DTYPE)
+        index = hnsw_index()
+        if index is None:
+            # No index file for these items: scan them instead
+            return QuantizedBackend(self.combined_emb, positions, dtype=QUANTIZED_DTYPE)
+        return HNSWBackend(index, self.label_positions)
+
+    @property
+    def backend(self):
+        """Search backend over every item (see search_backends.py)."""
+        def load():
+            backend = self._backend(self.n_items, None,
+                                    lambda: self.index if os.path.exists(self._path(HNSW_INDEX)) else None)
+            print(f"Search backend: {backend.name} ({self.n_items} items)")
+            return backend
+        return self._artifact("backend", load)
+
+    @property
+    def bucket_backends(self):
+        """Search backend per output bucket; empty buckets are absent."""
+        def load():
+            codes = bucket_codes(self.items)
+            backends = {}
+            for bucket in range(len(BUCKET_NAMES)):
+                positions = np.flatnonzero(codes == bucket)
+                if positions.size:
+                    backends[bucket] = self._backend(positions.size, positions,
+                                                     lambda: self.bucket_indexes.get(bucket))
+            print("Bucket search backends: " + ", ".join(
+                f"{BUCKET_NAMES[b]}={backend.name}" for b, backend in backends.items()))
+            return backends
+        return self._artifact("bucket_backends", load)
+
+    @property
+    def kg_distances(self):
+        def load():
+            table = KGDistanceTable.load(self._path(KG_DIST))
+            print(f"Loaded KG distances: {len(table.cities)} cities, radius {table.radius}")
+            return table
+        return self._artifact("kg_distances", load)
+
+    @property
+    def city_index(self):
+        """City-name resolver (city_index.py) over the KG city nodes."""
+        def load():
+            path = self._path(CITY_INDEX)
+            if os.path.exists(path):
+                return CityIndex.load(path)
+            return CityIndex.from_cities(n[len("city:"):] for n in self.kg_distances.city_rows)
+        return self._artifact("city_index", load)
+
+    @property
+    def city_routes(self):
+        """All-pairs backbone paths (city_routes.py), or None if they were not built."""
+        def load():
+            path = self._path(CITY_ROUTES)
+            if not os.path.exists(path):
+                return None
+            routes = CityRoutes.load(path)
+            print(f"Loaded city routes: {len(routes)} backbone cities")
+            return routes
+        return self._artifact("city_routes", load)
+
+    @property
+    def geo_index(self):
+        """Spatial grid over item coordinates (geo.py), or None if it was not built."""
+        def load():
+            path = self._path(GEO_INDEX)
+            if not os.path.exists(path):
+                return None
+            geo = GeoIndex.load(path)
+            print(f"Loaded geo index: {len(geo.cell_keys)} cells, {len(geo.cities)} city centroids")
+            return geo
+        return self._artifact("geo_index", load)
+
+    @property
+    def city_distances(self):
+        """Per-city item distance matrices (planner.py), or None if they were not built."""
+        def load():
+            path = self._path(CITY_DISTANCES)
+            if not os.path.exists(path):
+                return None
+            distances = CityDistances.load(path)
+            print(f"Loaded city distance matrices: {len(distances.cities)} cities")
+            return distances
+        return self._artifact("city_distances", load)
+
+    @property
+    def query_table(self):
+        """Precomputed query embeddings (query_table.py), or None if they were not built."""
+        def load():
+            path = self._path(QUERY_TABLE)
+            if not os.path.exists(os.path.join(path, "tables.json")):
+                return None
+            table = QueryTable(path)
+            if table.model != self.sentence_model:
+                print(f"Query table was built with {table.model}, not {self.sentence_model}; not using it.")
+                return None
+            print(f"Loaded query table: {len(table)} rows")
+            return table
+        return self._artifact("query_table", load)
+
+    @property
+    def text_model(self):
+        if self._text_model is not None:
+            return self._text_model
+        def load():
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(self.sentence_model)
+        return self._artifact("text_model", load, shared=True)
+
+    # --- Scoring ---
+    def resolve_city(self, city_name):
+        """Canonical KG city name for a request's city (aliases, typos), or None."""
+        return self.city_index.resolve(city_name)
+
+    def get_node_id_for_city(self, city_name):
+        city = self.resolve_city(city_name)
+        nid = None if city is None else f"city:{city}"
+        return nid if nid in self.kg_distances.city_rows else None
+
+    def compute_kg_proximity_scores(self, destination_city, candidate_idx):
+        """KG hop proximity (geo.hop_proximity) of items to the destination city node."""
+        with METRICS.span("city_lookup"):
+            dest_node = self.get_node_id_for_city(destination_city)
+        if dest_node is None:
+            return np.zeros(np.shape(candidate_idx))
+        return self.kg_distances.proximity(dest_node, candidate_idx)
+
+    def compute_proximity_scores(self, destination_city, candidate_idx):
+        """Geo distance decay from the destination centroid; KG proximity where an item has no coordinates."""
+        scores = self.compute_kg_proximity_scores(destination_city, candidate_idx)
+        geo = self.geo_index
+        if geo is None:
+            return scores
+        with METRICS.span("geo_proximity"):
+            geo_scores = geo.proximity(self.resolve_city(destination_city) or destination_city, candidate_idx)
+        return np.where(np.isnan(geo_scores), scores, geo_scores)
+
+    def nearby_items(self, city, radius_km=2 * GEO_DECAY_KM):
+        """(item positions, distances km) within radius_km of the city centroid, nearest first."""
+        geo = self.geo_index
+        center = geo.centroid(self.resolve_city(city) or city) if geo is not None else None
+        if center is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return geo.within(*center, radius_km)
+
+    def route_cities(self, source, destination):
+        """Backbone cities on a shortest source -> destination path, ends included ([] if none)."""
+        routes = self.city_routes
+        if routes is None:
+            return []
+        return routes.path(self.resolve_city(source), self.resolve_city(destination))
+
+    def en_route_candidates(self, path):
+        """Positions of EN_ROUTE_BUCKETS items linked to the cities strictly inside the path."""
+        if len(path) < 3:
+            return np.empty(0, dtype=np.int64)
+        dist = self.kg_distances
+        idx = np.unique(np.concatenate([dist.items_within(f"city:{city}", 1) for city in path[1:-1]]))
+        idx = idx[np.isin(self.items.bucket[idx], EN_ROUTE_BUCKETS)].astype(np.int64)
+        # A node can back items of several cities (duplicate names): drop the ones at either end
+        cities = np.asarray(self.items.cities)[self.items.city[idx]]
+        return idx[(cities != path[0]) & (cities != path[-1])]
+
+    def compute_corridor_scores(self, path, candidate_idx):
+        """Proximity to the nearest city of the path: min over path cities of the geo / KG distance."""
+        candidate_idx = np.asarray(candidate_idx, dtype=np.int64)
+        dist = self.kg_distances
+        scores = np.max([dist.proximity(f"city:{city}", candidate_idx) for city in path], axis=0)
+        geo = self.geo_index
+        centers = [c for c in (geo.centroid(city) for city in path) if c is not None] if geo is not None else []
+        if not centers:
+            return scores
+        lat, lon = np.array(centers).T
+        km = haversine_km(lat[:, None], lon[:, None], geo.lat[candidate_idx], geo.lon[candidate_idx]).min(axis=0)
+        return np.where(np.isnan(km), scores, np.exp(-km / GEO_DECAY_KM))
+
+    def recommend_en_route(self, requests, q_emb):
+        """EN_ROUTE_K results per request, [] when source and destination are not joined by the backbone."""
+        out = [[] for _ in requests]
+        rows_by_pair = {}
+        for i, r in enumerate(requests):
+            rows_by_pair.setdefault((r["source"], r["destination"]), []).append(i)
+        for (source, destination), rows in rows_by_pair.items():
+            path = self.route_cities(source, destination)
+            candidate_idx = self.en_route_candidates(path)
+            if candidate_idx.size == 0:
+                continue
+            sims = q_emb[rows] @ np.asarray(self.combined_emb[candidate_idx], dtype=np.float32).T
+            final_scores = W_CONTENT * sims + W_KG * self.compute_corridor_scores(path, candidate_idx)
+            keep = np.ones(final_scores.shape, dtype=bool)
+            picks = rank_rows(final_scores, keep, np.broadcast_to(self.items.label_id[candidate_idx], keep.shape), EN_ROUTE_K)
+            for j, i in enumerate(rows):
+                out[i] = self._results(candidate_idx, final_scores[j], picks[j])
+        return out
+
+    def query_embeddings(self, requests):
+        """Padded query embeddings of requests: query table rows, encoding only the ones it lacks."""
+        table = self.query_table
+        rows = np.full(len(requests), -1, dtype=np.int64)
+        if table is not None:
+            resolve = self.resolve_city
+            rows[:] = [table.lookup(resolve(r["source"]) or r["source"], resolve(r["destination"]) or r["destination"],
+                                    r.get("veg/non-veg")) for r in requests]
+        q_emb = np.empty((len(requests), self.content_emb.shape[1]), dtype=np.float32)
+        found = rows >= 0
+        if found.any():
+            q_emb[found] = table.embeddings[rows[found]]
+        missing = np.flatnonzero(~found)
+        if missing.size:
+            METRICS.inc("query_table_misses", missing.size)
+            q_emb[missing] = self._encode_texts([build_query_text(requests[i]) for i in missing])
+        return self._pad_queries(q_emb)
+
+    def encode_queries(self, texts):
+        """Encode query texts in one batch and pad them to the index dimension."""
+        return self._pad_queries(self._encode_texts(texts))
+
+    def _encode_texts(self, texts):
+        cache = self.embedding_cache
+        rows = [cache.get(t) for t in texts]
+        todo = list(dict.fromkeys(t for t, row in zip(texts, rows) if row is None))
+        if todo:
+            encoded = self.text_model.encode(todo, batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True)
+            fresh = dict(zip(todo, np.asarray(encoded, dtype=np.float32)))
+            for t, emb in fresh.items():
+                cache.put(t, emb)
+            rows = [fresh[t] if row is None else row for t, row in zip(texts, rows)]
+        return np.stack(rows)
+
+    def _pad_queries(self, q_emb):
+        # Pad with zeros for node2vec + CF dimensions
+        total_dim = self.combined_emb.shape[1]
+        content_dim = self.content_emb.shape[1]
+        if q_emb.shape[1] < total_dim:
+            pad = np.zeros((len(q_emb), total_dim - content_dim), dtype=np.float32)
+            q_emb = np.concatenate([q_emb, pad], axis=1)
+
+        # Safety check
+        assert q_emb.shape[1] == total_dim, f"Query dim {q_emb.shape[1]} != index dim {total_dim}"
+        return q_emb
+
+    def search(self, q_emb, k=CANDIDATE_K, num_threads=-1, backend=None):
+        """Multi-row top-k query. Returns (item positions, cosine similarities), one row per query."""
+        backend = self.backend if backend is None else backend
+        return backend.search(q_emb, k, num_threads=num_threads)
+
+    def search_bucket(self, q_emb, bucket, k, num_threads=-1):
+        """Top-k items of one output bucket, straight from its own backend."""
+        backend = self.bucket_backends.get(bucket)
+        k = 0 if backend is None else min(k, int(self.bucket_sizes[bucket]))
+        if k == 0:
+            return np.zeros((len(q_emb), 0), dtype=np.int64), np.zeros((len(q_emb), 0), dtype=np.float32)
+        return self.search(q_emb, k=k, num_threads=num_threads, backend=backend)
+
+    def compute_content_similarity(self, input_json):
+        """Encode text description of travel plan and get content similarity."""
+        labels, sims = self.search(self.query_embeddings([input_json]))
+        return labels[0], sims[0]
+
+    def recommend_trip(self, input_json):
+        """Main hybrid recommendation function."""
+        return self.recommend_trips([input_json])[0]
+
+    def recommend_trips(self, requests, num_threads=-1):
+        """Batched recommend_trip: one encode call, then one multi-row top-k query per output bucket."""
+        with METRICS.span("recommend_trips"), self.pinned():
+            if self.auto_reload:
+                self.check_version()
+            keys = [request_key(r) for r in requests]
+            found = {k: out for k in set(keys) if (out := self.result_cache.get(k)) is not None}
+            todo = {k: r for k, r in zip(keys, requests) if k not in found}
+            METRICS.inc("requests", len(requests))
+            METRICS.inc("result_cache_misses", len(todo))
+            if todo:
+                for k, out in zip(todo, self._recommend_batch(list(todo.values()), num_threads)):
+                    self.result_cache.put(k, out)
+                    found[k] = out
+            # Cached outputs are shared, callers get their own copy
+            with METRICS.span("copy_output"):
+                return [copy_output(found[k]) for k in keys]
+
+    def _recommend_batch(self, requests, num_threads):
+        with METRICS.span("encode"):
+            q_emb = self.query_embeddings(requests)
+        outputs = [{} for _ in requests]
+        pools = [{} for _ in requests]
+        for key, bucket, top_k, n_candidates in OUTPUT_BUCKETS:
+            with METRICS.span("knn_query"):
+                candidate_idx, sim_scores = self.search_bucket(q_emb, bucket, n_candidates, num_threads)
+            with METRICS.span("score"):
+                final_scores = self.score_candidates(requests, candidate_idx, sim_scores)
+            with METRICS.span("date_filter"):
+                if bucket == BUCKET_EVENT:
+                    keep = self.filter_events_by_date(requests, candidate_idx)
+                else:
+                    keep = np.ones(candidate_idx.shape, dtype=bool)
+            with METRICS.span("dedup_sort"):
+                k = n_candidates if bucket in PLAN_BUCKETS else top_k
+                picks = rank_rows(final_scores, keep, self.items.label_id[candidate_idx], k)
+                for i in range(len(requests)):
+                    outputs[i][key] = self._results(candidate_idx[i], final_scores[i], picks[i, :top_k])
+                    pools[i][bucket] = (candidate_idx[i], final_scores[i], picks[i])
+        with METRICS.span("en_route"):
+            for output, results in zip(outputs, self.recommend_en_route(requests, q_emb)):
+                output[EN_ROUTE_KEY] = results
+        with METRICS.span("plan"):
+            for request, output, pool in zip(requests, outputs, pools):
+                output[ITINERARY_KEY] = self.plan_trip(request, output, pool)
+        return outputs
+
+    def plan_trip(self, request, output, pool):
+        """Per-day itinerary (planner.py) of one request from its ranked candidates.
+
+        `pool` maps each bucket to its (candidate positions, scores, rank_rows picks);
+        planned items reuse the result dicts of `output` where they were shown.
+        """
+        distances = self.city_distances
+        if distances is None:
+            return []
+        ranked, where = {}, {}
+        for key, bucket, _, _ in OUTPUT_BUCKETS:
+            candidate_idx, scores, picks = pool[bucket]
+            picks = picks[picks >= 0]
+            ranked[bucket] = candidate_idx[picks]
+            for rank, c in enumerate(picks.tolist()):
+                where.setdefault(int(candidate_idx[c]), (output[key], rank, float(scores[c])))
+
+        def result(pos):
+            results, rank, score = where[pos]
+            return results[rank] if rank < len(results) else dict(self.items.record(pos), priority_score=score)
+
+        events = ranked[BUCKET_EVENT]
+        plan = plan_itinerary(distances, trip_days(parse_day(request["start_date"]), parse_day(request["end_date"])),
+                              ranked[BUCKET_HOTEL], ranked[BUCKET_SPOT], ranked[BUCKET_FOOD],
+                              events.tolist(), self.items.start_day[events], self.items.end_day[events])
+        return [dict(day, hotel=None if day["hotel"] is None else result(day["hotel"]),
+                     stops=[result(pos) for pos in day["stops"]], events=[result(pos) for pos in day["events"]])
+                for day in plan]
+
+    def filter_events_by_date(self, requests, candidate_idx):
+        """(n_requests, k) mask of candidate events overlapping each request's trip dates."""
+        start = [parse_day(r["start_date"]) for r in requests]
+        end = [parse_day(r["end_date"]) for r in requests]
+        return date_overlap_mask(self.items, candidate_idx, start, end)
+
+    def score_candidates(self, requests, candidate_idx, sim_scores):
+        """Hybrid score for a (n_requests, k) block of candidates."""
+        # Proximity (geo / KG), one vectorized lookup per distinct destination
+        proximity = np.zeros(candidate_idx.shape)
+        rows_by_dest = {}
+        for i, r in enumerate(requests):
+            rows_by_dest.setdefault(r["destination"], []).append(i)
+        with METRICS.span("kg_proximity"):
+            for dest, rows in rows_by_dest.items():
+                proximity[rows] = self.compute_proximity_scores(dest, candidate_idx[rows])
+
+        # CF popularity (simple: norm of item_factors)
+        cf_scores = 0 #np.linalg.norm(item_factors[candidate_idx], axis=1)
+
+        # Weighted hybrid score
+        return (
+            W_CONTENT * sim_scores
+            + W_KG * proximity
+            + W_CF * cf_scores
+        )
+
+    def _results(self, candidate_idx, final_scores, picks):
+        """Fresh result dicts for one request's picked candidate columns (rank_rows)."""
+        items = self.items
+        return [dict(items.record(int(candidate_idx[c])), priority_score=float(final_scores[c]))
+                for c in picks.tolist() if c >= 0]
+
+# === Shared engine ===
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine():
+    """Return the process-wide Recommender, creating it on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = Recommender()
+    return _engine
+
 def recommend_trip(input_json):
-    """Main hybrid recommendation function."""
-    print(f"Running recommendation for: {input_json}")
-
-    qids = [item_map[str(i)]["qid"] for i in range(n_items)]
-    labels, sim_scores = compute_content_similarity(input_json)
-
-    # Subset of candidates (top 200 by content)
-    candidate_idx = labels[:] #labels[:200]
-    candidate_qids = [item_map[str(i)]["qid"] for i in candidate_idx]
-
-    # KG proximity
-    kg_scores = compute_kg_proximity_scores(input_json["destination"], candidate_qids)
-
-    # CF popularity (simple: norm of item_factors)
-    cf_scores = 0 #np.linalg.norm(item_factors[candidate_idx], axis=1)
-
-    # Weighted hybrid score
-    final_scores = (
-        W_CONTENT * sim_scores[:len(candidate_idx)]
-        + W_KG * kg_scores
-        + W_CF * cf_scores
-    )
-
-    # Compose structured results
-    results = []
-    for i, idx in enumerate(candidate_idx):
-        info = item_map[str(idx)]
-        info["priority_score"] = float(final_scores[i])
-        results.append(info)
-
-    # Split by type
-    spots = [r for r in results if (r["type"] == "place") and ("hotel" not in str(r["meta"].get("type", "")).lower())]
-    hotels = [r for r in results if "hotel" in str(r["meta"].get("type", "")).lower()]
-    foods = [r for r in results if r["type"] == "food"]
-    events = [r for r in results if r["type"] == "event"]
-    events = filter_events_by_date(events, input_json["start_date"], input_json["end_date"])
-
-
-    def dedup_by_label(lst):
-        seen = set()
-        deduped = []
-        for item in lst:
-            key = item["label"].strip().lower()
-            if key not in seen:
-                seen.add(key)
-                deduped.append(item)
-        return deduped
-
-    def topk(lst, k): 
-        lst = dedup_by_label(lst)
-        return sorted(lst, key=lambda x: x["priority_score"], reverse=True)[:k]
-
-    output = {
-        "recommended_spots": topk(spots, 10),
-        "hotels": topk(hotels, 5),
-        "food": topk(foods, 10),
-        "cultural_events": topk(events, 5)
-    }
+    """Main hybrid recommendation function (uses the shared engine)."""
+    return get_engine().recommend_trip(input_json)
 
-    return output
+def recommend_trips(requests, num_threads=-1):
+    """Batched recommend_trip (uses the shared engine)."""
+    return get_engine().recommend_trips(requests, num_threads=num_threads)
 
 # === CLI Runner ===
 if __name__ == "__main__":
@@ -229,10 +921,19 @@ if __name__ == "__main__":
         "veg/non-veg": args.diet
     }
 
-    output = recommend_trip(input_json)
+    output = get_engine().warm().recommend_trip(input_json)
 
     print("\n=== Recommended Trip Plan ===")
     for k, v in output.items():
+        if k == ITINERARY_KEY:
+            continue
         print(f"\n{k.upper()}:")
         for item in v:
             print(f" - {item['label']} ({item['qid']}) [score={item['priority_score']:.3f}]")
+
+    print(f"\n{ITINERARY_KEY.upper()}:")
+    for day in output[ITINERARY_KEY]:
+        hotel = day["hotel"]["label"] if day["hotel"] else "-"
+        print(f" Day {day['day']} ({day['date'] or 'no date'}), hotel: {hotel}, {day['distance_km']} km")
+        for item in day["stops"] + day["events"]:
+            print(f"   - {item['label']} ({item['qid']})")
@@ -0,0 +1,198 @@
+"""
+ingest.py
+Single ingestion step for the catalog CSVs, shared by kg_build.py and train.py.
+
+items.csv, events.csv and food.csv are parsed once, streamed in chunks of
+CHUNK_ROWS rows, normalized with one set of rules and written as a
+columnar catalog. Consumers read it back chunk by chunk (Catalog.records()),
+so neither ingestion nor reading holds the whole CSV in memory.
+
+Normalization rules (applied to every consumer):
+---------
+- every row needs a name
+- city = City column; food rows without one fall back to Cuisine
+- places and events without a city are skipped (food may have none)
+- place Type is lower-cased; lat/lon are floats (None if missing/invalid)
+
+Layout (artifacts/catalog/):
+---------
+tables.json           n_rows, chunk count, source fingerprints and the code
+                      tables (kinds, cities, types, cuisines, diets)
+chunk_<n>.npz         one chunk of rows:
+    kind, city, type, cuisine, diet   int32 codes into the tables
+    lat, lon                          float64 (NaN = missing)
+    <field>_offsets, <field>_blob     for field in TEXT_FIELDS
+
+Usage:
+    python ingest.py            # (re)build artifacts/catalog/
+"""
+
+import os
+import csv
+import glob
+import json
+import argparse
+
+import numpy as np
+
+from item_store import encode_strings, decode_strings
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+DATA_DIR = os.path.join(ROOT, "data")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+ITEMS_CSV = os.path.join(DATA_DIR, "items.csv")
+EVENTS_CSV = os.path.join(DATA_DIR, "events.csv")
+FOOD_CSV = os.path.join(DATA_DIR, "food.csv")
+CATALOG_DIR = os.path.join(ART_DIR, "catalog")
+
+# (kind, csv path, encoding) in catalog order
+SOURCES = (
+    ("place", ITEMS_CSV, "utf-8-sig"),
+    ("event", EVENTS_CSV, "utf-8"),
+    ("food", FOOD_CSV, "utf-8"),
+)
+KINDS = tuple(kind for kind, _, _ in SOURCES)
+
+CODE_FIELDS = ("city", "type", "cuisine", "diet")
+TEXT_FIELDS = ("name", "description", "location", "start", "end", "image")
+CHUNK_ROWS = 50_000
+
+def _text(r, key):
+    return (r.get(key) or "").strip()
+
+def _coord(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+def normalize(kind, r):
+    """One CSV row as a normalized record, or None if the row is dropped."""
+    if kind == "place":
+        rec = {"name": _text(r, "Name"), "city": _text(r, "City"), "type": _text(r, "Type").lower(),
+               "description": _text(r, "Description"),
+               "lat": _coord(r.get("Latitude")), "lon": _coord(r.get("Longitude"))}
+    elif kind == "event":
+        rec = {"name": _text(r, "Festival Name"), "city": _text(r, "City"), "location": _text(r, "Location"),
+               "start": _text(r, "Start Date"), "end": _text(r, "End Date")}
+    else:
+        cuisine = _text(r, "Cuisine")
+        rec = {"name": _text(r, "Name"), "city": _text(r, "City") or cuisine, "cuisine": cuisine,
+               "description": _text(r, "Description"), "diet": _text(r, "Diet"),
+               "image": _text(r, "Image_link"),
+               "lat": _coord(r.get("Latitude")), "lon": _coord(r.get("Longitude"))}
+    if not rec["name"] or (kind != "food" and not rec["city"]):
+        return None
+    rec["kind"] = kind
+    return rec
+
+def iter_csv_records(sources=SOURCES):
+    """Stream normalized records straight from the CSVs (no catalog on disk)."""
+    for kind, path, encoding in sources:
+        if not os.path.exists(path):
+            print(f"[warn] {path} not found.")
+            continue
+        with open(path, newline="", encoding=encoding) as f:
+            for r in csv.DictReader(f):
+                rec = normalize(kind, r)
+                if rec is not None:
+                    yield rec
+
+def _fingerprint(sources):
+    out = {}
+    for _, path, _ in sources:
+        st = os.stat(path) if os.path.exists(path) else None
+        out[os.path.basename(path)] = None if st is None else [st.st_mtime_ns, st.st_size]
+    return out
+
+def _write_chunk(path, n, rows, tables):
+    cols = {"kind": np.array([KINDS.index(r["kind"]) for r in rows], dtype=np.int32)}
+    for field in CODE_FIELDS:
+        table = tables[field]
+        cols[field] = np.array([table.setdefault(r.get(field, ""), len(table)) for r in rows], dtype=np.int32)
+    for field in ("lat", "lon"):
+        cols[field] = np.array([r.get(field, float("nan")) for r in rows], dtype=np.float64)
+    for field in TEXT_FIELDS:
+        cols[f"{field}_offsets"], cols[f"{field}_blob"] = encode_strings([r.get(field, "") for r in rows])
+    np.savez(os.path.join(path, f"chunk_{n:05d}.npz"), **cols)
+
+def ingest(path=CATALOG_DIR, sources=SOURCES, chunk_rows=CHUNK_ROWS):
+    """Parse the CSVs once and write the columnar catalog. Returns the row count."""
+    os.makedirs(path, exist_ok=True)
+    for old in glob.glob(os.path.join(path, "chunk_*.npz")) + glob.glob(os.path.join(path, "tables.json")):
+        os.remove(old)
+
+    tables = {field: {"": 0} for field in CODE_FIELDS}
+    n_rows, n_chunks, rows = 0, 0, []
+    for rec in iter_csv_records(sources):
+        rows.append(rec)
+        if len(rows) == chunk_rows:
+            _write_chunk(path, n_chunks, rows, tables)
+            n_rows, n_chunks, rows = n_rows + len(rows), n_chunks + 1, []
+    if rows:
+        _write_chunk(path, n_chunks, rows, tables)
+        n_rows, n_chunks = n_rows + len(rows), n_chunks + 1
+
+    # Written last: a catalog without tables.json is incomplete
+    with open(os.path.join(path, "tables.json"), "w", encoding="utf-8") as f:
+        json.dump({"n_rows": n_rows, "n_chunks": n_chunks, "sources": _fingerprint(sources),
+                   "kinds": list(KINDS), **{field: list(t) for field, t in tables.items()}},
+                  f, ensure_ascii=False)
+    return n_rows
+
+class Catalog:
+    """Reader for a catalog written by ingest()."""
+
+    def __init__(self, path=CATALOG_DIR):
+        with open(os.path.join(path, "tables.json"), "r", encoding="utf-8") as f:
+            self.tables = json.load(f)
+        self.path = path
+        self.n_rows = self.tables["n_rows"]
+        self.n_chunks = self.tables["n_chunks"]
+
+    def __len__(self):
+        return self.n_rows
+
+    def chunks(self):
+        """Column dicts, one per chunk: code fields decoded to strings, text fields as lists."""
+        for n in range(self.n_chunks):
+            with np.load(os.path.join(self.path, f"chunk_{n:05d}.npz")) as z:
+                cols = {"kind": [self.tables["kinds"][k] for k in z["kind"].tolist()]}
+                for field in CODE_FIELDS:
+                    table = self.tables[field]
+                    cols[field] = [table[c] for c in z[field].tolist()]
+                for field in ("lat", "lon"):
+                    cols[field] = z[field]
+                for field in TEXT_FIELDS:
+                    cols[field] = decode_strings(z[f"{field}_offsets"], z[f"{field}_blob"])
+            yield cols
+
+    def records(self):
+        """Normalized records (dicts with every field; missing lat/lon are None), in CSV order."""
+        fields = ("kind",) + CODE_FIELDS + TEXT_FIELDS + ("lat", "lon")
+        for cols in self.chunks():
+            coords = [[None if v != v else v for v in cols[f].tolist()] for f in ("lat", "lon")]
+            for values in zip(*(cols[f] for f in fields[:-2]), *coords):
+                yield dict(zip(fields, values))
+
+def load_catalog(path=CATALOG_DIR, sources=SOURCES):
+    """The catalog at `path`, re-ingesting first if it is missing or the CSVs changed."""
+    tables_path = os.path.join(path, "tables.json")
+    fresh = False
+    if os.path.exists(tables_path):
+        with open(tables_path, "r", encoding="utf-8") as f:
+            fresh = json.load(f).get("sources") == _fingerprint(sources)
+    if not fresh:
+        n = ingest(path, sources)
+        print(f"Ingested catalog: {n} rows -> {path}")
+    return Catalog(path)
+
+# === Run ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest the catalog CSVs into a columnar catalog")
+    parser.add_argument("--chunk_rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+    n = ingest(chunk_rows=args.chunk_rows)
+    print(f"✅ Catalog saved: {CATALOG_DIR} ({n} rows)")
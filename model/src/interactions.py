@@ -0,0 +1,118 @@
+"""
+interactions.py
+User x item interaction matrices (scipy CSR, users x items) for the
+collaborative factors in train.py.
+
+- synthetic_interactions(): popularity-biased synthetic users, generated a
+  block of users at a time with NumPy. Each user gets k distinct items,
+  drawn like np.random.choice(replace=False, p=popularity): a stream of
+  draws with replacement (inverse CDF, searchsorted) of which the first k
+  distinct items are kept.
+- load_interaction_log(): a real log (data/interactions.csv with columns
+  user, qid[, weight]) in the same CSR form; repeated (user, item) pairs
+  are summed and qids that are not in the catalog are skipped.
+
+train.py uses the log when it exists and falls back to synthetic users.
+"""
+
+import os
+import csv
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+DATA_DIR = os.path.join(ROOT, "data")
+
+INTERACTIONS_CSV = os.path.join(DATA_DIR, "interactions.csv")
+
+# Synthetic users
+NUM_SYN_USERS = 1200
+MIN_ITEMS_PER_USER = 5
+MAX_ITEMS_PER_USER = 25
+MAX_WEIGHT = 4          # implicit feedback weight in 1..MAX_WEIGHT
+TYPE_POPULARITY = {"place": 1.4, "event": 1.2, "food": 0.9}
+CHUNK_USERS = 65536     # users sampled per block
+
+def item_popularity(items, seed=42):
+    """Sampling distribution over items: a per-type base weight plus a random bump."""
+    base = np.array([TYPE_POPULARITY.get(it.get("type", ""), 1.0) for it in items], dtype=np.float32)
+    bumps = np.random.RandomState(seed).rand(len(items)) * 0.5
+    popularity = base + bumps
+    return popularity / popularity.sum()
+
+def _first_distinct(draws):
+    """Mask of the first occurrence of every value in each row of `draws`."""
+    order = np.argsort(draws, axis=1, kind="stable")
+    ranked = np.take_along_axis(draws, order, axis=1)
+    first_sorted = np.ones(draws.shape, dtype=bool)
+    first_sorted[:, 1:] = ranked[:, 1:] != ranked[:, :-1]
+    first = np.empty(draws.shape, dtype=bool)
+    np.put_along_axis(first, order, first_sorted, axis=1)
+    return first
+
+def _sample_rows(cdf, counts, rng):
+    """Items of each user, concatenated (counts[u] distinct items for user u)."""
+    n_items = cdf.size
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    out = np.empty(int(counts.sum()), dtype=np.int64)
+    todo = np.arange(counts.size)
+    width = int(counts.max()) + 8 if counts.size else 0
+    while todo.size:
+        draws = np.searchsorted(cdf, rng.random((todo.size, width)), side="right")
+        np.minimum(draws, n_items - 1, out=draws)
+        first = _first_distinct(draws)
+        rank = np.cumsum(first, axis=1)
+        keep = first & (rank <= counts[todo, None])
+        done = rank[:, -1] >= counts[todo]
+        keep &= done[:, None]
+        out[(starts[todo, None] + rank - 1)[keep]] = draws[keep]
+        # Rows with too many repeats are redrawn with a longer stream
+        todo = todo[~done]
+        width *= 2
+    return out
+
+def synthetic_interactions(popularity, num_users=NUM_SYN_USERS, min_per_user=MIN_ITEMS_PER_USER,
+                           max_per_user=MAX_ITEMS_PER_USER, seed=42, chunk_users=CHUNK_USERS):
+    """(num_users x n_items) float32 CSR of synthetic implicit feedback."""
+    popularity = np.asarray(popularity, dtype=np.float64)
+    n_items = popularity.size
+    rng = np.random.default_rng(seed)
+    cdf = np.cumsum(popularity)
+    cdf /= cdf[-1]
+
+    counts = np.minimum(rng.integers(min_per_user, max_per_user + 1, size=num_users), n_items)
+    indptr = np.zeros(num_users + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    indices = np.empty(indptr[-1], dtype=np.int32)
+    for lo in range(0, num_users, chunk_users):
+        hi = min(lo + chunk_users, num_users)
+        indices[indptr[lo]:indptr[hi]] = _sample_rows(cdf, counts[lo:hi], rng)
+    data = rng.integers(1, MAX_WEIGHT + 1, size=indices.size).astype(np.float32)
+
+    mat = csr_matrix((data, indices, indptr), shape=(num_users, n_items))
+    mat.sort_indices()
+    return mat
+
+def load_interaction_log(path, qid_to_idx, n_items):
+    """(n_users x n_items) float32 CSR from a CSV log with columns user, qid[, weight]."""
+    user_codes = {}
+    users, cols, weights = [], [], []
+    skipped = 0
+    with open(path, newline="", encoding="utf-8") as f:
+        for r in csv.DictReader(f):
+            col = qid_to_idx.get((r.get("qid") or "").strip())
+            if col is None:
+                skipped += 1
+                continue
+            users.append(user_codes.setdefault(r["user"], len(user_codes)))
+            cols.append(col)
+            weights.append(float(r.get("weight") or 1.0))
+    if skipped:
+        print(f"[warn] {skipped} interactions with unknown qids skipped.")
+    # csr_matrix sums duplicate (user, item) entries
+    mat = csr_matrix((np.array(weights, dtype=np.float32), (np.array(users, dtype=np.int64),
+                      np.array(cols, dtype=np.int64))), shape=(len(user_codes), n_items))
+    mat.sum_duplicates()
+    return mat
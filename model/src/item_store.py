@@ -0,0 +1,231 @@
+"""
+item_store.py
+Columnar, memory-mappable store for item metadata (replaces item_map.json).
+
+Layout (artifacts/item_store/):
+---------
+tables.json              n_items + small string tables (kinds, subtypes, cities)
+kind.npy                 uint8   index into KINDS (place / event / food)
+subtype.npy              int32   index into subtypes (place Type, "" = none)
+city.npy                 int32   index into cities
+start_day.npy, end_day.npy
+                         int32   event dates as days since 1970-01-01 (NO_DAY = none)
+bucket.npy               int8    output bucket (BUCKET_*, -1 = none)
+label_id.npy             int32   id of the normalized label (label_key); equal ids = duplicates
+<field>_offsets.npy      int64   n_items + 1 byte offsets into <field>_blob.npy
+<field>_blob.npy         uint8   UTF-8 bytes of every value, back to back
+    for field in STRING_FIELDS (qid, label, description, meta)
+
+`meta` holds the remaining per-item metadata as JSON (without description).
+Arrays are opened with mmap, so load time does not depend on the catalog
+size and worker processes share one page-cache copy.
+
+Usage (convert a legacy item_map.json; flat artifact sets only):
+    python item_store.py
+"""
+
+import os
+import json
+from datetime import datetime, date, timedelta
+
+import numpy as np
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+ITEM_STORE_DIR = os.path.join(ART_DIR, "item_store")
+LEGACY_ITEM_MAP = os.path.join(ART_DIR, "item_map.json")
+
+KINDS = ("place", "event", "food")
+STRING_FIELDS = ("qid", "label", "description", "meta")
+
+# Accepted date formats (events.csv uses ISO, the CLI uses "20 Oct 2025")
+DATE_FORMATS = ("%Y-%m-%d", "%d %b %Y", "%d %B %Y")
+NO_DAY = np.iinfo(np.int32).min
+_EPOCH = date(1970, 1, 1)
+
+# Output buckets (recommend_trip sections); names are used in artifact file names
+BUCKET_SPOT, BUCKET_HOTEL, BUCKET_FOOD, BUCKET_EVENT = 0, 1, 2, 3
+BUCKET_NAMES = ("spot", "hotel", "food", "event")
+
+def parse_day(value):
+    """Day number (days since 1970-01-01) of a date string, or NO_DAY if it doesn't parse."""
+    value = (value or "").strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return (datetime.strptime(value, fmt).date() - _EPOCH).days
+        except ValueError:
+            pass
+    return NO_DAY
+
+def format_day(day):
+    """ISO date of a parse_day() day number ("" for NO_DAY)."""
+    return "" if day == NO_DAY else (_EPOCH + timedelta(days=int(day))).isoformat()
+
+def label_key(label):
+    """Normalized label used to dedup results: "Fort Kochi " and "fort kochi" are one item."""
+    return (label or "").strip().lower()
+
+def _code_table(values):
+    """Return (codes, table) for a list of strings; "" is always code 0."""
+    table = {"": 0}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, v in enumerate(values):
+        codes[i] = table.setdefault(v, len(table))
+    return codes, list(table)
+
+def encode_strings(values):
+    """(offsets, blob) arrays holding `values` as UTF-8 bytes back to back."""
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+def decode_strings(offsets, blob):
+    """Inverse of encode_strings(): the list of all values."""
+    data, bounds = blob.tobytes(), offsets.tolist()
+    return [data[lo:hi].decode("utf-8") for lo, hi in zip(bounds, bounds[1:])]
+
+def save_strings(path, name, values):
+    """Write a string column as <name>_offsets.npy + <name>_blob.npy."""
+    offsets, blob = encode_strings(values)
+    np.save(os.path.join(path, f"{name}_offsets.npy"), offsets)
+    np.save(os.path.join(path, f"{name}_blob.npy"), blob)
+
+def load_strings(path, name, mmap_mode="r"):
+    """(offsets, blob) of a string column written by save_strings()."""
+    return (np.load(os.path.join(path, f"{name}_offsets.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, f"{name}_blob.npy"), mmap_mode=mmap_mode))
+
+def write_item_store(items, path=ITEM_STORE_DIR):
+    """Write train.py item dicts (qid, label, type, city, meta) as a columnar store."""
+    os.makedirs(path, exist_ok=True)
+
+    metas = [dict(it.get("meta") or {}) for it in items]
+    descriptions = [m.pop("description", "") or "" for m in metas]
+
+    kind = np.array([KINDS.index(it["type"]) for it in items], dtype=np.uint8)
+    subtype, subtypes = _code_table([str(m.get("type") or "") for m in metas])
+    city, cities = _code_table([it.get("city") or "" for it in items])
+
+    np.save(os.path.join(path, "kind.npy"), kind)
+    np.save(os.path.join(path, "subtype.npy"), subtype)
+    np.save(os.path.join(path, "city.npy"), city)
+    np.save(os.path.join(path, "start_day.npy"), np.array([parse_day(m.get("start")) for m in metas], dtype=np.int32))
+    np.save(os.path.join(path, "end_day.npy"), np.array([parse_day(m.get("end")) for m in metas], dtype=np.int32))
+    np.save(os.path.join(path, "bucket.npy"), _bucket_codes(kind, subtype, subtypes))
+    np.save(os.path.join(path, "label_id.npy"), _code_table([label_key(it.get("label")) for it in items])[0])
+
+    save_strings(path, "qid", [it["qid"] for it in items])
+    save_strings(path, "label", [it.get("label") or "" for it in items])
+    save_strings(path, "description", descriptions)
+    save_strings(path, "meta", [json.dumps(m, ensure_ascii=False) for m in metas])
+
+    # Written last: a store without tables.json is incomplete
+    with open(os.path.join(path, "tables.json"), "w", encoding="utf-8") as f:
+        json.dump({"n_items": len(items), "kinds": list(KINDS),
+                   "subtypes": subtypes, "cities": cities}, f, ensure_ascii=False)
+
+class ItemStore:
+    """Read-only view over a store written by write_item_store()."""
+
+    def __init__(self, path=ITEM_STORE_DIR, mmap=True):
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "tables.json"), "r", encoding="utf-8") as f:
+            tables = json.load(f)
+        self.path = path
+        self.n_items = tables["n_items"]
+        self.kinds = tables["kinds"]
+        self.subtypes = tables["subtypes"]
+        self.cities = tables["cities"]
+
+        self.kind = np.load(os.path.join(path, "kind.npy"), mmap_mode=mode)
+        self.subtype = np.load(os.path.join(path, "subtype.npy"), mmap_mode=mode)
+        self.city = np.load(os.path.join(path, "city.npy"), mmap_mode=mode)
+        self.start_day = np.load(os.path.join(path, "start_day.npy"), mmap_mode=mode)
+        self.end_day = np.load(os.path.join(path, "end_day.npy"), mmap_mode=mode)
+        self._strings = {name: load_strings(path, name, mode) for name in STRING_FIELDS}
+        # Stores written before bucket / label ids were precomputed: derive them here
+        if os.path.exists(os.path.join(path, "bucket.npy")):
+            self.bucket = np.load(os.path.join(path, "bucket.npy"), mmap_mode=mode)
+        else:
+            self.bucket = _bucket_codes(self.kind, self.subtype, self.subtypes)
+        if os.path.exists(os.path.join(path, "label_id.npy")):
+            self.label_id = np.load(os.path.join(path, "label_id.npy"), mmap_mode=mode)
+        else:
+            labels = decode_strings(*self._strings["label"])
+            self.label_id = _code_table([label_key(label) for label in labels])[0]
+
+    def __len__(self):
+        return self.n_items
+
+    def string(self, field, i):
+        offsets, blob = self._strings[field]
+        return blob[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def qid(self, i):
+        return self.string("qid", i)
+
+    def label(self, i):
+        return self.string("label", i)
+
+    def record(self, i):
+        """Item i in the legacy item_map.json entry format."""
+        meta = json.loads(self.string("meta", i))
+        meta["description"] = self.string("description", i)
+        return {
+            "qid": self.qid(i),
+            "label": self.label(i),
+            "type": self.kinds[self.kind[i]],
+            "city": self.cities[self.city[i]],
+            "meta": meta,
+        }
+
+def date_overlap_mask(store, item_idx, start_day, end_day):
+    """True where item's [start_day, end_day] overlaps the query window.
+
+    `item_idx` is (n, k); `start_day`/`end_day` are per-row query days. Items
+    without dates never match; rows whose query dates are NO_DAY match everything.
+    A window ending before it starts is its start day (as planner.trip_days).
+    """
+    item_idx = np.asarray(item_idx, dtype=np.int64)
+    q_start = np.asarray(start_day, dtype=np.int64).reshape(-1, 1)
+    q_end = np.asarray(end_day, dtype=np.int64).reshape(-1, 1)
+    unfiltered = (q_start == NO_DAY) | (q_end == NO_DAY)
+    q_end = np.maximum(q_end, q_start)
+    starts = store.start_day[item_idx]
+    ends = store.end_day[item_idx]
+    mask = (starts != NO_DAY) & (ends != NO_DAY) & (starts <= q_end) & (ends >= q_start)
+    return mask | unfiltered
+
+def _bucket_codes(kind, subtype, subtypes):
+    buckets = np.full(len(kind), -1, dtype=np.int8)
+    buckets[kind == KINDS.index("place")] = BUCKET_SPOT
+    buckets[kind == KINDS.index("food")] = BUCKET_FOOD
+    buckets[kind == KINDS.index("event")] = BUCKET_EVENT
+    is_hotel = np.array(["hotel" in t.lower() for t in subtypes], dtype=bool)
+    buckets[is_hotel[subtype]] = BUCKET_HOTEL
+    return buckets
+
+def bucket_codes(store):
+    """Output bucket of every item (BUCKET_*); hotels are items whose type mentions 'hotel'."""
+    return np.asarray(store.bucket)
+
+def convert_item_map(item_map_path=LEGACY_ITEM_MAP, path=ITEM_STORE_DIR):
+    """Build an item store from a legacy item_map.json."""
+    with open(item_map_path, "r", encoding="utf-8") as f:
+        item_map = json.load(f)
+    items = [item_map[str(i)] for i in range(len(item_map))]
+    write_item_store(items, path)
+    return len(items)
+
+# === Run ===
+if __name__ == "__main__":
+    from artifact_versions import current_version
+
+    if current_version(ART_DIR) is not None:
+        raise SystemExit("artifacts/ is versioned: train.py writes the item store into every version. "
+                         "item_map.json conversion only applies to flat (pre-versioning) artifact sets.")
+    n = convert_item_map()
+    print(f"✅ Item store saved: {ITEM_STORE_DIR} ({n} items)")
@@ -12,25 +12,32 @@ Design:
     - Cultural Events
 - Also captures cuisines, diets, and types.
 
+Input:
+---------
+artifacts/catalog/ (see ingest.py; re-ingested from data/*.csv when stale)
+
 Output:
 ---------
-artifacts/kg_graph.pkl
+artifacts/kg_graph.pkl    pickled nx.DiGraph with all node attributes
+artifacts/kg_csr/         compact CSR arrays for serving/training (see kg_csr.py)
+artifacts/city_index.json city-name resolver over the city nodes (see city_index.py)
+artifacts/city_routes.npz all-pairs paths over the city backbone (see city_routes.py)
 """
 
 import os
-import csv
 import pickle
 import networkx as nx
 
+from city_index import CITY_INDEX_OUT, build_city_index, save_city_index
+from city_routes import CITY_ROUTES_OUT, build_city_routes, save_city_routes
+from ingest import CATALOG_DIR, load_catalog
+from kg_csr import KG_CSR_DIR, write_kg_csr
+
 # === Paths ===
 ROOT = os.path.join(os.path.dirname(__file__), "..")
-DATA_DIR = os.path.join(ROOT, "data")
 ART_DIR = os.path.join(ROOT, "artifacts")
 os.makedirs(ART_DIR, exist_ok=True)
 
-ITEMS_CSV = os.path.join(DATA_DIR, "items.csv")
-EVENTS_CSV = os.path.join(DATA_DIR, "events.csv")
-FOOD_CSV = os.path.join(DATA_DIR, "food.csv")
 KG_OUT = os.path.join(ART_DIR, "kg_graph.pkl")
 
 # === Define ordered city sequences for each district ===
@@ -89,30 +96,28 @@ def add_city_backbone(G):
             G.add_edge(c1, c2, rel="nearby")
             G.add_edge(c2, c1, rel="nearby")  # bidirectional
 
-def build_kg():
+def build_graph(records):
+    """The KG DiGraph of normalized catalog records (ingest.py)."""
     G = nx.DiGraph()
     add_city_backbone(G)
 
-    # --- ITEMS (places, attractions, hotels) ---
-    with open(ITEMS_CSV, newline='', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            city = r['City'].strip()
-            name = r['Name'].strip()
-            type_ = (r.get('Type') or "").strip().lower()
-            desc = (r.get('Description') or "").strip()
-            lat, lon = r.get('Latitude'), r.get('Longitude')
+    def add_city(city):
+        city_id = f"city:{city}"
+        if not G.has_node(city_id):
+            G.add_node(city_id, label=city, node_type="city")
+        return city_id
 
-            if not city or not name:
-                continue
+    for r in records:
+        name, city = r["name"], r["city"]
 
-            city_id = f"city:{city}"
-            if not G.has_node(city_id):
-                G.add_node(city_id, label=city, node_type="city")
+        # --- ITEMS (places, attractions, hotels) ---
+        if r["kind"] == "place":
+            type_ = r["type"]
+            city_id = add_city(city)
 
             place_id = f"place:{name}"
             G.add_node(place_id, label=name, node_type="place",
-                       description=desc, lat=lat, lon=lon)
+                       description=r["description"], lat=r["lat"], lon=r["lon"])
 
             # Link to city
             G.add_edge(place_id, city_id, rel="located_in")
@@ -128,47 +133,23 @@ def build_kg():
             if "hotel" in type_:
                 G.nodes[place_id]["node_type"] = "hotel"
 
-    # --- EVENTS ---
-    with open(EVENTS_CSV, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            name = r['Festival Name'].strip()
-            city = r['City'].strip()
-            location = (r.get('Location') or "").strip()
-            start = (r.get('Start Date') or "").strip()
-            end = (r.get('End Date') or "").strip()
-
-            if not name or not city:
-                continue
-
-            city_id = f"city:{city}"
-            if not G.has_node(city_id):
-                G.add_node(city_id, label=city, node_type="city")
+        # --- EVENTS ---
+        elif r["kind"] == "event":
+            city_id = add_city(city)
 
             event_id = f"event:{name}"
             G.add_node(event_id, label=name, node_type="event",
-                       location=location, start=start, end=end)
+                       location=r["location"], start=r["start"], end=r["end"])
 
             G.add_edge(event_id, city_id, rel="happens_in")
 
-    # --- FOOD ---
-    with open(FOOD_CSV, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            name = r['Name'].strip()
-            desc = (r.get('Description') or "").strip()
-            cuisine = (r.get('Cuisine') or "").strip()
-            city = (r.get('City') or "").strip() or (r.get('Cuisine') or "").strip()
-            diet = (r.get('Diet') or "").strip()
-            img = (r.get('Image_link') or "").strip()
-            lat, lon = r.get('Latitude'), r.get('Longitude')
-
-            if not name:
-                continue
+        # --- FOOD ---
+        else:
+            cuisine, diet = r["cuisine"], r["diet"]
 
             food_id = f"food:{name}"
-            G.add_node(food_id, label=name, node_type="food",
-                       description=desc, diet=diet, image=img, lat=lat, lon=lon)
+            G.add_node(food_id, label=name, node_type="food", description=r["description"],
+                       diet=diet, image=r["image"], lat=r["lat"], lon=r["lon"])
 
             # Cuisine node
             if cuisine:
@@ -186,16 +167,25 @@ def build_kg():
 
             # City linkage
             if city:
-                city_id = f"city:{city}"
-                if not G.has_node(city_id):
-                    G.add_node(city_id, label=city, node_type="city")
-                G.add_edge(food_id, city_id, rel="available_in")
+                G.add_edge(food_id, add_city(city), rel="available_in")
+
+    return G
+
+def build_kg():
+    G = build_graph(load_catalog(CATALOG_DIR).records())
 
     # --- Save KG ---
     with open(KG_OUT, "wb") as f:
         pickle.dump(G, f)
-
-    print(f"✅ Knowledge Graph saved: {KG_OUT}")
+    write_kg_csr(G, KG_CSR_DIR)
+    cities = [n[len("city:"):] for n, t in G.nodes(data="node_type") if t == "city"]
+    save_city_index(CITY_INDEX_OUT, build_city_index(cities))
+    nearby = [(u[len("city:"):], v[len("city:"):]) for u, v, rel in G.edges(data="rel") if rel == "nearby"]
+    routes = build_city_routes(nearby)
+    save_city_routes(CITY_ROUTES_OUT, routes)
+
+    print(f"✅ Knowledge Graph saved: {KG_OUT}, {KG_CSR_DIR}, {CITY_INDEX_OUT}, {CITY_ROUTES_OUT} "
+          f"({len(cities)} cities, {len(routes['cities'])} on the backbone)")
     print(f"Nodes: {G.number_of_nodes()} | Edges: {G.number_of_edges()}")
 
 # === Run ===
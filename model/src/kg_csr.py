@@ -0,0 +1,219 @@
+"""
+kg_csr.py
+Compact, memory-mappable form of the knowledge graph (CSR arrays).
+
+kg_build.py pickles an nx.DiGraph with per-node attribute dicts; everything
+downstream only needs node ids, node types, and typed edges. This module
+stores exactly that as flat arrays, so loading is a handful of np.load calls
+(mmap, no unpickling of ~10k Python objects) and traversals run on arrays.
+
+Layout (artifacts/kg_csr/):
+---------
+graph.json               n_nodes, n_edges, node_types and relations tables
+node_type.npy            uint8   index into node_types
+indptr.npy, indices.npy  int64 / int32   out-edges (CSR, targets sorted per row)
+rel.npy                  uint8   index into relations, aligned with indices.npy
+rev_indptr.npy, rev_indices.npy, rev_rel.npy
+                         same for in-edges (the reversed graph)
+<field>_offsets.npy, <field>_blob.npy
+                         string columns for field in (id, label)
+
+Usage:
+    from kg_csr import KGGraph
+    kg = KGGraph.load()
+    kg.neighbors("city:Kochi", reverse=True)          # items located in Kochi
+    kg.bfs(["city:Kochi"], max_hops=3, reverse=True)  # hop distance of every node
+"""
+
+import os
+import json
+
+import numpy as np
+
+from item_store import save_strings, load_strings, decode_strings
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+KG_CSR_DIR = os.path.join(ART_DIR, "kg_csr")
+
+def _csr(n_nodes, src, dst, rel):
+    """CSR arrays of edges src -> dst grouped by src, dst sorted within a row."""
+    order = np.lexsort((dst, src))
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n_nodes), out=indptr[1:])
+    return indptr, dst[order].astype(np.int32), rel[order].astype(np.uint8)
+
+def write_csr(path, node_ids, labels, node_type, node_types, src, dst, rel, relations):
+    """Write a graph given as arrays: per-node codes/strings and (src, dst, rel) edge codes."""
+    os.makedirs(path, exist_ok=True)
+    n_nodes = len(node_ids)
+    src, dst, rel = (np.asarray(a, dtype=np.int64) for a in (src, dst, rel))
+
+    arrays = {"node_type": np.asarray(node_type, dtype=np.uint8)}
+    arrays["indptr"], arrays["indices"], arrays["rel"] = _csr(n_nodes, src, dst, rel)
+    arrays["rev_indptr"], arrays["rev_indices"], arrays["rev_rel"] = _csr(n_nodes, dst, src, rel)
+    for name, arr in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), arr)
+    save_strings(path, "id", node_ids)
+    save_strings(path, "label", labels)
+
+    # Written last: a directory without graph.json is incomplete
+    with open(os.path.join(path, "graph.json"), "w", encoding="utf-8") as f:
+        json.dump({"n_nodes": n_nodes, "n_edges": len(src),
+                   "node_types": list(node_types), "relations": list(relations)}, f, ensure_ascii=False)
+
+def write_kg_csr(G, path=KG_CSR_DIR):
+    """Write a networkx DiGraph built by kg_build.py in the CSR layout."""
+    nodes = list(G.nodes)
+    index = {n: i for i, n in enumerate(nodes)}
+    node_types = {}
+    node_type = [node_types.setdefault(G.nodes[n].get("node_type", ""), len(node_types)) for n in nodes]
+
+    relations = {}
+    edges = list(G.edges(data="rel", default=""))
+    src = [index[u] for u, _, _ in edges]
+    dst = [index[v] for _, v, _ in edges]
+    rel = [relations.setdefault(r, len(relations)) for _, _, r in edges]
+
+    write_csr(path, [str(n) for n in nodes], [str(G.nodes[n].get("label", n)) for n in nodes],
+              node_type, node_types, src, dst, rel, relations)
+
+def _gather(indptr, indices, nodes):
+    """Concatenated CSR rows of `nodes`, plus the row length of each node."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), counts
+    # Position of each output edge = its row start + its offset within the row
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    return indices[np.repeat(starts, counts) + offsets].astype(np.int64), counts
+
+class KGGraph:
+    """Read-only knowledge graph over the arrays written by write_kg_csr().
+
+    Nodes are addressed by position (0..n_nodes-1); methods that take nodes
+    also accept node id strings such as "city:Kochi". `reverse=True`
+    follows edges backwards (e.g. city -> items located in it).
+    """
+
+    def __init__(self, path=KG_CSR_DIR, mmap=True):
+        mode = "r" if mmap else None
+        with open(os.path.join(path, "graph.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.n_nodes = meta["n_nodes"]
+        self.n_edges = meta["n_edges"]
+        self.node_types = meta["node_types"]
+        self.relations = meta["relations"]
+
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode)
+        self.node_type = load("node_type")
+        self.indptr, self.indices, self.rel = load("indptr"), load("indices"), load("rel")
+        self.rev_indptr, self.rev_indices, self.rev_rel = load("rev_indptr"), load("rev_indices"), load("rev_rel")
+        self._strings = {name: load_strings(path, name, mode) for name in ("id", "label")}
+        self._index = None
+
+    @classmethod
+    def load(cls, path=KG_CSR_DIR):
+        return cls(path)
+
+    def __len__(self):
+        return self.n_nodes
+
+    # === Node lookup ===
+    def _string(self, field, i):
+        offsets, blob = self._strings[field]
+        return blob[offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def node_id(self, i):
+        return self._string("id", i)
+
+    def label(self, i):
+        return self._string("label", i)
+
+    def node_ids(self):
+        return decode_strings(*self._strings["id"])
+
+    @property
+    def index(self):
+        """Node id -> position (built on first use)."""
+        if self._index is None:
+            self._index = {n: i for i, n in enumerate(self.node_ids())}
+        return self._index
+
+    def has_node(self, node_id):
+        return node_id in self.index
+
+    def _node(self, node):
+        return self.index[node] if isinstance(node, str) else int(node)
+
+    def _nodes(self, nodes):
+        if isinstance(nodes, (str, int, np.integer)):
+            nodes = [nodes]
+        if isinstance(nodes, np.ndarray) and nodes.dtype.kind in "iu":
+            return nodes.astype(np.int64)
+        return np.array([self._node(n) for n in nodes], dtype=np.int64)
+
+    def nodes_of_type(self, node_type):
+        """Positions of all nodes with the given node_type ("city", "place", ...)."""
+        if node_type not in self.node_types:
+            return np.empty(0, dtype=np.int64)
+        return np.flatnonzero(self.node_type == self.node_types.index(node_type))
+
+    # === Traversal ===
+    def _adjacency(self, reverse):
+        if reverse:
+            return self.rev_indptr, self.rev_indices, self.rev_rel
+        return self.indptr, self.indices, self.rel
+
+    def neighbors(self, node, rel=None, reverse=False):
+        """Positions of the out- (or in-) neighbours of `node`, optionally of one relation."""
+        indptr, indices, rels = self._adjacency(reverse)
+        i = self._node(node)
+        lo, hi = indptr[i], indptr[i + 1]
+        out = np.asarray(indices[lo:hi], dtype=np.int64)
+        if rel is not None:
+            code = self.relations.index(rel) if rel in self.relations else -1
+            out = out[rels[lo:hi] == code]
+        return out
+
+    def bfs(self, sources, max_hops=None, reverse=False, return_origin=False):
+        """Multi-source BFS: hop distance from the nearest source to every node.
+
+        Returns an int32 array of length n_nodes (-1 = unreachable within
+        `max_hops`). With `return_origin=True` also returns, per node, the
+        position of the source it was reached from (-1 = unreachable).
+        """
+        indptr, indices, _ = self._adjacency(reverse)
+        sources = np.unique(self._nodes(sources))
+        dist = np.full(self.n_nodes, -1, dtype=np.int32)
+        dist[sources] = 0
+        origin = None
+        if return_origin:
+            origin = np.full(self.n_nodes, -1, dtype=np.int64)
+            origin[sources] = sources
+
+        frontier, hop = sources, 0
+        while frontier.size and (max_hops is None or hop < max_hops):
+            hop += 1
+            if frontier.size == 1:
+                # Common case (leaf-heavy graph): plain slice, no gather
+                lo, hi = indptr[frontier[0]], indptr[frontier[0] + 1]
+                nbrs, counts = np.asarray(indices[lo:hi], dtype=np.int64), np.array([hi - lo])
+            else:
+                nbrs, counts = _gather(indptr, indices, frontier)
+            new = dist[nbrs] < 0
+            nbrs_new, first = np.unique(nbrs[new], return_index=True)
+            dist[nbrs_new] = hop
+            if return_origin:
+                origin[nbrs_new] = np.repeat(origin[frontier], counts)[new][first]
+            frontier = nbrs_new
+        return (dist, origin) if return_origin else dist
+
+    def k_hop(self, node, k, reverse=False):
+        """Positions of the nodes 1..k hops away from `node`."""
+        dist = self.bfs(node, max_hops=k, reverse=reverse)
+        return np.flatnonzero(dist > 0)
@@ -0,0 +1,145 @@
+"""
+kg_distances.py
+Precomputes KG hop distances from every item to every city node.
+
+Inference scores KG proximity from the shortest path length of a
+candidate item to the destination city (geo.hop_proximity). Instead of running a BFS per
+candidate per request, this step runs one reverse BFS per `city:` node
+(capped at RADIUS hops) and stores the result as a sparse, row-per-city
+table keyed by item index (the same positions as the item store).
+
+Input:
+---------
+artifacts/kg_csr/
+item_store/ of the published version (artifact_versions.py)
+
+Output:
+---------
+kg_distances.npz, written into a new version derived from the published one
+and then published (artifacts/kg_distances.npz for a flat layout)
+    cities   city node ids, one row each
+    indptr   row offsets into indices/hops (CSR layout)
+    indices  item indices reachable from the city, sorted per row
+    hops     hop distance item -> city (uint8)
+"""
+
+import os
+import argparse
+
+import numpy as np
+
+from artifact_versions import current_dir, derive_version, fresh_path, publish, relocate
+from geo import hop_proximity
+from item_store import ITEM_STORE_DIR, ItemStore
+from kg_csr import KG_CSR_DIR, KGGraph
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+KG_DIST_OUT = os.path.join(ART_DIR, "kg_distances.npz")
+
+# Paths longer than this are treated as "no path" (score 0)
+RADIUS = 6
+
+def build_distance_table(kg, qids, radius=RADIUS):
+    """Return (cities, indptr, indices, hops) for items `qids` (index order) of KGGraph `kg`."""
+    # Node position of each item (-1 = not in the KG); a node can back
+    # several items (duplicate names in the CSVs)
+    index = kg.index
+    item_node = np.array([index.get(qid, -1) for qid in qids], dtype=np.int64)
+    in_kg = np.flatnonzero(item_node >= 0)
+
+    city_nodes = kg.nodes_of_type("city")
+    order = np.argsort([kg.node_id(c) for c in city_nodes])
+    city_nodes = city_nodes[order]
+
+    indptr = [0]
+    indices = []
+    hops = []
+    for city in city_nodes:
+        # Item -> city paths, so search backwards from the city
+        dist = kg.bfs(city, max_hops=radius, reverse=True)
+        d = dist[item_node[in_kg]]
+        reachable = d >= 0
+        indices.append(in_kg[reachable])
+        hops.append(d[reachable])
+        indptr.append(indptr[-1] + int(reachable.sum()))
+
+    return (np.array([kg.node_id(c) for c in city_nodes]),
+            np.array(indptr, dtype=np.int64),
+            np.concatenate(indices).astype(np.int32) if indices else np.empty(0, dtype=np.int32),
+            np.concatenate(hops).astype(np.uint8) if hops else np.empty(0, dtype=np.uint8))
+
+def save_distance_table(path, cities, indptr, indices, hops, radius, n_items):
+    np.savez(path, cities=cities, indptr=indptr, indices=indices, hops=hops,
+             radius=np.int32(radius), n_items=np.int64(n_items))
+
+class KGDistanceTable:
+    """Read-only city -> item hop distance table produced by this module."""
+
+    def __init__(self, cities, indptr, indices, hops, radius, n_items):
+        self.cities = cities
+        self.indptr = indptr
+        self.indices = indices
+        self.hops = hops
+        self.radius = int(radius)
+        self.n_items = int(n_items)
+        self.city_rows = {str(c): i for i, c in enumerate(cities)}
+
+    @classmethod
+    def load(cls, path=KG_DIST_OUT):
+        with np.load(path) as z:
+            return cls(z["cities"], z["indptr"], z["indices"], z["hops"],
+                       z["radius"], z["n_items"])
+
+    def distances(self, city_id, item_idx):
+        """Hop distance item -> city for each index in `item_idx` (-1 = none within radius)."""
+        item_idx = np.asarray(item_idx, dtype=np.int64)
+        out = np.full(item_idx.shape, -1, dtype=np.int32)
+        row = self.city_rows.get(city_id)
+        if row is None or item_idx.size == 0:
+            return out
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        cols = self.indices[lo:hi]
+        if cols.size == 0:
+            return out
+        pos = np.minimum(np.searchsorted(cols, item_idx), cols.size - 1)
+        found = cols[pos] == item_idx
+        out[found] = self.hops[lo:hi][pos[found]]
+        return out
+
+    def items_within(self, city_id, max_hops):
+        """Item indices at most max_hops from the city (sorted)."""
+        row = self.city_rows.get(city_id)
+        if row is None:
+            return np.empty(0, dtype=np.int32)
+        lo, hi = self.indptr[row], self.indptr[row + 1]
+        return self.indices[lo:hi][self.hops[lo:hi] <= max_hops]
+
+    def proximity(self, city_id, item_idx):
+        """hop_proximity() of the hop distances: on the geo proximity scale, 0 beyond the radius."""
+        return hop_proximity(self.distances(city_id, item_idx))
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute city -> item KG hop distances")
+    parser.add_argument("--radius", type=int, default=RADIUS)
+    args = parser.parse_args()
+
+    # Items of the published version; the table goes into a new version derived from it
+    kg = KGGraph.load(KG_CSR_DIR)
+    items = ItemStore(relocate(ITEM_STORE_DIR, current_dir(ART_DIR)))
+    qids = [items.qid(i) for i in range(len(items))]
+
+    cities, indptr, indices, hops = build_distance_table(kg, qids, radius=args.radius)
+    version, info = derive_version(ART_DIR)
+    out = KG_DIST_OUT if version is None else fresh_path(relocate(KG_DIST_OUT, version))
+    save_distance_table(out, cities, indptr, indices, hops, args.radius, len(qids))
+    if version is not None:
+        publish(version, info, root=ART_DIR)
+    print(f"✅ KG distance table saved: {out}")
+    print(f"Cities: {len(cities)} | Items: {len(qids)} | Entries: {len(indices)} | Radius: {args.radius}")
+
+# === Run ===
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+metrics.py
+In-process latency histograms for the inference path.
+
+    with METRICS.span("encode"):
+        ...
+
+times the block with the monotonic clock and adds it to the "encode"
+histogram (fixed log-spaced buckets, one lock per histogram). Counters
+count events such as cache hits. Both can be exported as a Prometheus text
+dump (server.py: GET /metrics) or as one structured JSON log line.
+
+METRICS.enabled = False turns every span into a shared no-op context
+manager, so instrumented code costs one attribute check per span.
+Each process keeps its own numbers (pre-forked workers are scraped
+separately).
+"""
+
+import json
+import time
+import bisect
+import threading
+from contextlib import nullcontext
+
+# Upper bounds (seconds) of the histogram buckets: 50us .. 10s, roughly x2.5 apart
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIX = "recommend"
+
+_NULL_SPAN = nullcontext()
+
+class Histogram:
+    """Cumulative-on-export histogram of observed durations (seconds)."""
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot: above the largest bound
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        slot = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[slot] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf if above every bound)."""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank, seen = q * total, 0
+        for bound, n in zip(self.bounds + (float("inf"),), counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+class _Span:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+        return False
+
+class Metrics:
+    """Named stage histograms and counters (see module docstring)."""
+
+    def __init__(self, enabled=True, bounds=BUCKETS):
+        self.enabled = enabled
+        self.bounds = bounds
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        hist = self.histograms.get(stage)
+        if hist is None:
+            with self._lock:
+                hist = self.histograms.setdefault(stage, Histogram(self.bounds))
+        return hist
+
+    def span(self, stage):
+        """Context manager timing its block into the `stage` histogram."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self.histogram(stage))
+
+    def observe(self, stage, seconds):
+        if self.enabled:
+            self.histogram(stage).observe(seconds)
+
+    def inc(self, name, n=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def snapshot(self):
+        """Plain dict of every stage (count, sum, p50/p99 bucket bounds) and counter."""
+        stages = {}
+        for stage, hist in sorted(self.histograms.items()):
+            stages[stage] = {"count": hist.count, "sum": hist.sum,
+                             "p50": hist.quantile(0.5), "p99": hist.quantile(0.99)}
+        return {"stages": stages, "counters": dict(sorted(self.counters.items()))}
+
+    def log_line(self):
+        """The snapshot as one JSON log line."""
+        return json.dumps({"ts": time.time(), "metrics": self.snapshot()}, separators=(",", ":"))
+
+    def prometheus(self, prefix=PREFIX):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [f"# HELP {prefix}_stage_seconds Time spent per recommend_trip stage.",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        for stage, hist in sorted(self.histograms.items()):
+            with hist._lock:
+                counts, total, count = list(hist.counts), hist.sum, hist.count
+            cumulative = 0
+            for bound, n in zip(hist.bounds, counts):
+                cumulative += n
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {total:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {count}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+# Process-wide registry used by inference.py and server.py
+METRICS = Metrics()
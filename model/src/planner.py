@@ -0,0 +1,253 @@
+"""
+planner.py
+Packs the ranked spots, hotels and food into per-day routes.
+
+Travel distances are haversine km. They are precomputed at training time
+as one pairwise float16 matrix per city (artifacts/city_distances.npz). A
+plan whose items all belong to one city reads its distances with a single
+gather. Plans that span cities, or use a city with more than
+CITY_MATRIX_MAX_ITEMS items, compute them on the fly.
+
+plan_itinerary():
+1. Keeps SPOTS_PER_DAY spots and MEALS_PER_DAY food items per trip day.
+   Only items with coordinates within MAX_STOP_KM of the best hotel are
+   kept, or of the best spot when there is no hotel. The hotel is the base
+   of every day. Without a hotel, the base is a virtual point at distance 0
+   from everything, so the days become open paths.
+2. Orders the spots into one tour from the base (nearest neighbour, then
+   2-opt) and cuts it into one stretch per day.
+3. Gives each food item to the day with the nearest stop, at most
+   MEALS_PER_DAY per day.
+4. Orders each day's stops with nearest neighbour + 2-opt again.
+5. Puts each event on the trip day inside its date window that has the
+   fewest events so far. Events have no coordinates and are not routed.
+
+Output (city_distances.npz in each artifact version):
+---------
+lat, lon             float64 per item position (NaN = no coordinates)
+cities               city names with a matrix
+item_city            row in cities of every item (-1 = no matrix)
+item_local           row/column of the item in its city matrix
+mat_ptr, mat_size    city c's matrix is dist[mat_ptr[c]:mat_ptr[c + 1]], mat_size[c] square
+dist                 float16 km, all city matrices flattened
+"""
+
+import os
+
+import numpy as np
+
+from geo import haversine_km
+from item_store import NO_DAY, format_day
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+CITY_DIST_OUT = os.path.join(ART_DIR, "city_distances.npz")
+
+CITY_MATRIX_MAX_ITEMS = 2000   # larger cities (8 MB+ matrices) are computed at plan time
+MAX_TRIP_DAYS = 14
+SPOTS_PER_DAY = 4
+MEALS_PER_DAY = 2
+MAX_STOP_KM = 40.0             # stops further than this from the hotel are left out
+MAX_2OPT_MOVES = 1000
+
+def build_city_distances(lat, lon, cities, max_items=CITY_MATRIX_MAX_ITEMS):
+    """Per-city distance matrices (see module docstring) for per-item lat/lon (NaN = none) and city names."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    item_city = np.full(len(lat), -1, dtype=np.int32)
+    item_local = np.full(len(lat), -1, dtype=np.int32)
+    located = np.flatnonzero(~np.isnan(lat) & ~np.isnan(lon))
+    names, codes = np.unique(np.asarray(cities, dtype=object)[located].astype(str), return_inverse=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(names.size + 1))
+
+    kept, sizes, mats = [], [], []
+    for code, name in enumerate(names):
+        members = located[order[bounds[code]:bounds[code + 1]]]
+        if not name or members.size > max_items:
+            continue
+        item_city[members] = len(kept)
+        item_local[members] = np.arange(members.size)
+        mats.append(haversine_km(lat[members, None], lon[members, None], lat[members], lon[members])
+                    .astype(np.float16).ravel())
+        kept.append(name)
+        sizes.append(members.size)
+    mat_size = np.array(sizes, dtype=np.int64)
+    return {"lat": lat, "lon": lon, "cities": np.array(kept, dtype=str),
+            "item_city": item_city, "item_local": item_local,
+            "mat_ptr": np.concatenate([[0], np.cumsum(mat_size ** 2)]).astype(np.int64), "mat_size": mat_size,
+            "dist": np.concatenate(mats) if mats else np.empty(0, dtype=np.float16)}
+
+def save_city_distances(path, arrays):
+    np.savez(path, **arrays)
+
+class CityDistances:
+    """Read-only distance matrices written by save_city_distances()."""
+
+    def __init__(self, arrays):
+        self.lat = arrays["lat"]
+        self.lon = arrays["lon"]
+        self.cities = [str(c) for c in arrays["cities"]]
+        self.item_city = arrays["item_city"]
+        self.item_local = arrays["item_local"]
+        self.mat_ptr = arrays["mat_ptr"]
+        self.mat_size = arrays["mat_size"]
+        self.dist = arrays["dist"]
+
+    @classmethod
+    def load(cls, path=CITY_DIST_OUT):
+        with np.load(path) as z:
+            return cls({name: z[name] for name in z.files})
+
+    def located(self, item_idx):
+        """Mask of the items that have coordinates."""
+        item_idx = np.asarray(item_idx, dtype=np.int64)
+        return ~np.isnan(self.lat[item_idx]) & ~np.isnan(self.lon[item_idx])
+
+    def matrix(self, item_idx):
+        """(n, n) km between the items: one gather from the city matrix if they all have the same one."""
+        item_idx = np.asarray(item_idx, dtype=np.int64)
+        rows = self.item_city[item_idx]
+        if rows.size and rows[0] >= 0 and (rows == rows[0]).all():
+            size = int(self.mat_size[rows[0]])
+            city = self.dist[self.mat_ptr[rows[0]]:self.mat_ptr[rows[0] + 1]].reshape(size, size)
+            local = self.item_local[item_idx]
+            return city[np.ix_(local, local)].astype(np.float64)
+        lat, lon = self.lat[item_idx], self.lon[item_idx]
+        return haversine_km(lat[:, None], lon[:, None], lat, lon)
+
+# === Routing ===
+def nearest_neighbour(dist, start=0):
+    """Visiting order of all nodes of a distance matrix, greedily from `start`."""
+    n = len(dist)
+    route = [start]
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    for _ in range(n - 1):
+        nxt = int(np.argmin(np.where(visited, np.inf, dist[route[-1]])))
+        route.append(nxt)
+        visited[nxt] = True
+    return np.array(route, dtype=np.int64)
+
+def two_opt(route, dist, max_moves=MAX_2OPT_MOVES):
+    """Best-improvement 2-opt on the closed tour `route` (route[0] stays first)."""
+    if len(route) < 4:
+        return route
+    tour = np.append(route, route[0])
+    later = np.triu(np.ones((len(route), len(route)), dtype=bool), 1)
+    for _ in range(max_moves):
+        a, b = tour[:-1], tour[1:]
+        edge = dist[a, b]
+        # Replacing edges i (a_i, b_i) and j (a_j, b_j) by (a_i, a_j) and (b_i, b_j), i < j
+        gain = np.where(later, dist[a[:, None], a] + dist[b[:, None], b] - edge[:, None] - edge, 0.0)
+        i, j = np.unravel_index(np.argmin(gain), gain.shape)
+        if gain[i, j] > -1e-9:
+            break
+        tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1].copy()
+    return tour[:-1]
+
+def order_stops(dist, start=0):
+    """Short closed tour from `start` through every node: nearest neighbour, then 2-opt."""
+    return two_opt(nearest_neighbour(dist, start), dist)
+
+def tour_length(dist, route, closed=True):
+    length = float(dist[route[:-1], route[1:]].sum())
+    return length + float(dist[route[-1], route[0]]) if closed and len(route) > 1 else length
+
+# === Planning ===
+def trip_days(start_day, end_day, max_days=MAX_TRIP_DAYS):
+    """Day numbers of the trip (one day, NO_DAY if the dates don't parse)."""
+    if start_day == NO_DAY or end_day == NO_DAY or end_day < start_day:
+        return [start_day]
+    return list(range(start_day, min(end_day, start_day + max_days - 1) + 1))
+
+def _assign_meals(dist, food, legs, base):
+    """Food nodes per leg: nearest stop first, at most MEALS_PER_DAY per leg."""
+    near = np.stack([dist[np.ix_(food, leg if len(leg) else [base])].min(axis=1) for leg in legs], axis=1)
+    meals = [[] for _ in legs]
+    taken = np.zeros(len(food), dtype=bool)
+    for flat in np.argsort(near, axis=None, kind="stable").tolist():
+        f, day = divmod(flat, len(legs))
+        if not taken[f] and len(meals[day]) < MEALS_PER_DAY:
+            meals[day].append(food[f])
+            taken[f] = True
+    return meals
+
+def _assign_events(days, events, event_start, event_end):
+    """Events per day: inside the event's date window, on the day with fewest events so far."""
+    per_day = [[] for _ in days]
+    for item, start, end in zip(events, event_start, event_end):
+        if days[0] == NO_DAY:
+            window = [0]
+        else:
+            window = [d for d, day in enumerate(days) if start != NO_DAY and start <= day <= end]
+        if window:
+            per_day[min(window, key=lambda d: len(per_day[d]))].append(item)
+    return per_day
+
+def plan_itinerary(distances, days, hotels, spots, food, events=(), event_start=(), event_end=()):
+    """Per-day plans for ranked item positions (best first); see the module docstring.
+
+    Returns [{"day", "date", "hotel", "stops", "events", "distance_km"}] with item positions.
+    """
+    n_days = len(days)
+    hotels, spots, food = (np.asarray(x, dtype=np.int64) for x in (hotels, spots, food))
+    hotels = hotels[distances.located(hotels)][:1]
+    spots = spots[distances.located(spots)]
+    food = food[distances.located(food)]
+    anchor = hotels[:1] if hotels.size else spots[:1]
+    if anchor.size:
+        lat, lon = distances.lat[anchor[0]], distances.lon[anchor[0]]
+        spots = spots[haversine_km(lat, lon, distances.lat[spots], distances.lon[spots]) <= MAX_STOP_KM]
+        food = food[haversine_km(lat, lon, distances.lat[food], distances.lon[food]) <= MAX_STOP_KM]
+    spots = spots[:SPOTS_PER_DAY * n_days]
+    food = food[:MEALS_PER_DAY * n_days]
+
+    # Node 0 is the base: the hotel, or a virtual point 0 km from everything
+    items = np.concatenate([hotels, spots, food])
+    dist = distances.matrix(items)
+    if not hotels.size:
+        dist = np.pad(dist, ((1, 0), (1, 0)))
+    base = 0
+    spot_nodes = 1 + np.arange(spots.size)
+    food_nodes = 1 + spots.size + np.arange(food.size)
+
+    # Route first, cluster second: one tour over all spots, cut into a stretch per day
+    nodes = np.concatenate([[base], spot_nodes])
+    tour = nodes[order_stops(dist[np.ix_(nodes, nodes)])][1:]
+    legs = np.array_split(tour, n_days)
+    meals = _assign_meals(dist, food_nodes, legs, base) if food.size else [[] for _ in legs]
+    day_events = _assign_events(days, events, event_start, event_end)
+
+    plan = []
+    for d, (leg, meal) in enumerate(zip(legs, meals)):
+        nodes = np.concatenate([[base], leg, meal]).astype(np.int64)
+        sub = dist[np.ix_(nodes, nodes)]
+        route = order_stops(sub)
+        stops = nodes[route[1:]] - (0 if hotels.size else 1)
+        plan.append({"day": d + 1, "date": format_day(days[d]),
+                     "hotel": int(hotels[0]) if hotels.size else None,
+                     "stops": items[stops].tolist(), "events": list(day_events[d]),
+                     "distance_km": round(tour_length(sub, route, closed=bool(hotels.size)), 2)})
+    return plan
+
+# === Run ===
+if __name__ == "__main__":
+    from artifact_versions import current_dir, derive_version, fresh_path, publish, relocate
+    from geo import GEO_INDEX_OUT, GeoIndex
+    from item_store import ITEM_STORE_DIR, ItemStore
+
+    # Rebuilt from the published version, into a new version derived from it
+    src = current_dir(ART_DIR)
+    geo = GeoIndex.load(relocate(GEO_INDEX_OUT, src))
+    store = ItemStore(relocate(ITEM_STORE_DIR, src))
+    arrays = build_city_distances(geo.lat, geo.lon, [store.cities[c] for c in store.city])
+    version, info = derive_version(ART_DIR)
+    out = CITY_DIST_OUT if version is None else fresh_path(relocate(CITY_DIST_OUT, version))
+    save_city_distances(out, arrays)
+    if version is not None:
+        publish(version, info, root=ART_DIR)
+    print(f"✅ City distance matrices saved: {out} "
+          f"({len(arrays['cities'])} cities, {arrays['dist'].nbytes / 1e6:.1f} MB)")
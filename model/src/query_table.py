@@ -0,0 +1,112 @@
+"""
+query_table.py
+Precomputed query embeddings, so serving does not run the sentence model.
+
+The query text is a template over destination, diet and optionally source:
+
+    "Trip to Kochi. Diet preference: Veg."
+    "Trip from Kozhikode to Kochi. Diet preference: Veg."
+
+and the set of cities is closed (kg_build.CITY_SEQUENCES plus the City
+column of the catalog), so train.py encodes the text of every
+(destination, diet) and, with --query_pairs, of every (source,
+destination, diet) over the backbone cities. Trip dates are not part of
+the text: events are filtered on dates (item_store.date_overlap_mask).
+
+A request uses its (source, destination, diet) row if there is one, else
+its (destination, diet) row; only destinations outside the table are
+encoded at serve time.
+
+Layout (artifacts/query_table/):
+---------
+tables.json                  n_rows, dim, model name, diets
+embeddings.npy               float32 (n_rows, dim), row-normalized, read via mmap
+key_offsets.npy, key_blob.npy
+                             row key "source|destination|diet" (normalized; source "" = any)
+"""
+
+import os
+import re
+import json
+
+import numpy as np
+
+from item_store import save_strings, load_strings, decode_strings
+
+# === Paths ===
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+ART_DIR = os.path.join(ROOT, "artifacts")
+
+QUERY_TABLE_DIR = os.path.join(ART_DIR, "query_table")
+
+DIETS = ("Any", "Veg", "Non-Veg")
+
+def normalize_diet(value):
+    """Canonical diet (DIETS) of a request's free-text "veg/non-veg" value."""
+    letters = re.sub(r"[^a-z]", "", str(value or "").lower())
+    if letters.startswith("non"):
+        return "Non-Veg"
+    if letters.startswith("veg"):
+        return "Veg"
+    return "Any"
+
+def _city_key(city):
+    return " ".join(str(city or "").split()).lower()
+
+def row_key(source, destination, diet):
+    """Table key of a query; source None / "" = destination-only row."""
+    return f"{_city_key(source)}|{_city_key(destination)}|{normalize_diet(diet).lower()}"
+
+def query_text(destination, diet, source=None):
+    """The query template (diet should already be normalized)."""
+    trip = f"Trip from {source} to {destination}." if source else f"Trip to {destination}."
+    return f"{trip} Diet preference: {diet}."
+
+def query_texts(cities, pair_cities=()):
+    """(keys, texts) of every destination row and every pair row over pair_cities."""
+    cities = list(dict.fromkeys(c for c in cities if _city_key(c)))
+    pair_cities = list(dict.fromkeys(c for c in pair_cities if _city_key(c)))
+    keys, texts = [], []
+    for diet in DIETS:
+        for dest in cities:
+            keys.append(row_key("", dest, diet))
+            texts.append(query_text(dest, diet))
+        for source in pair_cities:
+            for dest in pair_cities:
+                keys.append(row_key(source, dest, diet))
+                texts.append(query_text(dest, diet, source))
+    # Cities differing only in case/spacing share one row
+    first = {}
+    for i, key in enumerate(keys):
+        first.setdefault(key, i)
+    return list(first), [texts[i] for i in first.values()]
+
+def write_query_table(path, keys, embeddings, model_name):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "embeddings.npy"), np.asarray(embeddings, dtype=np.float32))
+    save_strings(path, "key", keys)
+    # Written last: a table without tables.json is incomplete
+    with open(os.path.join(path, "tables.json"), "w", encoding="utf-8") as f:
+        json.dump({"n_rows": len(keys), "dim": int(np.shape(embeddings)[1]), "model": model_name,
+                   "diets": list(DIETS)}, f)
+
+class QueryTable:
+    """Read-only view over a table written by write_query_table()."""
+
+    def __init__(self, path=QUERY_TABLE_DIR):
+        with open(os.path.join(path, "tables.json"), "r", encoding="utf-8") as f:
+            tables = json.load(f)
+        self.model = tables["model"]
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        keys = decode_strings(*load_strings(path, "key"))
+        self.rows = {key: i for i, key in enumerate(keys)}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, source, destination, diet):
+        """Row of the (source, destination, diet) query, else of (destination, diet); -1 if neither."""
+        row = self.rows.get(row_key(source, destination, diet))
+        if row is None:
+            row = self.rows.get(row_key("", destination, diet), -1)
+        return row
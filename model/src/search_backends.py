@@ -0,0 +1,147 @@
+"""
+search_backends.py
+Interchangeable top-k search over the combined item vectors.
+
+Every backend answers search(q_emb, k) -> (item positions, cosine
+similarities), one row per query, best first. Vectors and queries are
+row-normalized, so cosine similarity is the inner product.
+
+- ExactBackend      float32 matmul (BLAS) against the vectors, SEARCH_BLOCK
+                    rows at a time, top-k per block by argpartition
+- QuantizedBackend  int8 (symmetric, one scale per row) or float16 copy of
+                    the vectors: scores RERANK_FACTOR * k candidates on the
+                    compact copy, then re-ranks those exactly against the
+                    float32 rows (which stay memory-mapped on disk)
+- HNSWBackend       hnswlib index, labels mapped back to item positions
+
+select_backend(n_items) picks one by catalog size: exact up to
+EXACT_MAX_ITEMS (perfect recall, nothing to load), HNSW above that. NumPy
+has no int8 GEMM, so the quantized scan is not faster than the float32 one;
+it trades a little latency for 4x (int8) / 2x (float16) less resident
+memory, and is used when asked for or when an HNSW index is missing.
+Numbers: bench/search_backends.py.
+"""
+
+import numpy as np
+
+from ann_index import HNSW_EF_SEARCH
+
+BACKENDS = ("exact", "quantized", "hnsw")
+EXACT_MAX_ITEMS = 10000
+
+SEARCH_BLOCK = 16384   # item rows scored per matmul
+RERANK_FACTOR = 4      # quantized candidates re-ranked per requested result
+QUANTIZE_CHUNK = 65536
+
+def select_backend(n_items):
+    """Backend name for a catalog (or bucket) of n_items vectors."""
+    return "exact" if n_items <= EXACT_MAX_ITEMS else "hnsw"
+
+def topk_rows(scores, k):
+    """(column indices, scores) of the k largest entries of every row, best first."""
+    n = scores.shape[1]
+    k = min(k, n)
+    if k < n:
+        cols = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        cols = np.broadcast_to(np.arange(n), scores.shape).copy()
+    top = np.take_along_axis(scores, cols, axis=1)
+    order = np.argsort(-top, axis=1, kind="stable")
+    return np.take_along_axis(cols, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+def _blocked_topk(n_queries, n_rows, k, score_block):
+    """Top-k over n_rows scored block by block; score_block(lo, hi) -> (n_queries, hi - lo)."""
+    best_idx = np.empty((n_queries, 0), dtype=np.int64)
+    best = np.empty((n_queries, 0), dtype=np.float32)
+    for lo in range(0, n_rows, SEARCH_BLOCK):
+        hi = min(n_rows, lo + SEARCH_BLOCK)
+        idx, scores = topk_rows(score_block(lo, hi), k)
+        idx = np.concatenate([best_idx, idx + lo], axis=1)
+        scores = np.concatenate([best, scores], axis=1)
+        keep, best = topk_rows(scores, k)
+        best_idx = np.take_along_axis(idx, keep, axis=1)
+    return best_idx, best
+
+def quantize(vectors, dtype="int8", chunk=QUANTIZE_CHUNK):
+    """(codes, scales) of float vectors; scales is None for float16."""
+    n, dim = vectors.shape
+    codes = np.empty((n, dim), dtype=np.int8 if dtype == "int8" else np.float16)
+    scales = np.ones(n, dtype=np.float32) if dtype == "int8" else None
+    for lo in range(0, n, chunk):
+        block = np.asarray(vectors[lo:lo + chunk], dtype=np.float32)
+        if scales is None:
+            codes[lo:lo + chunk] = block
+            continue
+        peak = np.abs(block).max(axis=1)
+        scale = np.where(peak > 0, peak / 127.0, 1.0).astype(np.float32)
+        codes[lo:lo + chunk] = np.rint(block / scale[:, None])
+        scales[lo:lo + chunk] = scale
+    return codes, scales
+
+class ExactBackend:
+    """Brute-force float32 inner product over `vectors[positions]` (all rows if positions is None)."""
+
+    name = "exact"
+
+    def __init__(self, vectors, positions=None):
+        self.positions = positions
+        # A subset is copied into one contiguous block; the full matrix is used as is (mmap)
+        self.vectors = vectors if positions is None else np.ascontiguousarray(vectors[positions], dtype=np.float32)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def search(self, q_emb, k, num_threads=-1):
+        q = np.asarray(q_emb, dtype=np.float32)
+        idx, sims = _blocked_topk(len(q), len(self.vectors), k, lambda lo, hi: q @ self.vectors[lo:hi].T)
+        return (idx if self.positions is None else self.positions[idx]), sims
+
+class QuantizedBackend:
+    """int8 / float16 scan of `vectors[positions]` with exact float32 re-ranking."""
+
+    name = "quantized"
+
+    def __init__(self, vectors, positions=None, dtype="int8", rerank=RERANK_FACTOR):
+        self.vectors = vectors  # full float32 matrix (memory-mapped), rows = item positions
+        self.positions = np.arange(len(vectors)) if positions is None else np.asarray(positions, dtype=np.int64)
+        self.rerank = rerank
+        self.codes, self.scales = quantize(vectors if positions is None else vectors[self.positions], dtype)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _score_block(self, q, lo, hi):
+        scores = q @ self.codes[lo:hi].astype(np.float32).T
+        return scores if self.scales is None else scores * self.scales[lo:hi]
+
+    def search(self, q_emb, k, num_threads=-1):
+        q = np.asarray(q_emb, dtype=np.float32)
+        cand, _ = _blocked_topk(len(q), len(self.codes), self.rerank * k,
+                                lambda lo, hi: self._score_block(q, lo, hi))
+        items = self.positions[cand]
+        # Exact re-rank: gather the candidates' float32 rows (sorted reads for the mmap)
+        rows, inverse = np.unique(items, return_inverse=True)
+        exact = np.asarray(self.vectors[rows], dtype=np.float32) @ q.T
+        sims = exact[inverse.reshape(items.shape), np.arange(len(q))[:, None]]
+        keep, sims = topk_rows(sims, k)
+        return np.take_along_axis(items, keep, axis=1), sims
+
+class HNSWBackend:
+    """hnswlib index; `positions[label]` maps labels to item positions (None = labels are positions)."""
+
+    name = "hnsw"
+
+    def __init__(self, index, positions=None, ef=HNSW_EF_SEARCH):
+        self.index = index
+        self.positions = positions
+        index.set_ef(ef)  # not stored in the index file
+
+    def __len__(self):
+        return self.index.get_current_count()
+
+    def search(self, q_emb, k, num_threads=-1):
+        labels, distances = self.index.knn_query(q_emb, k=k, num_threads=num_threads)
+        labels = labels.astype(np.int64)
+        if self.positions is not None:
+            labels = self.positions[labels]
+        return labels, 1 - distances
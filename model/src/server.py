@@ -0,0 +1,339 @@
+"""
+server.py
+Asyncio HTTP service exposing recommend_trip as JSON.
+
+- Artifacts are loaded once at start-up (shared Recommender engine). A
+  version that train.py publishes later is loaded in the background and
+  swapped in once it validates.
+- Concurrent requests arriving within --max_wait_ms are coalesced into one
+  recommend_trips() batch (one encode + one top-k query per bucket).
+- Batches run on a thread pool so the event loop never blocks.
+- With --workers N the parent loads the artifacts, then forks N worker
+  processes sharing one listening socket. Embeddings and the item store are
+  memory-mapped and the search backends (HNSW indexes, exact / quantized
+  vector copies) are built before the fork, so the workers share them
+  copy-on-write instead of each holding a private copy. Workers do not
+  reload on their own; the parent loads and validates a new version, forks
+  a fresh set of workers from it and stops the old ones, which finish
+  their in-flight requests first (DRAIN_SECONDS at most).
+
+Endpoints:
+    POST /recommend   body: {"source", "destination", "start_date", "end_date", "veg/non-veg"}
+    GET  /health
+    GET  /metrics     per-stage latency histograms (Prometheus text format, this worker only)
+
+--metrics_log N also prints the metrics as one JSON line every N seconds;
+--no_metrics turns the instrumentation off. --search_backend overrides the
+catalog-size choice of candidate search (search_backends.py).
+
+Usage:
+    python server.py --port 8000 --max_batch 64 --max_wait_ms 5 --threads 4 --workers 4
+"""
+
+import os
+import gc
+import json
+import time
+import signal
+import socket
+import asyncio
+import argparse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import inference
+from inference import get_engine
+from search_backends import BACKENDS
+from metrics import METRICS
+
+REQUIRED_FIELDS = ("source", "destination", "start_date", "end_date")
+OPTIONAL_FIELDS = ("veg/non-veg",)
+MAX_BODY_BYTES = 64 * 1024
+DRAIN_SECONDS = 10.0  # a stopped worker's time to finish in-flight requests
+DRAIN_GRACE = 0.5     # ... and to read requests on connections it accepted just before
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+class MicroBatcher:
+    """Coalesces concurrent requests into recommend_trips() batches.
+
+    A batch is flushed when it reaches `max_batch` requests or `max_wait`
+    seconds after its first request, whichever comes first. If a batch
+    raises, its requests are retried one at a time, so only the failing
+    request gets the error.
+    """
+
+    def __init__(self, engine, executor, max_batch=64, max_wait=0.005, num_threads=1):
+        self.engine = engine
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.num_threads = num_threads
+        self._pending = []
+        self._timer = None
+        self._tasks = set()  # running batches (keeps them referenced)
+
+    async def submit(self, request):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        requests = [req for req, _ in batch]
+        try:
+            outputs = await loop.run_in_executor(
+                self.executor, self.engine.recommend_trips, requests, self.num_threads)
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                return
+            METRICS.inc("batch_fallbacks")
+            for item in batch:
+                await self._run([item])
+            return
+        for (_, future), out in zip(batch, outputs):
+            if not future.done():
+                future.set_result(out)
+
+class RecommendServer:
+    def __init__(self, batcher):
+        self.batcher = batcher
+        self.in_flight = 0  # requests read but not yet answered
+        self.stopping = False  # answer with Connection: close
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body, error = request
+                self.in_flight += 1
+                try:
+                    status, payload = error or await self._dispatch(method, path, body)
+                    keep_alive = not self.stopping and headers.get("connection", "").lower() != "close"
+                    self._write_response(writer, status, payload, keep_alive)
+                    await writer.drain()
+                finally:
+                    self.in_flight -= 1
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, path, _ = line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        # The body is not read after a bad length, so the connection can't be reused
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            return method, path, {"connection": "close"}, None, (400, {"error": "invalid Content-Length"})
+        if length > MAX_BODY_BYTES:
+            return method, path, {"connection": "close"}, None, (413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+        body = await reader.readexactly(length) if length else b""
+        return method, path, headers, body, None
+
+    async def _dispatch(self, method, path, body):
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/metrics":
+            return 200, METRICS.prometheus()
+        if path != "/recommend":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "body is not valid JSON"}
+        if not isinstance(request, dict):
+            return 400, {"error": "body must be a JSON object"}
+        missing = [f for f in REQUIRED_FIELDS if not request.get(f)]
+        if missing:
+            return 400, {"error": f"missing fields: {', '.join(missing)}"}
+        invalid = [f for f in REQUIRED_FIELDS if not (isinstance(request[f], str) and request[f].strip())]
+        invalid += [f for f in OPTIONAL_FIELDS if request.get(f) is not None and not isinstance(request[f], str)]
+        if invalid:
+            return 400, {"error": f"fields must be strings (required ones non-empty): {', '.join(invalid)}"}
+        try:
+            return 200, await self.batcher.submit(request)
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    def _write_response(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8"
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+
+async def log_metrics(interval):
+    while True:
+        await asyncio.sleep(interval)
+        print(METRICS.log_line(), flush=True)
+
+async def serve(host, port, max_batch, max_wait_ms, threads, sock=None, metrics_log=0, auto_reload=True):
+    """Serve until SIGTERM, then stop accepting and finish the requests in flight."""
+    engine = get_engine()
+    engine.auto_reload = auto_reload
+    executor = ThreadPoolExecutor(max_workers=threads)
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(executor, engine.warm)
+
+    batcher = MicroBatcher(engine, executor, max_batch=max_batch,
+                           max_wait=max_wait_ms / 1000.0, num_threads=threads)
+    handler = RecommendServer(batcher)
+    if sock is not None:
+        server = await asyncio.start_server(handler.handle, sock=sock)
+    else:
+        server = await asyncio.start_server(handler.handle, host, port)
+    print(f"[{os.getpid()}] Serving on http://{host}:{port} "
+          f"(max_batch={max_batch}, max_wait={max_wait_ms}ms, threads={threads})")
+    logger = asyncio.create_task(log_metrics(metrics_log)) if metrics_log > 0 else None
+    stopping = asyncio.Event()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+    async with server:
+        await stopping.wait()
+    handler.stopping = True
+    grace, deadline = loop.time() + DRAIN_GRACE, loop.time() + DRAIN_SECONDS
+    while (handler.in_flight or loop.time() < grace) and loop.time() < deadline:
+        await asyncio.sleep(0.01)
+    if logger is not None:
+        logger.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await logger
+    print(f"[{os.getpid()}] Stopped")
+
+def serve_prefork(host, port, max_batch, max_wait_ms, threads, workers, metrics_log=0):
+    """Load artifacts once, then fork `workers` processes that accept on one shared socket.
+
+    The parent watches for new artifact versions. A valid one is loaded here and
+    a new generation of workers is forked from it before the old one is stopped,
+    so every generation shares one copy of its artifacts.
+    """
+    engine = get_engine()
+    engine.warm()
+    sock = socket.create_server((host, port), backlog=1024)
+
+    def fork_workers():
+        # Move everything allocated so far out of the GC's reach: collections in
+        # the workers would otherwise write to these objects and un-share their pages
+        gc.freeze()
+        pids = []
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                try:
+                    asyncio.run(serve(host, port, max_batch, max_wait_ms, threads, sock=sock,
+                                      metrics_log=metrics_log, auto_reload=False))
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+        print(f"Started {workers} workers: {pids} (artifact version {inference.version_label(engine.version)})")
+        return pids
+
+    def terminate(pids):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    children = fork_workers()
+    alive = set(children)
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        terminate(alive)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while not stopping:
+        time.sleep(inference.VERSION_CHECK_INTERVAL)
+        while alive:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+            if not pid:
+                break
+            alive.discard(pid)
+        version = engine.version
+        if not stopping and engine.check_version(force=True, wait=True) and engine.version != version:
+            # New workers accept on the shared socket before the old ones stop
+            old, children = children, fork_workers()
+            alive.update(children)
+            terminate(old)
+    for pid in list(alive):
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+
+# === CLI Runner ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the recommendation HTTP service")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max_batch", type=int, default=64)
+    parser.add_argument("--max_wait_ms", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=4, help="Worker threads (also hnswlib num_threads)")
+    parser.add_argument("--workers", type=int, default=1, help="Pre-forked worker processes")
+    parser.add_argument("--metrics_log", type=float, default=0, help="Seconds between JSON metrics log lines (0 = off)")
+    parser.add_argument("--no_metrics", action="store_true", help="Disable per-stage latency instrumentation")
+    parser.add_argument("--search_backend", choices=("auto",) + BACKENDS, default=inference.SEARCH_BACKEND,
+                        help="Candidate search: by catalog size (auto), exact, quantized or hnsw")
+    args = parser.parse_args()
+
+    METRICS.enabled = not args.no_metrics
+    inference.SEARCH_BACKEND = args.search_backend
+    if args.workers > 1:
+        serve_prefork(args.host, args.port, args.max_batch, args.max_wait_ms, args.threads, args.workers,
+                      metrics_log=args.metrics_log)
+    else:
+        try:
+            asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms, args.threads,
+                              metrics_log=args.metrics_log))
+        except KeyboardInterrupt:
+            pass
@@ -1,65 +1,90 @@
 # train.py
 """
 Train pipeline:
-1) Load items/events/food and KG
-2) Compute content embeddings (sentence-transformers)
-3) Compute KG embeddings (Node2Vec)
-4) Compute collaborative-style item factors (synthetic interactions + SVD)
-5) Build combined item vectors and save all artifacts:
-   - artifacts/content_embeddings.npy
-   - artifacts/node2vec_embeddings.npy
-   - artifacts/item_factors.npy
-   - artifacts/item_index_hnsw.bin
-   - artifacts/item_map.json
+1) Load items/events/food (ingest.py catalog) and KG
+2) Compute content embeddings (sentence-transformers; unchanged texts come from artifacts/embedding_cache/)
+3) Compute KG embeddings (node2vec walks over the CSR graph, walks.py)
+4) Compute collaborative-style item factors (interactions.py log or synthetic users + SVD / ALS)
+5) Build combined item vectors and save all artifacts into a new version
+   directory, artifacts/versions/<version>/ (see artifact_versions.py):
+   - content_embeddings.npy
+   - query_table/ (query embeddings of every known destination / backbone pair)
+   - node2vec_embeddings.npy
+   - item_factors.npy
+   - item_index_hnsw.bin
+   - item_index_hnsw_{spot,hotel,food,event}.bin (per-bucket sub-indexes)
+   - item_store/ (columnar item metadata)
+   - item_labels.npz (stable HNSW label per item; see ann_index.py)
+   - kg_distances.npz
+   - geo_index.npz (spatial grid over item lat/lon, city centroids)
+   - city_distances.npz (per-city item distance matrices for the itinerary planner)
+   - city_index.json, city_routes.npz (copied from kg_build.py's output)
+6) Publish the version: write its manifest and switch artifacts/CURRENT to it
 """
 
 import os
-import json
-import csv
-import pickle
 import random
+import shutil
+import argparse
+from types import SimpleNamespace
 from collections import Counter, defaultdict
 
 import numpy as np
-import hnswlib
-import networkx as nx
 from tqdm import tqdm
 
+from als import implicit_als
+from artifact_versions import create_version, current_dir, publish
+from ann_index import (ITEM_LABELS, HNSW_SPACE, assign_labels, build_hnsw_index, item_keys,
+                       load_labels, save_labels, update_hnsw_index)
+from embedding_cache import EMBED_CACHE_DIR, EmbeddingCache, text_key
+from ingest import CATALOG_DIR, load_catalog
+from interactions import (INTERACTIONS_CSV, NUM_SYN_USERS, MIN_ITEMS_PER_USER, MAX_ITEMS_PER_USER,
+                          item_popularity, load_interaction_log, synthetic_interactions)
+from item_store import ITEM_STORE_DIR, BUCKET_NAMES, ItemStore, bucket_codes, write_item_store
+from kg_csr import KG_CSR_DIR, KGGraph
+from city_index import CITY_INDEX_OUT
+from city_routes import CITY_ROUTES_OUT
+from geo import GEO_INDEX_OUT, build_geo_index, save_geo_index
+from planner import CITY_DIST_OUT, build_city_distances, save_city_distances
+from kg_build import CITY_SEQUENCES
+from kg_distances import KG_DIST_OUT, RADIUS as KG_DIST_RADIUS, build_distance_table, save_distance_table
+from query_table import QUERY_TABLE_DIR, query_texts, write_query_table
+from walks import node2vec_model
+
 # --- Optional libs that may need pip install ---
-# sentence-transformers, node2vec, scikit-learn
-try:
-    from sentence_transformers import SentenceTransformer
-except Exception as e:
-    raise ImportError(
-        "sentence-transformers not found. Install with: pip install sentence-transformers"
-    )
-
-try:
-    from node2vec import Node2Vec
-except Exception as e:
-    raise ImportError(
-        "node2vec not found. Install with: pip install node2vec"
-    )
-
-from sklearn.decomposition import TruncatedSVD
-from scipy.sparse import csr_matrix
+# sentence-transformers (loaded only when texts need encoding), gensim (walks.py),
+# scikit-learn (svd factorizer only)
+def load_sentence_model(model_name):
+    try:
+        from sentence_transformers import SentenceTransformer
+    except Exception as e:
+        raise ImportError(
+            "sentence-transformers not found. Install with: pip install sentence-transformers"
+        )
+    return SentenceTransformer(model_name)
+
+def sentence_encoder(model_name):
+    """Encoder that loads the sentence-transformer on first use (shared by the content and query stages)."""
+    model = None
+    def encode(texts, **kwargs):
+        nonlocal model
+        if model is None:
+            print("Loading sentence-transformer model:", model_name)
+            model = load_sentence_model(model_name)
+        return model.encode(texts, **kwargs)
+    return SimpleNamespace(encode=encode)
 
 # === Paths ===
 ROOT = os.path.join(os.path.dirname(__file__), "..")
-DATA_DIR = os.path.join(ROOT, "data")
 ART_DIR = os.path.join(ROOT, "artifacts")
 os.makedirs(ART_DIR, exist_ok=True)
 
-ITEMS_CSV = os.path.join(DATA_DIR, "items.csv")
-EVENTS_CSV = os.path.join(DATA_DIR, "events.csv")
-FOOD_CSV = os.path.join(DATA_DIR, "food.csv")
-KG_IN = os.path.join(ART_DIR, "kg_graph.pkl")
 
 CONTENT_EMB_OUT = os.path.join(ART_DIR, "content_embeddings.npy")
 NODE2VEC_EMB_OUT = os.path.join(ART_DIR, "node2vec_embeddings.npy")
 ITEM_FACTORS_OUT = os.path.join(ART_DIR, "item_factors.npy")
 HNSW_OUT = os.path.join(ART_DIR, "item_index_hnsw.bin")
-ITEM_MAP_OUT = os.path.join(ART_DIR, "item_map.json")
+HNSW_BUCKET_OUT = os.path.join(ART_DIR, "item_index_hnsw_{}.bin")  # per output bucket
 
 # --- Configs ---
 SEED = 42
@@ -72,131 +97,78 @@ CONTENT_DIM = 384  # all-MiniLM-L6-v2 produces 384-d
 CF_DIM = 64
 FINAL_DIM = None  # computed later (content + node2vec + cf)
 
-# HNSW params
-HNSW_SPACE = "cosine"  # nearest neighbors by cosine similarity
-HNSW_M = 32
-HNSW_EF_CONSTRUCTION = 200
-HNSW_EF_SEARCH = 50
-
-# Synthetic CF params
-NUM_SYN_USERS = 1200
-MIN_ITEMS_PER_USER = 5
-MAX_ITEMS_PER_USER = 25
+CF_FACTORIZER = "svd"  # "svd" (TruncatedSVD) or "als" (implicit ALS, als.py)
 
 # --- Utilities ---
-def safe_label(s):
-    return (s or "").strip()
-
-def load_items():
-    items = []
-    if not os.path.exists(ITEMS_CSV):
-        print(f"[warn] {ITEMS_CSV} not found.")
-        return items
-    with open(ITEMS_CSV, newline='', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            name = safe_label(r.get("Name"))
-            city = safe_label(r.get("City"))
-            type_ = safe_label(r.get("Type")).lower()
-            desc = safe_label(r.get("Description"))
-            lat = r.get("Latitude")
-            lon = r.get("Longitude")
-            qid = f"place:{name}"
-            items.append({
-                "qid": qid,
-                "label": name,
-                "type": "place",
-                "city": city,
-                "meta": {"type": type_, "lat": lat, "lon": lon, "description": desc}
-            })
-    return items
-
-def load_events():
-    events = []
-    if not os.path.exists(EVENTS_CSV):
-        print(f"[warn] {EVENTS_CSV} not found.")
-        return events
-    with open(EVENTS_CSV, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            name = safe_label(r.get("Festival Name"))
-            city = safe_label(r.get("City"))
-            loc = safe_label(r.get("Location"))
-            start = safe_label(r.get("Start Date"))
-            end = safe_label(r.get("End Date"))
-            if not name:
-                continue
-            qid = f"event:{name}"
-            label = name
-            desc = f"Event in {city}. Location: {loc}. Dates: {start} - {end}"
-            events.append({
-                "qid": qid,
-                "label": label,
-                "type": "event",
-                "city": city,
-                "meta": {"location": loc, "start": start, "end": end, "description": desc}
-            })
-    return events
-
-def load_foods():
-    foods = []
-    if not os.path.exists(FOOD_CSV):
-        print(f"[warn] {FOOD_CSV} not found.")
-        return foods
-    with open(FOOD_CSV, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            name = safe_label(r.get("Name"))
-            cuisine = safe_label(r.get("Cuisine"))
-            desc = safe_label(r.get("Description"))
-            diet = safe_label(r.get("Diet"))
-            city = safe_label(r.get("City") or r.get("Cuisine"))  # fallback if CSV inconsistent
-            if not name:
-                continue
-            qid = f"food:{name}"
-            label = name
-            foods.append({
-                "qid": qid,
-                "label": label,
-                "type": "food",
-                "city": city,
-                "meta": {"cuisine": cuisine, "diet": diet, "description": desc}
-            })
-    return foods
+def catalog_item(r):
+    """Train item dict (qid, label, type, city, meta) of one ingest.py record."""
+    kind, name, city = r["kind"], r["name"], r["city"]
+    if kind == "place":
+        meta = {"type": r["type"], "lat": r["lat"], "lon": r["lon"], "description": r["description"]}
+    elif kind == "event":
+        loc, start, end = r["location"], r["start"], r["end"]
+        meta = {"location": loc, "start": start, "end": end,
+                "description": f"Event in {city}. Location: {loc}. Dates: {start} - {end}"}
+    else:
+        meta = {"cuisine": r["cuisine"], "diet": r["diet"], "lat": r["lat"], "lon": r["lon"],
+                "description": r["description"]}
+    return {"qid": f"{kind}:{name}", "label": name, "type": kind, "city": city, "meta": meta}
 
 def unify_items():
     # returns list of items and a map qid->index
-    places = load_items()
-    events = load_events()
-    foods = load_foods()
-    items = places + events + foods
+    items = [catalog_item(r) for r in load_catalog(CATALOG_DIR).records()]
     qid_to_idx = {it["qid"]: idx for idx, it in enumerate(items)}
-    print(f"Loaded items: {len(items)} (places: {len(places)}, events: {len(events)}, foods: {len(foods)})")
+    counts = Counter(it["type"] for it in items)
+    print(f"Loaded items: {len(items)} (places: {counts['place']}, events: {counts['event']}, foods: {counts['food']})")
     return items, qid_to_idx
 
 # --- Embedding steps ---
-def compute_content_embeddings(items, model_name=SENTENCE_MODEL, batch_size=64):
-    print("Loading sentence-transformer model:", model_name)
-    model = SentenceTransformer(model_name)
-    texts = []
-    for it in items:
-        lbl = it.get("label") or ""
-        desc = it.get("meta", {}).get("description", "") or ""
-        combined = lbl + ". " + desc
-        texts.append(combined)
-
-    print(f"Computing content embeddings for {len(texts)} items...")
-    embeddings = model.encode(texts, batch_size=batch_size, show_progress_bar=True, normalize_embeddings=False)
-    embeddings = np.array(embeddings, dtype=np.float32)
+def compute_content_embeddings(items, model_name=SENTENCE_MODEL, batch_size=64, cache_dir=EMBED_CACHE_DIR, encoder=None):
+    # Texts already in the embedding cache (same model, label and description) are not re-encoded;
+    # cache_dir=None encodes everything
+    labels = [it.get("label") or "" for it in items]
+    descs = [it.get("meta", {}).get("description", "") or "" for it in items]
+    texts = [lbl + ". " + desc for lbl, desc in zip(labels, descs)]
+
+    # `encoder` (anything with a sentence-transformers style .encode) replaces the model
+    model = encoder or sentence_encoder(model_name)
+    def encode(batch):
+        print(f"Computing content embeddings for {len(batch)} items...")
+        return model.encode(batch, batch_size=batch_size, show_progress_bar=True, normalize_embeddings=False)
+
+    if cache_dir is None:
+        embeddings = np.array(encode(texts), dtype=np.float32)
+    else:
+        cache = EmbeddingCache(cache_dir)
+        keys = [text_key(model_name, lbl, desc) for lbl, desc in zip(labels, descs)]
+        embeddings = cache.encode(keys, texts, encode)
+        print(f"Embedding cache: {cache.hits} cached, {cache.misses} encoded ({len(cache)} rows in {cache_dir})")
     print("Content embeddings shape:", embeddings.shape)
     return embeddings
 
-def compute_node2vec_embeddings(G, items, dimensions=NODE2VEC_DIM, workers=4, p=1, q=1, walk_length=80, num_walks=10):
-    # Run node2vec on the whole KG (NetworkX graph)
+def compute_query_embeddings(cities, pair_cities=(), model_name=SENTENCE_MODEL, batch_size=64,
+                             cache_dir=EMBED_CACHE_DIR, encoder=None):
+    """(keys, row-normalized embeddings) of every query_table.py template row."""
+    keys, texts = query_texts(cities, pair_cities)
+    model = encoder or sentence_encoder(model_name)
+    def encode(batch):
+        print(f"Computing query embeddings for {len(batch)} templates...")
+        return model.encode(batch, batch_size=batch_size, show_progress_bar=True, normalize_embeddings=False)
+
+    if cache_dir is None:
+        embeddings = np.array(encode(texts), dtype=np.float32)
+    else:
+        # Same cache as the item texts, under a separate key space
+        cache = EmbeddingCache(cache_dir)
+        embeddings = cache.encode([text_key(model_name + "#query", text, "") for text in texts], texts, encode)
+    return keys, l2_normalize_rows(np.asarray(embeddings, dtype=np.float32))
+
+def compute_node2vec_embeddings(kg_dir, items, dimensions=NODE2VEC_DIM, workers=4, p=1, q=1, walk_length=80, num_walks=10):
+    # node2vec on the whole KG: walks generated over the CSR graph (walks.py), streamed into Word2Vec
     print("Running Node2Vec on KG: dim", dimensions)
-    node2vec = Node2Vec(G, dimensions=dimensions, walk_length=walk_length, num_walks=num_walks,
-                        workers=workers, p=p, q=q, quiet=True)
-    model = node2vec.fit(window=10, min_count=1, batch_words=4)  # gensim Word2Vec model
+    model = node2vec_model(kg_dir, dimensions=dimensions, walk_length=walk_length, num_walks=num_walks,
+                           p=p, q=q, workers=workers, seed=SEED,
+                           window=10, min_count=1, batch_words=4)
 
     # For each item in items list, try to get embedding from the model
     node_emb = np.zeros((len(items), dimensions), dtype=np.float32)
@@ -211,46 +183,16 @@ def compute_node2vec_embeddings(G, items, dimensions=NODE2VEC_DIM, workers=4, p=
     print("Node2Vec embeddings shape:", node_emb.shape)
     return node_emb
 
-def build_synthetic_interactions(items, num_users=NUM_SYN_USERS, min_per_user=MIN_ITEMS_PER_USER, max_per_user=MAX_ITEMS_PER_USER):
-    # Create a popularity distribution: some items are more popular (e.g., city centers, famous places)
-    n_items = len(items)
-    base_pop = np.ones(n_items, dtype=np.float32)
-
-    # encourage items that are places/events to be slightly more popular than food (as an example)
-    for idx, it in enumerate(items):
-        t = it.get("type", "")
-        if t == "place":
-            base_pop[idx] *= 1.4
-        elif t == "event":
-            base_pop[idx] *= 1.2
-        elif t == "food":
-            base_pop[idx] *= 0.9
-
-    # add some random popularity bumps
-    bumps = np.random.RandomState(SEED).rand(n_items) * 0.5
-    popularity = base_pop + bumps
-    popularity = popularity / popularity.sum()
-
-    # Generate interactions
-    rows = []
-    cols = []
-    data = []
-    for u in range(num_users):
-        k = random.randint(min_per_user, max_per_user)
-        # sample without replacement, bias by popularity
-        chosen = np.random.choice(n_items, size=min(k, n_items), replace=False, p=popularity)
-        for item_idx in chosen:
-            # generate implicit feedback weight (1 to 5)
-            weight = 1 + int(random.random() * 4)
-            rows.append(u)
-            cols.append(item_idx)
-            data.append(weight)
-
-    # Build sparse matrix (users x items)
-    user_count = num_users
-    item_count = n_items
-    mat = csr_matrix((data, (rows, cols)), shape=(user_count, item_count), dtype=np.float32)
-    print("Synthetic interactions matrix shape:", mat.shape, "nnz:", mat.nnz)
+def build_interactions(items, qid_to_idx, num_users=NUM_SYN_USERS, min_per_user=MIN_ITEMS_PER_USER,
+                       max_per_user=MAX_ITEMS_PER_USER, log_path=INTERACTIONS_CSV):
+    # Real interaction log if there is one, else synthetic users biased by item popularity
+    if log_path and os.path.exists(log_path):
+        mat = load_interaction_log(log_path, qid_to_idx, len(items))
+        print("Interaction log:", log_path)
+    else:
+        popularity = item_popularity(items, seed=SEED)
+        mat = synthetic_interactions(popularity, num_users, min_per_user, max_per_user, seed=SEED)
+    print("Interactions matrix shape:", mat.shape, "nnz:", mat.nnz)
     return mat
 
 def compute_item_factors_from_interactions(interactions_csr, n_components=CF_DIM):
@@ -260,6 +202,8 @@ def compute_item_factors_from_interactions(interactions_csr, n_components=CF_DIM
     # Using TruncatedSVD on the user-item matrix produces user latent components; to get item vectors, we can compute:
     # item_factors = V * Sigma (i.e., components_.T * Sigma) but TruncatedSVD provides components_ as shape (n_components, n_features)
     # where n_features==n_items when applied to users x items. So components_.T * Sigma gives item factors.
+    from sklearn.decomposition import TruncatedSVD
+
     print("Computing TruncatedSVD for collaborative factors (dim {})".format(n_components))
     svd = TruncatedSVD(n_components=n_components, random_state=SEED)
     svd.fit(interactions_csr)  # fit on users x items
@@ -273,40 +217,84 @@ def compute_item_factors_from_interactions(interactions_csr, n_components=CF_DIM
     print("Item factors shape:", item_factors.shape)
     return item_factors
 
+def compute_item_factors(interactions_csr, factorizer=CF_FACTORIZER, n_components=CF_DIM):
+    if factorizer == "als":
+        print("Computing implicit ALS for collaborative factors (dim {})".format(n_components))
+        _, item_factors = implicit_als(interactions_csr, factors=n_components, seed=SEED)
+        print("Item factors shape:", item_factors.shape)
+        return item_factors
+    return compute_item_factors_from_interactions(interactions_csr, n_components=n_components)
+
+def write_hnsw_index(out, vectors, labels, prev_labels=None, prev_path=None):
+    """Save to `out` the index at `prev_path` updated, when it holds `prev_labels`, else a fresh build.
+
+    Returns the element count of the saved index (deleted slots included).
+    """
+    if prev_labels is not None and prev_path is not None and os.path.exists(prev_path):
+        p, stats = update_hnsw_index(prev_path, vectors, labels, prev_labels)
+        print("  updated: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    else:
+        p = build_hnsw_index(vectors, labels)
+    p.save_index(out)
+    return p.get_current_count()
+
 def l2_normalize_rows(x, eps=1e-12):
     norms = np.linalg.norm(x, axis=1, keepdims=True)
     norms = np.maximum(norms, eps)
     return x / norms
 
 # --- Main pipeline ---
-def main():
+def main(update_index=False, factorizer=CF_FACTORIZER, query_pairs=False):
     print("=== TRAIN PIPELINE START ===")
     # 1) load items & KG
     items, qid_to_idx = unify_items()
     if not items:
         raise RuntimeError("No items loaded. Check your CSV files in data/")
 
-    if not os.path.exists(KG_IN):
-        raise FileNotFoundError(f"KG file not found at {KG_IN}. Run kg_build.py first.")
-    with open(KG_IN, "rb") as f:
-        G = pickle.load(f)
-    print("Loaded KG:", KG_IN, "Nodes:", G.number_of_nodes(), "Edges:", G.number_of_edges())
+    # Every output goes to a new version directory; the published one stays untouched until publish()
+    version = create_version(ART_DIR)
+    prev_dir = current_dir(ART_DIR)
+    print("Writing artifact version:", version)
+
+    def versioned(path):
+        return os.path.join(version, os.path.relpath(path, ART_DIR))
+
+    def previous(path):
+        return os.path.join(prev_dir, os.path.relpath(path, ART_DIR))
+
+    # Stable index labels: items keep the label they had in the previous run
+    prev = load_labels(previous(ITEM_LABELS))
+    keys = item_keys([it["qid"] for it in items])
+    labels, next_label = assign_labels(keys, prev)
+
+    if not os.path.exists(os.path.join(KG_CSR_DIR, "graph.json")):
+        raise FileNotFoundError(f"KG not found at {KG_CSR_DIR}. Run kg_build.py first.")
+    kg = KGGraph.load(KG_CSR_DIR)
+    print("Loaded KG:", KG_CSR_DIR, "Nodes:", kg.n_nodes, "Edges:", kg.n_edges)
 
     # 2) content embeddings
     content_emb = compute_content_embeddings(items)
-    np.save(CONTENT_EMB_OUT, content_emb)
-    print("Saved content embeddings:", CONTENT_EMB_OUT)
+    np.save(versioned(CONTENT_EMB_OUT), content_emb)
+    print("Saved content embeddings:", versioned(CONTENT_EMB_OUT))
+
+    # 2b) query embeddings for every known destination (and backbone city pair),
+    # so serving needs no sentence model
+    backbone = [c for seq in CITY_SEQUENCES.values() for c in seq]
+    cities = list(CITY_SEQUENCES) + backbone + [it["city"] for it in items]
+    query_keys, query_emb = compute_query_embeddings(cities, backbone if query_pairs else ())
+    write_query_table(versioned(QUERY_TABLE_DIR), query_keys, query_emb, SENTENCE_MODEL)
+    print(f"Saved query table ({len(query_keys)} rows):", versioned(QUERY_TABLE_DIR))
 
     # 3) node2vec embeddings
-    node2vec_emb = compute_node2vec_embeddings(G, items, dimensions=NODE2VEC_DIM)
-    np.save(NODE2VEC_EMB_OUT, node2vec_emb)
-    print("Saved node2vec embeddings:", NODE2VEC_EMB_OUT)
+    node2vec_emb = compute_node2vec_embeddings(KG_CSR_DIR, items, dimensions=NODE2VEC_DIM)
+    np.save(versioned(NODE2VEC_EMB_OUT), node2vec_emb)
+    print("Saved node2vec embeddings:", versioned(NODE2VEC_EMB_OUT))
 
-    # 4) collaborative synthetic interactions -> SVD factors
-    interactions = build_synthetic_interactions(items)
-    item_factors = compute_item_factors_from_interactions(interactions, n_components=CF_DIM)
-    np.save(ITEM_FACTORS_OUT, item_factors)
-    print("Saved item factors:", ITEM_FACTORS_OUT)
+    # 4) collaborative interactions (log or synthetic) -> SVD / ALS factors
+    interactions = build_interactions(items, qid_to_idx)
+    item_factors = compute_item_factors(interactions, factorizer=factorizer, n_components=CF_DIM)
+    np.save(versioned(ITEM_FACTORS_OUT), item_factors)
+    print("Saved item factors:", versioned(ITEM_FACTORS_OUT))
 
     # 5) combine embeddings
     # normalize each modality, then concatenate
@@ -314,48 +302,102 @@ def main():
     node2vec_emb_n = l2_normalize_rows(node2vec_emb)
     item_factors_n = l2_normalize_rows(item_factors)
 
-    combined = np.concatenate([content_emb_n, node2vec_emb_n, item_factors_n], axis=1).astype(np.float32)
+    combined = np.concatenate([content_emb_n, node2vec_emb_n, item_factors_n], axis=1)
+    combined = l2_normalize_rows(combined).astype(np.float32)
     print("Combined embeddings shape:", combined.shape)
-    # Save the modality arrays (already saved) and also save combined via hnsw index
-    # but we also store combined array as node2vec_embeddings.npy? No — create a combined file implicitly via index
-    # We'll save combined as a numpy file too for debugging
-    combined_np_out = os.path.join(ART_DIR, "combined_item_embeddings.npy")
+    # Save the combined (row-normalized) array too: inference memory-maps it
+    # instead of rebuilding it from the modality arrays in every process
+    combined_np_out = os.path.join(version, "combined_item_embeddings.npy")
     np.save(combined_np_out, combined)
     print("Saved combined embeddings:", combined_np_out)
 
-    # 6) Build HNSW index
+    # 6) Build HNSW index (or update the previous version's one)
     n_items, dim = combined.shape
     global FINAL_DIM
     FINAL_DIM = dim
-    print(f"Building HNSW index: n_items={n_items}, dim={dim}, space={HNSW_SPACE}")
-    p = hnswlib.Index(space=HNSW_SPACE, dim=dim)
-    p.init_index(max_elements=n_items, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
-    p.set_ef(HNSW_EF_SEARCH)
-
-    # If using "cosine" space we should ensure vectors are normalized (they are)
-    p.add_items(combined, np.arange(n_items))
-    p.save_index(HNSW_OUT)
-    print("Saved HNSW index to:", HNSW_OUT)
-
-    # 7) Save mapping (index->qid & metadata)
-    item_map = {}
-    for idx, it in enumerate(items):
-        item_map[idx] = {
-            "qid": it["qid"],
-            "label": it.get("label"),
-            "type": it.get("type"),
-            "city": it.get("city"),
-            "meta": it.get("meta", {})
-        }
-    with open(ITEM_MAP_OUT, "w", encoding="utf-8") as f:
-        json.dump(item_map, f, ensure_ascii=False, indent=2)
-    print("Saved item map:", ITEM_MAP_OUT)
+    incremental = update_index and prev is not None and int(prev["dim"]) == dim
+    if update_index and not incremental:
+        print("No compatible previous index; doing a full build")
+    print(f"{'Updating' if incremental else 'Building'} HNSW index: n_items={n_items}, dim={dim}, space={HNSW_SPACE}")
+    hnsw_elements = {}
+    hnsw_out = versioned(HNSW_OUT)
+    hnsw_elements[os.path.basename(hnsw_out)] = write_hnsw_index(
+        hnsw_out, combined, labels, prev["labels"] if incremental else None, previous(HNSW_OUT))
+    print("Saved HNSW index to:", hnsw_out)
+
+    # 7) Save item metadata (index -> qid & metadata), columnar + mmap-able
+    write_item_store(items, versioned(ITEM_STORE_DIR))
+    print("Saved item store:", versioned(ITEM_STORE_DIR))
+
+    # 7b) Per-bucket sub-indexes so each output section gets its own top-k.
+    # Labels are the same stable labels as in the main index.
+    buckets = bucket_codes(ItemStore(versioned(ITEM_STORE_DIR)))
+    bucket_outs = []
+    for bucket, name in enumerate(BUCKET_NAMES):
+        out = versioned(HNSW_BUCKET_OUT.format(name))
+        idx = np.flatnonzero(buckets == bucket)
+        if idx.size == 0:
+            continue
+        prev_bucket = prev["labels"][prev["buckets"] == bucket] if incremental else None
+        hnsw_elements[os.path.basename(out)] = write_hnsw_index(
+            out, combined[idx], labels[idx], prev_bucket, previous(HNSW_BUCKET_OUT.format(name)))
+        bucket_outs.append(out)
+        print(f"Saved {name} sub-index ({idx.size} items):", out)
+
+    # Written last: it describes the indexes now on disk
+    save_labels(versioned(ITEM_LABELS), keys, labels, buckets, next_label, dim)
+    print("Saved item labels:", versioned(ITEM_LABELS))
+
+    # 8) KG hop distances city -> item (indexed like the item store)
+    qids = [it["qid"] for it in items]
+    cities, indptr, indices, hops = build_distance_table(kg, qids, radius=KG_DIST_RADIUS)
+    save_distance_table(versioned(KG_DIST_OUT), cities, indptr, indices, hops, KG_DIST_RADIUS, len(qids))
+    print("Saved KG distance table:", versioned(KG_DIST_OUT))
+
+    # 9) Spatial grid over item coordinates (geo proximity, radius queries)
+    coords = np.array([[np.nan if it["meta"].get(f) is None else it["meta"][f] for f in ("lat", "lon")]
+                       for it in items], dtype=np.float64)
+    geo = build_geo_index(coords[:, 0], coords[:, 1], [it["city"] for it in items])
+    save_geo_index(versioned(GEO_INDEX_OUT), geo)
+    print(f"Saved geo index ({len(geo['order'])} located items, {len(geo['cell_keys'])} cells):",
+          versioned(GEO_INDEX_OUT))
+
+    # 10) Pairwise km between the located items of each city (itinerary routing)
+    city_dist = build_city_distances(coords[:, 0], coords[:, 1], [it["city"] for it in items])
+    save_city_distances(versioned(CITY_DIST_OUT), city_dist)
+    print(f"Saved city distance matrices ({len(city_dist['cities'])} cities, "
+          f"{city_dist['dist'].nbytes / 1e6:.1f} MB):", versioned(CITY_DIST_OUT))
+
+    # kg_build.py outputs that serving reads: the version carries its own copy
+    kg_outs = []
+    for pth in (CITY_INDEX_OUT, CITY_ROUTES_OUT):
+        if os.path.exists(pth):
+            shutil.copy2(pth, versioned(pth))
+            kg_outs.append(versioned(pth))
+
+    # 11) Publish: manifest, then the atomic CURRENT switch
+    manifest = publish(version, {"n_items": n_items,
+                                 "dims": {"content": int(content_emb.shape[1]), "node2vec": int(node2vec_emb.shape[1]),
+                                          "factors": int(item_factors.shape[1]), "combined": dim},
+                                 "hnsw_elements": hnsw_elements}, root=ART_DIR)
+    print(f"Published artifact version {manifest['version']} ({len(manifest['files'])} files)")
 
     print("=== TRAIN PIPELINE COMPLETE ===")
-    print("Artifacts written to:", ART_DIR)
+    print("Artifacts written to:", version)
     print("Files:")
-    for pth in [CONTENT_EMB_OUT, NODE2VEC_EMB_OUT, ITEM_FACTORS_OUT, combined_np_out, HNSW_OUT, ITEM_MAP_OUT]:
+    for pth in [versioned(CONTENT_EMB_OUT), versioned(QUERY_TABLE_DIR), versioned(NODE2VEC_EMB_OUT),
+                versioned(ITEM_FACTORS_OUT), combined_np_out, hnsw_out, *bucket_outs, versioned(ITEM_STORE_DIR),
+                versioned(ITEM_LABELS), versioned(KG_DIST_OUT), versioned(GEO_INDEX_OUT), versioned(CITY_DIST_OUT),
+                *kg_outs]:
         print(" -", pth)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Train embeddings and build the retrieval indexes")
+    parser.add_argument("--update_index", action="store_true",
+                        help="Start from the published version's HNSW indexes instead of rebuilding them")
+    parser.add_argument("--factorizer", choices=["svd", "als"], default=CF_FACTORIZER,
+                        help="Collaborative item factors: TruncatedSVD or implicit ALS")
+    parser.add_argument("--query_pairs", action="store_true",
+                        help="Also precompute query embeddings for every backbone source/destination pair")
+    args = parser.parse_args()
+    main(update_index=args.update_index, factorizer=args.factorizer, query_pairs=args.query_pairs)
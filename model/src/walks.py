@@ -0,0 +1,188 @@
+"""
+walks.py
+Vectorized node2vec random walks over the CSR knowledge graph (kg_csr).
+
+Replaces the `node2vec` package, which precomputes a transition table for
+every (previous, current) edge pair in Python dicts. Here a batch of walks
+advances one step at a time with NumPy:
+
+- first-order proposal: a uniform out-neighbour (the KG is unweighted, so
+  the alias table of every node is uniform and sampling is one random index)
+- p/q bias: rejection sampling. A proposal x after the step t -> v is
+  accepted with weight 1/p (x == t), 1 (edge t -> x exists) or 1/q, scaled
+  by the largest of the three. Edge membership scans t's (short) CSR row, or
+  for high-degree rows does one searchsorted over the globally sorted edge
+  keys src * n_nodes + dst.
+
+Walks follow out-edges and stop early at nodes without any, as the
+node2vec package does on a DiGraph. Start nodes are split into chunks with
+their own seeds (SeedSequence.spawn) and generated in a process pool; each
+worker memory-maps the graph, so memory does not grow with the number of
+walks. WalkCorpus streams the walks into gensim Word2Vec, regenerating the
+same walks on every pass instead of keeping them in a list.
+
+Walks are identical for any number of workers; Word2Vec itself trains on a
+single thread (thread scheduling reorders its updates) with a hash that does
+not depend on PYTHONHASHSEED, so the same graph and seed give the same
+vectors and ann_index.update_hnsw_index() sees no spurious changes.
+"""
+
+import zlib
+import multiprocessing as mp
+
+import numpy as np
+
+from kg_csr import KG_CSR_DIR, KGGraph
+
+WALK_LENGTH = 80
+NUM_WALKS = 10
+CHUNK_WALKS = 4096  # walks per task / per vectorized batch
+SCAN_DEGREE = 8     # edge checks scan rows up to this out-degree, binary-search beyond
+
+class WalkSampler:
+    """p/q-biased walk generator over the out-edges of a KGGraph."""
+
+    def __init__(self, kg, p=1.0, q=1.0, walk_length=WALK_LENGTH):
+        self.kg = kg
+        self.p = p
+        self.q = q
+        self.walk_length = walk_length
+        self.indptr = np.asarray(kg.indptr)
+        self.indices = np.asarray(kg.indices)
+        self.degree = np.diff(self.indptr)
+        self.n_nodes = kg.n_nodes
+        self._edge_keys = None
+
+    @property
+    def edge_keys(self):
+        """src * n_nodes + dst of every edge; sorted because CSR rows are sorted by dst."""
+        if self._edge_keys is None:
+            src = np.repeat(np.arange(self.n_nodes, dtype=np.int64), self.degree)
+            self._edge_keys = src * self.n_nodes + self.indices
+        return self._edge_keys
+
+    def _has_edge(self, src, dst):
+        deg = self.degree[src]
+        max_deg = int(deg.max()) if deg.size else 0
+        if max_deg <= SCAN_DEGREE:
+            # Low out-degree (the common case in the KG): compare against each neighbour slot
+            start = self.indptr[src]
+            found = np.zeros(src.size, dtype=bool)
+            for j in range(max_deg):
+                has = deg > j
+                found[has] |= self.indices[start[has] + j] == dst[has]
+            return found
+        keys = src * self.n_nodes + dst
+        pos = np.minimum(np.searchsorted(self.edge_keys, keys), len(self.edge_keys) - 1)
+        return self.edge_keys[pos] == keys
+
+    def _uniform_neighbor(self, nodes, rng):
+        offsets = (rng.random(nodes.size) * self.degree[nodes]).astype(np.int64)
+        return self.indices[self.indptr[nodes] + offsets].astype(np.int64)
+
+    def _biased_neighbor(self, prev, cur, rng):
+        w_return, w_in, w_out = 1.0 / self.p, 1.0, 1.0 / self.q
+        w_max = max(w_return, w_in, w_out)
+        out = np.empty(cur.size, dtype=np.int64)
+        todo = np.arange(cur.size)
+        while todo.size:
+            cand = self._uniform_neighbor(cur[todo], rng)
+            weight = np.full(todo.size, w_out)
+            weight[self._has_edge(prev[todo], cand)] = w_in
+            weight[cand == prev[todo]] = w_return
+            accept = rng.random(todo.size) * w_max < weight
+            out[todo[accept]] = cand[accept]
+            todo = todo[~accept]
+        return out
+
+    def walks(self, starts, rng):
+        """(len(starts), walk_length) int32 walks; -1 pads walks that hit a dead end."""
+        starts = np.asarray(starts, dtype=np.int64)
+        walks = np.full((starts.size, self.walk_length), -1, dtype=np.int32)
+        walks[:, 0] = starts
+        rows, cur, prev = np.arange(starts.size), starts, None
+        biased = not (self.p == 1 and self.q == 1)
+        for step in range(1, self.walk_length):
+            alive = self.degree[cur] > 0
+            rows, cur = rows[alive], cur[alive]
+            if not rows.size:
+                break
+            if prev is None or not biased:
+                nxt = self._uniform_neighbor(cur, rng)
+            else:
+                nxt = self._biased_neighbor(prev[alive], cur, rng)
+            walks[rows, step] = nxt
+            prev, cur = cur, nxt
+        return walks
+
+# === Parallel generation ===
+_worker_sampler = None
+
+def _init_worker(graph_dir, p, q, walk_length):
+    global _worker_sampler
+    _worker_sampler = WalkSampler(KGGraph(graph_dir), p=p, q=q, walk_length=walk_length)
+
+def _run_task(task):
+    starts, seed = task
+    return _worker_sampler.walks(starts, np.random.default_rng(seed))
+
+def _tasks(n_nodes, num_walks, seed, chunk_walks):
+    """(start nodes, seed) chunks: every node once per round, in a shuffled order per round."""
+    root = np.random.SeedSequence(seed)
+    round_seeds = root.spawn(num_walks)
+    for round_seed in round_seeds:
+        order = np.random.default_rng(round_seed).permutation(n_nodes)
+        chunks = range(0, n_nodes, chunk_walks)
+        for lo, chunk_seed in zip(chunks, round_seed.spawn(len(chunks))):
+            yield order[lo:lo + chunk_walks], chunk_seed
+
+def generate_walks(graph_dir=KG_CSR_DIR, num_walks=NUM_WALKS, walk_length=WALK_LENGTH, p=1.0, q=1.0,
+                   workers=1, seed=42, chunk_walks=CHUNK_WALKS):
+    """Yield walk batches (int32 arrays, -1 padded) in a deterministic order for any `workers`."""
+    n_nodes = KGGraph(graph_dir).n_nodes
+    tasks = _tasks(n_nodes, num_walks, seed, chunk_walks)
+    if workers <= 1:
+        _init_worker(graph_dir, p, q, walk_length)
+        for task in tasks:
+            yield _run_task(task)
+        return
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else mp.get_context()
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(graph_dir, p, q, walk_length)) as pool:
+        yield from pool.imap(_run_task, tasks)
+
+class WalkCorpus:
+    """Re-iterable corpus of walks as lists of node id strings (for gensim Word2Vec).
+
+    Every iteration regenerates the same walks from the same seeds, so
+    nothing but the node id table is kept between passes.
+    """
+
+    def __init__(self, graph_dir=KG_CSR_DIR, **walk_kwargs):
+        self.graph_dir = graph_dir
+        self.walk_kwargs = walk_kwargs
+        self.node_ids = KGGraph(graph_dir).node_ids()
+
+    def __iter__(self):
+        ids = self.node_ids
+        for batch in generate_walks(self.graph_dir, **self.walk_kwargs):
+            lengths = np.where(batch[:, -1] >= 0, batch.shape[1], np.argmax(batch < 0, axis=1))
+            for row, n in zip(batch.tolist(), lengths.tolist()):
+                yield [ids[i] for i in row[:n]]
+
+def stable_hash(text):
+    """String hash for Word2Vec that is the same in every process (unlike the built-in hash)."""
+    return zlib.crc32(text.encode("utf-8"))
+
+def node2vec_model(graph_dir=KG_CSR_DIR, dimensions=128, walk_length=WALK_LENGTH, num_walks=NUM_WALKS,
+                   p=1.0, q=1.0, workers=4, seed=42, **word2vec_params):
+    """Train gensim Word2Vec on streamed node2vec walks; returns the Word2Vec model.
+
+    `workers` processes generate the walks; Word2Vec runs on one thread so
+    the vectors are reproducible.
+    """
+    from gensim.models import Word2Vec
+
+    corpus = WalkCorpus(graph_dir, num_walks=num_walks, walk_length=walk_length,
+                        p=p, q=q, workers=workers, seed=seed)
+    return Word2Vec(sentences=corpus, vector_size=dimensions, workers=1, seed=seed,
+                    hashfxn=stable_hash, **word2vec_params)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import networkx as nx
+import numpy as np
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+@pytest.fixture(scope="session")
+def toy_kg(tmp_path_factory):
+    """(networkx DiGraph, CSR directory) of a small KG shaped like kg_build.py's.
+
+    Four cities joined by 'nearby' edges (both ways), items linked to them and to
+    type/cuisine nodes, a chain of 8 places leading to Kochi (for radius caps)
+    and a component no city reaches.
+    """
+    from kg_csr import write_kg_csr
+
+    rng = np.random.default_rng(7)
+    G = nx.DiGraph()
+    cities = ["city:Kochi", "city:Aluva", "city:Munnar", "city:Kannur"]
+    for c in cities:
+        G.add_node(c, node_type="city", label=c[len("city:"):])
+    for a, b in [(0, 1), (1, 2)]:
+        G.add_edge(cities[a], cities[b], rel="nearby")
+        G.add_edge(cities[b], cities[a], rel="nearby")
+    for t in ["type:Beach", "type:Temple", "cuisine:Kerala"]:
+        G.add_node(t, node_type=t.split(":")[0], label=t.split(":")[1])
+    for i in range(30):
+        kind = ("place", "event", "food")[i % 3]
+        node = f"Q{i}"
+        G.add_node(node, node_type=kind, label=f"item {i}")
+        G.add_edge(node, cities[rng.integers(len(cities))],
+                   rel={"place": "located_in", "event": "happens_in", "food": "available_in"}[kind])
+        G.add_edge(node, ["type:Beach", "type:Temple", "cuisine:Kerala"][rng.integers(3)], rel="instance_of")
+    for i in range(8):
+        G.add_node(f"chain{i}", node_type="place", label=f"chain {i}")
+        G.add_edge(f"chain{i}", f"chain{i - 1}" if i else "city:Kochi", rel="near")
+    G.add_node("Qisland", node_type="place", label="island")
+    G.add_node("type:Island", node_type="type", label="Island")
+    G.add_edge("Qisland", "type:Island", rel="instance_of")
+
+    path = str(tmp_path_factory.mktemp("toy_kg"))
+    write_kg_csr(G, path)
+    return G, path
@@ -0,0 +1,52 @@
+"""Implicit ALS (als.py): the conjugate-gradient solver against the exact solve."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+sp = pytest.importorskip("scipy.sparse")
+
+from als import _half_step, implicit_als
+
+FACTORS = 8
+REG, ALPHA = 0.01, 40.0
+
+@pytest.fixture(scope="module")
+def interactions():
+    rng = np.random.default_rng(0)
+    return sp.random(60, 40, density=0.15, random_state=1, format="csr", dtype=np.float32,
+                     data_rvs=lambda n: rng.integers(1, 4, n))
+
+def objective(users, items, interactions):
+    r = interactions.toarray().astype(np.float64)
+    err = (r > 0) - users.astype(np.float64) @ items.T.astype(np.float64)
+    return float(((1 + ALPHA * r) * err ** 2).sum() + REG * ((users ** 2).sum() + (items ** 2).sum()))
+
+def test_exact_half_step_solves_the_normal_equations(interactions):
+    Y = np.random.default_rng(1).standard_normal((40, FACTORS)).astype(np.float32)
+    with ThreadPoolExecutor(2) as pool:
+        X = _half_step(interactions, Y, np.zeros((60, FACTORS), np.float32), REG, ALPHA, 0, pool)
+    for u in range(60):
+        c = 1 + ALPHA * interactions[u].toarray()[0]
+        p = (interactions[u].toarray()[0] > 0).astype(np.float64)
+        A = Y.T @ (c[:, None] * Y) + REG * np.eye(FACTORS)
+        np.testing.assert_allclose(A @ X[u], Y.T @ (c * p), rtol=1e-3, atol=1e-3)
+
+def test_cg_half_step_converges_to_the_exact_solve(interactions):
+    Y = np.random.default_rng(1).standard_normal((40, FACTORS)).astype(np.float32)
+    X0 = np.zeros((60, FACTORS), np.float32)
+    with ThreadPoolExecutor(2) as pool:
+        exact = _half_step(interactions, Y, X0, REG, ALPHA, 0, pool)
+        errors = [np.abs(_half_step(interactions, Y, X0, REG, ALPHA, steps, pool) - exact).max()
+                  for steps in (2, FACTORS, 2 * FACTORS)]
+    assert errors[0] > errors[1] > errors[2]
+    assert errors[2] < 1e-4 * np.abs(exact).max()
+
+def test_cg_factorization_reaches_the_exact_objective(interactions):
+    exact = objective(*implicit_als(interactions, factors=FACTORS, iterations=15, cg_steps=0, verbose=False),
+                      interactions)
+    for steps in (3, FACTORS):
+        users, items = implicit_als(interactions, factors=FACTORS, iterations=15, cg_steps=steps, verbose=False)
+        assert users.dtype == items.dtype == np.float32
+        assert objective(users, items, interactions) == pytest.approx(exact, rel=0.02)
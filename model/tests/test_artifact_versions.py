@@ -0,0 +1,87 @@
+"""Publishing, ordering, pruning and verification of artifact versions."""
+
+import os
+
+import artifact_versions as av
+
+def write(path, data=b"x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+def publish_one(root, data=b"x", info=None):
+    path = av.create_version(root)
+    write(os.path.join(path, "item_store", "kind.npy"), data)
+    return path, av.publish(path, info or {"n_items": 1}, root=root)
+
+def test_flat_layout(tmp_path):
+    root = str(tmp_path)
+    assert av.current_version(root) is None
+    assert av.current_dir(root) == root
+    assert av.derive_version(root) == (None, None)
+
+def test_names_sort_in_creation_order(tmp_path):
+    paths = [av.create_version(str(tmp_path)) for _ in range(50)]
+    names = [os.path.basename(p) for p in paths]
+    assert sorted(names) == names
+    assert len(set(names)) == len(names)
+
+def test_publish_switches_current_and_writes_manifest(tmp_path):
+    root = str(tmp_path)
+    path, manifest = publish_one(root, b"abc", {"n_items": 3})
+    assert av.current_version(root) == manifest["version"] == os.path.basename(path)
+    assert av.current_dir(root) == path
+    assert av.read_manifest(path) == manifest
+    assert manifest["n_items"] == 3
+    assert manifest["files"] == {os.path.join("item_store", "kind.npy"): {
+        "size": 3, "sha256": "ba7816bf8f01cfea414140de5dae2223b00361a396177a9cb410ff61f20015ad"}}
+
+def test_prune_keeps_the_newest_published_versions(tmp_path):
+    root = str(tmp_path)
+    published = [publish_one(root)[0] for _ in range(av.KEEP_VERSIONS + 2)]
+    unpublished = av.create_version(root)
+    left = sorted(os.listdir(os.path.join(root, av.VERSIONS_DIR)))
+    assert left == sorted(os.path.basename(p) for p in published[-av.KEEP_VERSIONS:] + [unpublished])
+    assert av.current_dir(root) == published[-1]
+
+def test_prune_never_deletes_current(tmp_path):
+    root = str(tmp_path)
+    path, _ = publish_one(root)
+    av.prune(root, keep=0)
+    assert os.path.isdir(path)
+
+def test_verify(tmp_path):
+    path, manifest = publish_one(str(tmp_path), b"abc")
+    assert av.verify(path, manifest, hashes=True) == []
+    write(os.path.join(path, "item_store", "kind.npy"), b"abd")
+    assert av.verify(path, manifest) == []
+    assert av.verify(path, manifest, hashes=True) == [f"{os.path.join('item_store', 'kind.npy')} does not match its sha256"]
+    write(os.path.join(path, "item_store", "kind.npy"), b"abcd")
+    assert "4 bytes" in av.verify(path, manifest)[0]
+    os.remove(os.path.join(path, "item_store", "kind.npy"))
+    assert "missing" in av.verify(path, manifest)[0]
+
+def test_derived_version_leaves_the_published_files_alone(tmp_path):
+    root = str(tmp_path)
+    old, _ = publish_one(root, b"old", {"n_items": 1, "dims": {"content": 4}})
+    write(os.path.join(old, "table.npz"), b"keep")
+    new, info = av.derive_version(root)
+    assert info == {"n_items": 1, "dims": {"content": 4}}
+    assert not os.path.exists(os.path.join(new, av.MANIFEST_FILE))
+    write(av.fresh_path(os.path.join(new, "item_store", "kind.npy")), b"new")
+    manifest = av.publish(new, info, root=root)
+
+    with open(os.path.join(old, "item_store", "kind.npy"), "rb") as f:
+        assert f.read() == b"old"
+    assert av.current_dir(root) == new
+    assert set(manifest["files"]) == {"table.npz", os.path.join("item_store", "kind.npy")}
+    assert manifest["dims"] == {"content": 4}
+
+def test_publish_files(tmp_path):
+    root = str(tmp_path)
+    publish_one(root)
+    source = os.path.join(root, "city_index.json")
+    write(source, b"{}")
+    manifest = av.publish_files({source: source}, root=root)
+    assert "city_index.json" in manifest["files"]
+    assert os.path.exists(os.path.join(av.current_dir(root), "city_index.json"))
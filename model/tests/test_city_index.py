@@ -0,0 +1,43 @@
+"""City-name resolution (city_index.CityIndex)."""
+
+import pytest
+
+from city_index import CityIndex
+
+CITIES = ["Kochi", "Fort Kochi", "Kozhikode", "Thrissur", "Thiruvananthapuram", "Kannur", "Munnar"]
+
+@pytest.fixture(scope="module")
+def index():
+    return CityIndex.from_cities(CITIES)
+
+@pytest.mark.parametrize("query, city", [
+    ("kochi", "Kochi"),
+    ("  THIRUVANANTHAPURAM ", "Thiruvananthapuram"),
+    ("Thrissur, Kerala", "Thrissur"),
+])
+def test_exact_names(index, query, city):
+    assert index.resolve(query) == city
+
+@pytest.mark.parametrize("query, city", [("Cochin", "Kochi"), ("calicut", "Kozhikode"),
+                                         ("Trichur", "Thrissur"), ("Trivandrum", "Thiruvananthapuram")])
+def test_aliases(index, query, city):
+    assert index.resolve(query) == city
+
+def test_alias_of_a_city_missing_from_the_kg(index):
+    assert index.resolve("Alleppey") is None
+
+@pytest.mark.parametrize("query, city", [("Kozhikod", "Kozhikode"), ("Thrisur", "Thrissur"),
+                                         ("Kanur", "Kannur"), ("Thiruvanathapuram", "Thiruvananthapuram")])
+def test_typos(index, query, city):
+    assert index.resolve(query) == city
+
+def test_typos_beyond_the_edit_bound(index):
+    # 7 letters allow one edit; kannoor -> kannur needs two
+    assert index.resolve("Kannoor") is None
+
+def test_partial_name(index):
+    assert index.resolve("Fort") == "Fort Kochi"
+
+@pytest.mark.parametrize("query", ["Mumbai", "", None])
+def test_unknown(index, query):
+    assert index.resolve(query) is None
@@ -0,0 +1,58 @@
+"""Date parsing and event date filtering (item_store.parse_day, date_overlap_mask)."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from item_store import NO_DAY, date_overlap_mask, format_day, parse_day
+
+DAY = parse_day("2025-10-20")
+
+@pytest.mark.parametrize("text", ["2025-10-20", "20 Oct 2025", "20 October 2025", "  20 Oct 2025 "])
+def test_parse_day_formats(text):
+    assert parse_day(text) == DAY
+    assert format_day(parse_day(text)) == "2025-10-20"
+
+@pytest.mark.parametrize("text", [None, "", "   ", "tomorrow", "2025-02-30", "20/10/2025", "Oct 20 2025"])
+def test_parse_day_missing_or_invalid(text):
+    assert parse_day(text) == NO_DAY
+    assert format_day(parse_day(text)) == ""
+
+def test_parse_day_epoch():
+    assert parse_day("1970-01-01") == 0
+    assert parse_day("1969-12-31") == -1
+    assert parse_day("2025-10-21") - DAY == 1
+
+@pytest.fixture(scope="module")
+def store():
+    # 0: Oct 20-22, 1: Oct 25 only, 2: no dates, 3: start only, 4: end only
+    start = [DAY, DAY + 5, NO_DAY, DAY, NO_DAY]
+    end = [DAY + 2, DAY + 5, NO_DAY, NO_DAY, DAY + 2]
+    return SimpleNamespace(start_day=np.array(start, dtype=np.int32), end_day=np.array(end, dtype=np.int32))
+
+ALL = [[0, 1, 2, 3, 4]]
+
+@pytest.mark.parametrize("q_start, q_end, expected", [
+    (DAY, DAY + 2, [True, False, False, False, False]),
+    (DAY + 2, DAY + 5, [True, True, False, False, False]),     # both boundary days are inclusive
+    (DAY + 3, DAY + 4, [False, False, False, False, False]),   # between the two events
+    (DAY - 5, DAY - 1, [False, False, False, False, False]),   # ends the day before item 0 starts
+    (DAY + 5, DAY + 5, [False, True, False, False, False]),    # one-day window on a one-day event
+])
+def test_overlap(store, q_start, q_end, expected):
+    assert date_overlap_mask(store, ALL, [q_start], [q_end]).tolist() == [expected]
+
+def test_window_ending_before_it_starts_is_its_start_day(store):
+    # Oct 25 -> Oct 21: only what is on Oct 25, not item 0 (which a swapped window would match)
+    assert date_overlap_mask(store, ALL, [DAY + 5], [DAY + 1]).tolist() == [[False, True, False, False, False]]
+    assert date_overlap_mask(store, ALL, [DAY + 1], [DAY]).tolist() == [[True, False, False, False, False]]
+
+@pytest.mark.parametrize("q_start, q_end", [(NO_DAY, NO_DAY), (NO_DAY, DAY), (DAY, NO_DAY)])
+def test_query_without_dates_matches_everything(store, q_start, q_end):
+    assert date_overlap_mask(store, ALL, [q_start], [q_end]).all()
+
+def test_rows_are_filtered_by_their_own_dates(store):
+    item_idx = [[0, 1], [0, 1], [2, 2]]
+    mask = date_overlap_mask(store, item_idx, [DAY, NO_DAY, DAY], [DAY, NO_DAY, DAY + 9])
+    assert mask.tolist() == [[True, False], [True, True], [False, False]]
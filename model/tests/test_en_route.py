@@ -0,0 +1,48 @@
+"""En-route candidates for source/destination pairs without inner backbone cities."""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from city_index import CityIndex
+from city_routes import CityRoutes, build_city_routes
+from inference import Recommender
+from item_store import BUCKET_EVENT, BUCKET_FOOD, BUCKET_HOTEL, BUCKET_SPOT
+from kg_distances import KGDistanceTable
+
+# Backbone: Kochi - Aluva - Angamaly, and a separate Munnar - Devikulam pair
+CITIES = ["Kochi", "Aluva", "Angamaly", "Munnar", "Devikulam"]
+EDGES = [("Kochi", "Aluva"), ("Aluva", "Angamaly"), ("Munnar", "Devikulam")]
+
+@pytest.fixture
+def engine(tmp_path):
+    # Items 0-3 are linked to Aluva (a spot, a hotel, a food place and an event), item 4 to Kochi
+    table = KGDistanceTable(np.array(["city:Aluva", "city:Kochi"]), np.array([0, 4, 5]),
+                            np.array([0, 1, 2, 3, 4]), np.array([1, 1, 1, 1, 1]), radius=6, n_items=5)
+    items = SimpleNamespace(bucket=np.array([BUCKET_SPOT, BUCKET_HOTEL, BUCKET_FOOD, BUCKET_EVENT, BUCKET_SPOT]),
+                            cities=["Aluva", "Kochi"], city=np.array([0, 0, 0, 0, 1]))
+    engine = Recommender(str(tmp_path))
+    engine.artifact_set.artifacts.update(city_routes=CityRoutes(build_city_routes(EDGES, links=())),
+                                         city_index=CityIndex.from_cities(CITIES),
+                                         kg_distances=table, items=items)
+    return engine
+
+@pytest.mark.parametrize("source, destination", [
+    ("Kochi", "Munnar"),      # no backbone path
+    ("Kochi", "Aluva"),       # adjacent: no city strictly inside the path
+    ("Kochi", "Kochi"),
+    ("Kochi", "Nowhere"),     # not a backbone city
+])
+def test_no_inner_cities_gives_no_en_route_results(engine, source, destination):
+    path = engine.route_cities(source, destination)
+    assert len(path) < 3
+    assert engine.en_route_candidates(path).size == 0
+    requests = [{"source": source, "destination": destination}]
+    assert engine.recommend_en_route(requests, np.zeros((1, 4), dtype=np.float32)) == [[]]
+
+def test_inner_city_items(engine):
+    path = engine.route_cities("Kochi", "Angamaly")
+    assert path == ["Kochi", "Aluva", "Angamaly"]
+    # Spots and food of Aluva only: no hotels or events, nothing of the endpoints
+    assert engine.en_route_candidates(path).tolist() == [0, 2]
@@ -0,0 +1,69 @@
+"""CSR knowledge graph (kg_csr.KGGraph) against networkx on the toy KG."""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from kg_csr import KGGraph
+
+@pytest.fixture(scope="module")
+def graphs(toy_kg):
+    G, path = toy_kg
+    return G, KGGraph(path)
+
+def nx_hops(G, sources, cutoff=None):
+    """Hop distance per node of G (in KGGraph order) from the nearest source, -1 = unreachable."""
+    lengths = nx.multi_source_dijkstra_path_length(G, set(sources), cutoff=cutoff)
+    return np.array([lengths.get(n, -1) for n in G.nodes])
+
+def test_nodes_and_edges(graphs):
+    G, kg = graphs
+    assert kg.node_ids() == list(G.nodes)
+    assert (kg.n_nodes, kg.n_edges) == (G.number_of_nodes(), G.number_of_edges())
+    assert [kg.node_id(i) for i in kg.nodes_of_type("city")] == [n for n, t in G.nodes(data="node_type") if t == "city"]
+    assert kg.nodes_of_type("nothing").size == 0
+    assert kg.label(kg.index["city:Kochi"]) == "Kochi"
+
+def test_neighbors(graphs):
+    G, kg = graphs
+    ids = kg.node_ids()
+    for node in ["city:Kochi", "Q0", "Q4", "type:Beach", "Qisland"]:
+        assert sorted(ids[i] for i in kg.neighbors(node)) == sorted(G.successors(node))
+        assert sorted(ids[i] for i in kg.neighbors(node, reverse=True)) == sorted(G.predecessors(node))
+        assert sorted(ids[i] for i in kg.neighbors(node, rel="nearby")) == \
+            sorted(v for _, v, r in G.out_edges(node, data="rel") if r == "nearby")
+    assert kg.neighbors("city:Kochi", rel="no such relation").size == 0
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("source", ["city:Kochi", "city:Kannur", "Q3", "chain7", "Qisland", "type:Temple"])
+def test_bfs_matches_networkx(graphs, source, reverse):
+    G, kg = graphs
+    np.testing.assert_array_equal(kg.bfs(source, reverse=reverse), nx_hops(G.reverse() if reverse else G, [source]))
+
+@pytest.mark.parametrize("max_hops", [0, 1, 2, 5])
+def test_bfs_radius_cap(graphs, max_hops):
+    G, kg = graphs
+    dist = kg.bfs("city:Kochi", max_hops=max_hops, reverse=True)
+    np.testing.assert_array_equal(dist, nx_hops(G.reverse(), ["city:Kochi"], cutoff=max_hops))
+    # The chain leads 8 hops away from Kochi: only its first max_hops nodes are reached
+    chain = [kg.index[f"chain{i}"] for i in range(8)]
+    assert dist[chain].tolist() == [i + 1 if i < max_hops else -1 for i in range(8)]
+
+def test_unreachable_nodes(graphs):
+    G, kg = graphs
+    dist = kg.bfs(kg.nodes_of_type("city"), reverse=True)
+    island = [kg.index["Qisland"], kg.index["type:Island"]]
+    assert dist[island].tolist() == [-1, -1]
+    assert kg.k_hop("Qisland", 3).tolist() == [kg.index["type:Island"]]
+
+def test_multi_source_bfs_origin(graphs):
+    G, kg = graphs
+    sources = ["city:Aluva", "city:Kannur"]
+    dist, origin = kg.bfs(sources, reverse=True, return_origin=True)
+    np.testing.assert_array_equal(dist, nx_hops(G.reverse(), sources))
+    # Every reached node is reached from a source at exactly its distance
+    reached = np.flatnonzero(dist >= 0)
+    ids = kg.node_ids()
+    for i in reached:
+        assert nx.shortest_path_length(G, ids[i], ids[origin[i]]) == dist[i]
+    assert (origin[dist < 0] == -1).all()
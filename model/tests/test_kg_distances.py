@@ -0,0 +1,75 @@
+"""City -> item hop table (kg_distances) against networkx shortest paths on the toy KG."""
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from geo import hop_proximity
+from kg_csr import KGGraph
+from kg_distances import KGDistanceTable, build_distance_table, save_distance_table
+
+RADIUS = 3
+
+@pytest.fixture(scope="module")
+def qids(toy_kg):
+    G, _ = toy_kg
+    # Item order of an item store: KG items, an item missing from the KG and a
+    # duplicate name backed by the same node as another item
+    return [n for n in G.nodes if n.startswith(("Q", "chain"))] + ["Qmissing", "Q5"]
+
+@pytest.fixture(scope="module")
+def table(toy_kg, qids):
+    _, path = toy_kg
+    return KGDistanceTable(*build_distance_table(KGGraph(path), qids, radius=RADIUS), radius=RADIUS, n_items=len(qids))
+
+def nx_item_hops(G, city, qids, cutoff):
+    """Item -> city path length per qid, -1 if none within `cutoff` (or not in the graph)."""
+    lengths = nx.single_source_shortest_path_length(G.reverse(), city, cutoff=cutoff)
+    return np.array([lengths.get(q, -1) for q in qids])
+
+def test_cities(toy_kg, table):
+    G, _ = toy_kg
+    assert list(table.cities) == sorted(n for n, t in G.nodes(data="node_type") if t == "city")
+
+@pytest.mark.parametrize("city", ["city:Kochi", "city:Aluva", "city:Munnar", "city:Kannur"])
+def test_distances_match_networkx(toy_kg, qids, table, city):
+    G, _ = toy_kg
+    expected = nx_item_hops(G, city, qids, RADIUS)
+    items = np.arange(len(qids))
+    np.testing.assert_array_equal(table.distances(city, items), expected)
+    np.testing.assert_array_equal(table.proximity(city, items), hop_proximity(expected))
+    for max_hops in (1, 2):
+        assert table.items_within(city, max_hops).tolist() == np.flatnonzero((expected >= 0) & (expected <= max_hops)).tolist()
+
+def test_radius_cap(toy_kg, qids, table):
+    G, _ = toy_kg
+    chain = [qids.index(f"chain{i}") for i in range(8)]
+    assert table.distances("city:Kochi", chain).tolist() == [1, 2, 3, -1, -1, -1, -1, -1]
+    # networkx does reach the rest of the chain
+    assert nx.shortest_path_length(G, "chain7", "city:Kochi") == 8
+
+def test_unreachable_and_missing_items(qids, table):
+    items = [qids.index("Qisland"), qids.index("Qmissing")]
+    for city in table.city_rows:
+        assert table.distances(city, items).tolist() == [-1, -1]
+        assert table.proximity(city, items).tolist() == [0.0, 0.0]
+    assert table.distances("city:Nowhere", items).tolist() == [-1, -1]
+    assert table.items_within("city:Nowhere", RADIUS).size == 0
+
+def test_duplicate_names_share_the_node(qids, table):
+    first, dup = qids.index("Q5"), len(qids) - 1
+    for city in table.city_rows:
+        a, b = table.distances(city, [first, dup])
+        assert a == b
+
+def test_save_and_load(tmp_path, toy_kg, qids):
+    _, path = toy_kg
+    arrays = build_distance_table(KGGraph(path), qids, radius=RADIUS)
+    out = str(tmp_path / "kg_distances.npz")
+    save_distance_table(out, *arrays, radius=RADIUS, n_items=len(qids))
+    loaded = KGDistanceTable.load(out)
+    assert (loaded.radius, loaded.n_items) == (RADIUS, len(qids))
+    items = np.arange(len(qids))
+    for city in loaded.city_rows:
+        np.testing.assert_array_equal(loaded.distances(city, items),
+                                      KGDistanceTable(*arrays, RADIUS, len(qids)).distances(city, items))
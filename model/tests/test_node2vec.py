@@ -0,0 +1,40 @@
+"""node2vec vectors are reproducible, so an index update on unchanged data is a no-op."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("gensim")
+pytest.importorskip("hnswlib")
+
+from ann_index import build_hnsw_index, update_hnsw_index
+from kg_csr import write_csr
+from walks import node2vec_model
+
+@pytest.fixture(scope="module")
+def graph_dir(tmp_path_factory):
+    # 60 nodes: a ring with random chords, plus a few dead ends
+    rng = np.random.default_rng(1)
+    n = 60
+    src = np.concatenate([np.arange(n - 5), rng.integers(0, n - 5, 80)])
+    dst = np.concatenate([(np.arange(n - 5) + 1) % n, rng.integers(0, n, 80)])
+    path = str(tmp_path_factory.mktemp("kg"))
+    write_csr(path, [f"Q{i}" for i in range(n)], [f"node {i}" for i in range(n)], np.zeros(n), ["place"],
+              src, dst, np.zeros(src.size), ["near"])
+    return path
+
+def node_vectors(graph_dir, workers):
+    model = node2vec_model(graph_dir, dimensions=16, walk_length=12, num_walks=4, workers=workers,
+                           window=5, min_count=1, batch_words=4)
+    vectors = np.stack([model.wv[f"Q{i}"] for i in range(60)]).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def test_two_runs_update_nothing(graph_dir, tmp_path):
+    first = node_vectors(graph_dir, workers=1)
+    second = node_vectors(graph_dir, workers=2)
+    np.testing.assert_array_equal(first, second)
+
+    labels = np.arange(60, dtype=np.int64)
+    path = str(tmp_path / "index.bin")
+    build_hnsw_index(first, labels).save_index(path)
+    _, stats = update_hnsw_index(path, second, labels, labels)
+    assert stats == {"added": 0, "updated": 0, "deleted": 0, "unchanged": 60}
@@ -0,0 +1,81 @@
+"""Trip days, distances and per-day plans of planner.py."""
+
+import numpy as np
+import pytest
+
+from geo import haversine_km
+from item_store import NO_DAY
+from planner import (MAX_STOP_KM, MAX_TRIP_DAYS, MEALS_PER_DAY, SPOTS_PER_DAY, CityDistances, build_city_distances,
+                     nearest_neighbour, plan_itinerary, tour_length, trip_days, two_opt)
+
+@pytest.fixture(scope="module")
+def distances():
+    # 60 items in city A around (10.0, 76.3), 20 in city B far north, 5 without coordinates
+    rng = np.random.default_rng(0)
+    lat = np.concatenate([10.0 + rng.normal(0, 0.05, 60), 12.0 + rng.normal(0, 0.05, 20), np.full(5, np.nan)])
+    lon = np.concatenate([76.3 + rng.normal(0, 0.05, 60), 75.4 + rng.normal(0, 0.05, 20), np.full(5, np.nan)])
+    cities = ["A"] * 60 + ["B"] * 20 + ["A"] * 5
+    return CityDistances(build_city_distances(lat, lon, cities))
+
+def test_trip_days():
+    assert trip_days(100, 102) == [100, 101, 102]
+    assert trip_days(100, 100) == [100]
+    assert trip_days(100, 99) == [100]
+    assert trip_days(NO_DAY, 102) == [NO_DAY]
+    assert len(trip_days(100, 200)) == MAX_TRIP_DAYS
+
+def test_cached_matrix_matches_haversine(distances):
+    items = np.array([0, 5, 17, 42])
+    exact = haversine_km(distances.lat[items, None], distances.lon[items, None],
+                         distances.lat[items], distances.lon[items])
+    np.testing.assert_allclose(distances.matrix(items), exact, rtol=2e-3, atol=0.05)
+    # Mixed cities are computed on the fly
+    mixed = np.array([0, 70])
+    np.testing.assert_allclose(distances.matrix(mixed)[0, 1], haversine_km(
+        distances.lat[0], distances.lon[0], distances.lat[70], distances.lon[70]))
+
+def test_two_opt_never_lengthens_the_tour(distances):
+    dist = distances.matrix(np.arange(40))
+    route = nearest_neighbour(dist)
+    improved = two_opt(route, dist)
+    assert sorted(improved.tolist()) == list(range(40))
+    assert improved[0] == 0
+    assert tour_length(dist, improved) <= tour_length(dist, route) + 1e-9
+
+def test_plan_days_stops_and_distances(distances):
+    days = trip_days(100, 102)
+    hotel = 0
+    spots, food = np.arange(1, 40), np.concatenate([np.arange(40, 60), np.arange(60, 80)])
+    plan = plan_itinerary(distances, days, [hotel, 1], spots, food)
+    assert [day["day"] for day in plan] == [1, 2, 3]
+    assert all(day["hotel"] == hotel for day in plan)
+
+    stops = [s for day in plan for s in day["stops"]]
+    assert len(stops) == len(set(stops))
+    assert hotel not in stops
+    assert all(len(day["stops"]) <= SPOTS_PER_DAY + MEALS_PER_DAY for day in plan)
+    assert sum(s in set(spots.tolist()) for s in stops) == SPOTS_PER_DAY * len(days)
+    # City B food is further than MAX_STOP_KM from the hotel
+    assert not set(stops) & set(range(60, 80))
+    assert haversine_km(distances.lat[hotel], distances.lon[hotel],
+                        distances.lat[stops], distances.lon[stops]).max() <= MAX_STOP_KM
+
+    for day in plan:
+        route = np.array([hotel] + day["stops"])
+        km = haversine_km(distances.lat[route, None], distances.lon[route, None], distances.lat[route], distances.lon[route])
+        assert day["distance_km"] == pytest.approx(tour_length(km, np.arange(len(route))), rel=5e-3, abs=0.05)
+
+def test_plan_without_hotel_or_coordinates(distances):
+    plan = plan_itinerary(distances, [NO_DAY], [80], np.arange(1, 10), [])
+    assert len(plan) == 1
+    assert plan[0]["hotel"] is None
+    assert len(plan[0]["stops"]) == SPOTS_PER_DAY
+
+def test_events_stay_inside_their_dates(distances):
+    days = [100, 101, 102]
+    plan = plan_itinerary(distances, days, [0], np.arange(1, 10), [],
+                          events=[90, 91, 92], event_start=[101, 100, 150], event_end=[101, 102, 151])
+    # 90 fits day 2 only; 91 goes to the first day with the fewest events; 92 is after the trip
+    assert [d["events"] for d in plan] == [[91], [90], []]
+    dates = [d["date"] for d in plan]
+    assert all(dates) and dates == sorted(dates)
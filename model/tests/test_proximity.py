@@ -0,0 +1,48 @@
+"""Geo and KG hop proximity share one scale (geo.hop_proximity, Recommender proximity scores)."""
+
+import numpy as np
+import pytest
+
+from city_index import CityIndex
+from geo import GEO_DECAY_KM, KG_HOP_KM, GeoIndex, build_geo_index, hop_proximity
+from inference import Recommender
+from kg_distances import KGDistanceTable
+
+KM_PER_DEG = 111.195
+LAT, LON = 10.0, 76.3
+
+@pytest.fixture
+def engine(tmp_path):
+    # Kochi: items 0-1 located 3 km from the centroid, 2-3 located KG_HOP_KM away, 4-5 without
+    # coordinates at 1 and 3 hops; item 6 has no coordinates and is only linked to Munnar (2 hops)
+    dlat = 3.0 / KM_PER_DEG
+    dlon = KG_HOP_KM / (KM_PER_DEG * np.cos(np.radians(LAT)))
+    lat = [LAT + dlat, LAT - dlat, LAT, LAT, np.nan, np.nan, np.nan]
+    lon = [LON, LON, LON + dlon, LON - dlon, np.nan, np.nan, np.nan]
+    geo = GeoIndex(build_geo_index(lat, lon, ["Kochi"] * 6 + ["Munnar"]))
+    table = KGDistanceTable(np.array(["city:Kochi", "city:Munnar"]), np.array([0, 6, 7]),
+                            np.array([0, 1, 2, 3, 4, 5, 6]), np.array([1, 1, 1, 1, 1, 3, 2]),
+                            radius=6, n_items=7)
+    engine = Recommender(str(tmp_path))
+    engine.artifact_set.artifacts.update(geo_index=geo, kg_distances=table,
+                                         city_index=CityIndex.from_cities(["Kochi", "Munnar"]))
+    return engine
+
+def test_hop_proximity():
+    np.testing.assert_allclose(hop_proximity([0, 1, 2, -1]),
+                               [1.0, np.exp(-KG_HOP_KM / GEO_DECAY_KM), np.exp(-2 * KG_HOP_KM / GEO_DECAY_KM), 0.0])
+
+def test_items_without_coordinates_rank_among_located_ones(engine):
+    scores = engine.compute_proximity_scores("Kochi", np.arange(7))
+    np.testing.assert_allclose(scores[:4], np.exp(-np.array([3.0, 3.0, KG_HOP_KM, KG_HOP_KM]) / GEO_DECAY_KM),
+                               rtol=1e-3)
+    # A 1-hop item without coordinates scores like a located item KG_HOP_KM away
+    np.testing.assert_allclose(scores[4], scores[2], rtol=1e-3)
+    assert scores[0] > scores[4] > scores[5] > scores[6] == 0.0
+
+def test_corridor_scores_use_the_same_scale(engine):
+    scores = engine.compute_corridor_scores(["Kochi", "Munnar"], np.arange(7))
+    np.testing.assert_allclose(scores[4], scores[2], rtol=1e-3)
+    # Munnar has no located items: item 6 falls back to its hop distance to Munnar
+    np.testing.assert_allclose(scores[6], hop_proximity(2))
+    assert scores[5] == pytest.approx(hop_proximity(3))
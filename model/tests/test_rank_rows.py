@@ -0,0 +1,26 @@
+"""Per-row top-k with label dedup (inference.rank_rows)."""
+
+import numpy as np
+
+from inference import RANK_OVERFETCH, rank_rows
+
+def test_one_pick_per_label_best_first():
+    scores = np.array([[0.9, 0.8, 0.7, 0.6, 0.5]])
+    labels = np.array([[1, 1, 2, 3, 2]])
+    picks = rank_rows(scores, np.ones_like(scores, dtype=bool), labels, 3)
+    assert picks.tolist() == [[0, 2, 3]]
+
+def test_dropped_candidates_and_padding():
+    scores = np.array([[0.9, 0.8, 0.7], [0.1, 0.3, 0.2]])
+    keep = np.array([[False, True, True], [True, True, True]])
+    labels = np.array([[1, 2, 2], [5, 6, 7]])
+    picks = rank_rows(scores, keep, labels, 3)
+    assert picks.tolist() == [[1, -1, -1], [1, 2, 0]]
+
+def test_falls_back_to_a_full_sort_when_duplicates_fill_the_overfetch():
+    k = 2
+    n_dupes = RANK_OVERFETCH * k + 1
+    scores = np.linspace(1.0, 0.0, n_dupes + 2)[None, :]
+    labels = np.array([[7] * n_dupes + [8, 9]])
+    picks = rank_rows(scores, np.ones_like(scores, dtype=bool), labels, k)
+    assert picks.tolist() == [[0, n_dupes]]
@@ -0,0 +1,123 @@
+"""Top-k search backends (search_backends.py) against brute force, and backend selection."""
+
+import numpy as np
+import pytest
+
+import search_backends
+from inference import Recommender
+from search_backends import (EXACT_MAX_ITEMS, ExactBackend, HNSWBackend, QuantizedBackend, select_backend,
+                             topk_rows)
+
+N, DIM, K = 3000, 32, 10
+
+def normalized(x):
+    return (x / np.linalg.norm(x, axis=1, keepdims=True)).astype(np.float32)
+
+@pytest.fixture(scope="module")
+def vectors():
+    return normalized(np.random.default_rng(0).standard_normal((N, DIM)))
+
+@pytest.fixture(scope="module")
+def queries():
+    return normalized(np.random.default_rng(1).standard_normal((20, DIM)))
+
+def brute_force(vectors, queries, k, positions=None):
+    rows = np.arange(len(vectors)) if positions is None else np.asarray(positions)
+    scores = queries @ vectors[rows].T
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return rows[order], np.take_along_axis(scores, order, axis=1)
+
+def test_topk_rows():
+    scores = np.array([[0.1, 0.9, 0.5, 0.7], [4.0, 3.0, 2.0, 1.0]])
+    cols, top = topk_rows(scores, 2)
+    assert cols.tolist() == [[1, 3], [0, 1]]
+    assert top.tolist() == [[0.9, 0.7], [4.0, 3.0]]
+    cols, _ = topk_rows(scores, 10)  # k larger than the row: everything, best first
+    assert cols.tolist() == [[1, 3, 2, 0], [0, 1, 2, 3]]
+
+@pytest.mark.parametrize("block", [search_backends.SEARCH_BLOCK, 256])
+def test_exact_matches_brute_force(vectors, queries, monkeypatch, block):
+    monkeypatch.setattr(search_backends, "SEARCH_BLOCK", block)  # 256: merge top-k across blocks
+    idx, sims = ExactBackend(vectors).search(queries, K)
+    expected_idx, expected_sims = brute_force(vectors, queries, K)
+    np.testing.assert_array_equal(idx, expected_idx)
+    np.testing.assert_allclose(sims, expected_sims, rtol=1e-5, atol=1e-6)
+
+def test_exact_on_a_subset(vectors, queries):
+    positions = np.arange(5, N, 7)
+    idx, sims = ExactBackend(vectors, positions).search(queries, K)
+    expected_idx, expected_sims = brute_force(vectors, queries, K, positions)
+    np.testing.assert_array_equal(idx, expected_idx)
+    np.testing.assert_allclose(sims, expected_sims, rtol=1e-5, atol=1e-6)
+
+@pytest.mark.parametrize("dtype", ["int8", "float16"])
+@pytest.mark.parametrize("subset", [False, True])
+def test_quantized_matches_brute_force(vectors, queries, dtype, subset):
+    positions = np.arange(3, N, 2) if subset else None
+    idx, sims = QuantizedBackend(vectors, positions, dtype=dtype).search(queries, K)
+    expected_idx, expected_sims = brute_force(vectors, queries, K, positions)
+    # Candidates come from the compact copy, scores from the float32 re-rank
+    np.testing.assert_allclose(sims, np.einsum("qd,qkd->qk", queries, vectors[idx]), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(sims, expected_sims, atol=1e-2 if dtype == "int8" else 1e-3)
+    recall = np.mean([len(set(a) & set(b)) / K for a, b in zip(idx.tolist(), expected_idx.tolist())])
+    assert recall >= 0.98
+
+def test_quantize_error(vectors):
+    codes, scales = search_backends.quantize(vectors, "int8")
+    assert codes.dtype == np.int8 and np.abs(codes).max() == 127
+    # Rounding error is at most half a step of each row's scale
+    assert np.all(np.abs(codes * scales[:, None] - vectors) <= scales[:, None] / 2 + 1e-7)
+    codes16, scales16 = search_backends.quantize(vectors, "float16")
+    assert scales16 is None and np.abs(codes16.astype(np.float32) - vectors).max() < 1e-3
+
+def hnsw_index(vectors, labels):
+    hnswlib = pytest.importorskip("hnswlib")
+    index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+    index.init_index(max_elements=len(labels), ef_construction=200, M=16)
+    index.add_items(vectors, labels)
+    return index
+
+def test_hnsw_matches_brute_force(vectors, queries):
+    # Labels are a permutation of positions, mapped back through `positions`
+    labels = np.random.default_rng(2).permutation(N)
+    positions = np.empty(N, dtype=np.int64)
+    positions[labels] = np.arange(N)
+    idx, sims = HNSWBackend(hnsw_index(vectors, labels), positions).search(queries, K)
+    expected_idx, expected_sims = brute_force(vectors, queries, K)
+    recall = np.mean([len(set(a) & set(b)) / K for a, b in zip(idx.tolist(), expected_idx.tolist())])
+    assert recall >= 0.95
+    np.testing.assert_allclose(sims, np.einsum("qd,qkd->qk", queries, vectors[idx]), atol=1e-5)
+
+def test_select_backend():
+    assert select_backend(1) == "exact"
+    assert select_backend(EXACT_MAX_ITEMS) == "exact"
+    assert select_backend(EXACT_MAX_ITEMS + 1) == "hnsw"
+
+@pytest.fixture
+def engine_factory(tmp_path, vectors):
+    def make(search_backend):
+        engine = Recommender(str(tmp_path), search_backend=search_backend)
+        engine.artifact_set.artifacts.update(combined_emb=vectors, label_positions=None)
+        return engine
+    return make
+
+@pytest.mark.parametrize("n_items, has_index, expected", [
+    (N, True, "exact"),                        # small catalog: exact even with an index
+    (EXACT_MAX_ITEMS + 1, True, "hnsw"),
+    (EXACT_MAX_ITEMS + 1, False, "quantized"),  # no HNSW index: scan instead
+])
+def test_auto_selection(engine_factory, vectors, queries, n_items, has_index, expected):
+    index = hnsw_index(vectors, np.arange(N)) if has_index else None
+    backend = engine_factory("auto")._backend(n_items, None, lambda: index)
+    assert backend.name == expected
+    idx, _ = backend.search(queries, K)
+    expected_idx, _ = brute_force(vectors, queries, K)
+    assert np.mean([len(set(a) & set(b)) / K for a, b in zip(idx.tolist(), expected_idx.tolist())]) >= 0.95
+
+@pytest.mark.parametrize("name", ["exact", "quantized"])
+def test_forced_backend(engine_factory, name):
+    assert engine_factory(name)._backend(EXACT_MAX_ITEMS + 1, None, lambda: None).name == name
+
+def test_unknown_backend(tmp_path):
+    with pytest.raises(ValueError, match="Unknown search backend"):
+        Recommender(str(tmp_path), search_backend="faiss")
@@ -0,0 +1,87 @@
+"""Request validation, Content-Length handling and batch isolation in server.py."""
+
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from server import MAX_BODY_BYTES, MicroBatcher, RecommendServer
+
+VALID = {"source": "Thrissur", "destination": "Kochi", "start_date": "20 Oct 2025", "end_date": "21 Oct 2025"}
+
+class FakeEngine:
+    """Echoes the destination; any batch holding destination "boom" raises."""
+
+    def __init__(self):
+        self.batches = []
+
+    def recommend_trips(self, requests, num_threads=-1):
+        self.batches.append([r["destination"] for r in requests])
+        if any(r["destination"] == "boom" for r in requests):
+            raise RuntimeError("boom")
+        return [{"destination": r["destination"]} for r in requests]
+
+def make_server(engine=None, max_wait=0.01):
+    batcher = MicroBatcher(engine or FakeEngine(), ThreadPoolExecutor(max_workers=1), max_wait=max_wait)
+    return RecommendServer(batcher)
+
+def dispatch(body):
+    async def run():
+        return await make_server()._dispatch("POST", "/recommend", json.dumps(body).encode())
+    return asyncio.run(run())
+
+def test_valid_request():
+    assert dispatch(VALID) == (200, {"destination": "Kochi"})
+    assert dispatch(dict(VALID, **{"veg/non-veg": None}))[0] == 200
+
+@pytest.mark.parametrize("change", [
+    {"source": ["x"]},
+    {"start_date": 20251020},
+    {"destination": "   "},
+    {"end_date": {"d": 1}},
+    {"veg/non-veg": 1},
+])
+def test_invalid_fields_are_400(change):
+    status, payload = dispatch(dict(VALID, **change))
+    assert status == 400
+    assert next(iter(change)) in payload["error"]
+
+def test_missing_fields_are_400():
+    status, payload = dispatch({"source": "Thrissur"})
+    assert status == 400
+    assert "destination" in payload["error"]
+
+def test_failing_request_does_not_fail_its_batch():
+    engine = FakeEngine()
+
+    async def run():
+        server = make_server(engine, max_wait=0.05)
+        return await asyncio.gather(server._dispatch("POST", "/recommend", json.dumps(VALID).encode()),
+                                    server._dispatch("POST", "/recommend",
+                                                     json.dumps(dict(VALID, destination="boom")).encode()))
+    ok, bad = asyncio.run(run())
+    assert ok == (200, {"destination": "Kochi"})
+    assert bad == (500, {"error": "boom"})
+    # One batch of both, then each request on its own
+    assert engine.batches[0] == ["Kochi", "boom"]
+    assert sorted(map(tuple, engine.batches[1:])) == [("Kochi",), ("boom",)]
+
+def read_request(raw):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await make_server()._read_request(reader)
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("length, status", [("abc", 400), ("-5", 400), (str(MAX_BODY_BYTES + 1), 413)])
+def test_bad_content_length(length, status):
+    *_, error = read_request(f"POST /recommend HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+    assert error[0] == status
+
+def test_body_is_read():
+    body = json.dumps(VALID).encode()
+    method, path, headers, read, error = read_request(
+        b"POST /recommend HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    assert (method, path, read, error) == ("POST", "/recommend", body, None)
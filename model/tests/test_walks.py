@@ -0,0 +1,78 @@
+"""node2vec walks over the CSR graph (walks.WalkSampler, generate_walks)."""
+
+import numpy as np
+import pytest
+
+from kg_csr import KGGraph, write_csr
+from walks import SCAN_DEGREE, WalkSampler, generate_walks
+
+@pytest.fixture(scope="module")
+def dense_dir(tmp_path_factory):
+    # 50 nodes with 2 * 12 edges each (every edge both ways): rows too long to scan in _has_edge
+    rng = np.random.default_rng(3)
+    n = 50
+    src = np.repeat(np.arange(n), 12)
+    dst = (src + rng.integers(1, n, src.size)) % n
+    pairs = np.unique(np.concatenate([np.stack([src, dst], 1), np.stack([dst, src], 1)]), axis=0)
+    path = str(tmp_path_factory.mktemp("dense"))
+    write_csr(path, [f"n{i}" for i in range(n)], [f"n{i}" for i in range(n)], np.zeros(n), ["node"],
+              pairs[:, 0], pairs[:, 1], np.zeros(len(pairs)), ["edge"])
+    return path
+
+@pytest.fixture(scope="module", params=["toy", "dense"])
+def graph_dir(request, toy_kg, dense_dir):
+    return toy_kg[1] if request.param == "toy" else dense_dir
+
+def out_edges(kg):
+    return {(u, int(v)) for u in range(kg.n_nodes) for v in kg.neighbors(u)}
+
+@pytest.mark.parametrize("p, q", [(1.0, 1.0), (0.5, 2.0), (4.0, 0.25)])
+def test_walks_follow_out_edges_and_pad_after_dead_ends(graph_dir, p, q):
+    kg = KGGraph(graph_dir)
+    sampler = WalkSampler(kg, p=p, q=q, walk_length=12)
+    walks = sampler.walks(np.repeat(np.arange(kg.n_nodes), 3), np.random.default_rng(0))
+    assert walks.shape == (3 * kg.n_nodes, 12)
+    edges = out_edges(kg)
+    degree = np.diff(kg.indptr)
+    for walk in walks:
+        n = int(np.argmax(walk < 0)) if (walk < 0).any() else walk.size
+        assert (walk[n:] == -1).all()
+        assert all((int(a), int(b)) in edges for a, b in zip(walk[:n - 1], walk[1:n]))
+        # Padding starts only at a node without out-edges
+        if n < walk.size:
+            assert degree[walk[n - 1]] == 0
+
+def test_dead_end_start(toy_kg):
+    kg = KGGraph(toy_kg[1])
+    dead = kg.index["type:Beach"]
+    walk = WalkSampler(kg, walk_length=5).walks([dead], np.random.default_rng(0))
+    assert walk.tolist() == [[dead, -1, -1, -1, -1]]
+
+def test_has_edge(dense_dir, toy_kg):
+    for path in (dense_dir, toy_kg[1]):
+        kg = KGGraph(path)
+        sampler = WalkSampler(kg)
+        edges = out_edges(kg)
+        src, dst = np.divmod(np.arange(kg.n_nodes ** 2), kg.n_nodes)
+        expected = np.array([(int(a), int(b)) in edges for a, b in zip(src, dst)])
+        np.testing.assert_array_equal(sampler._has_edge(src, dst), expected)
+    assert np.diff(KGGraph(dense_dir).indptr).max() > SCAN_DEGREE
+
+def test_return_bias(dense_dir):
+    # A small p makes returning to the previous node far more likely than a large p
+    kg = KGGraph(dense_dir)
+    starts = np.repeat(np.arange(kg.n_nodes), 20)
+    def return_rate(p):
+        walks = WalkSampler(kg, p=p, q=1.0, walk_length=10).walks(starts, np.random.default_rng(1))
+        return np.mean(walks[:, 2:] == walks[:, :-2])
+    assert return_rate(0.05) > 0.3 > return_rate(1.0) > 0.01 > return_rate(20.0)
+
+@pytest.mark.parametrize("p, q", [(1.0, 1.0), (0.5, 2.0)])
+def test_walks_do_not_depend_on_workers(graph_dir, p, q):
+    def run(workers):
+        return np.concatenate(list(generate_walks(graph_dir, num_walks=3, walk_length=10, p=p, q=q,
+                                                  workers=workers, seed=11, chunk_walks=16)))
+    single = run(1)
+    np.testing.assert_array_equal(single, run(3))
+    assert not np.array_equal(single, np.concatenate(list(generate_walks(
+        graph_dir, num_walks=3, walk_length=10, p=p, q=q, workers=1, seed=12, chunk_walks=16))))